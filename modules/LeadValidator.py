@@ -1,5 +1,14 @@
+import os
 import re
 import requests
+try:
+    from .http_client import get_session_pool
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.http_client import get_session_pool
 
 class LeadValidator:
     """
@@ -7,8 +16,9 @@ class LeadValidator:
     like email format and social media profile existence.
     """
 
-    def __init__(self, validation_api_key=None):
+    def __init__(self, validation_api_key=None, session_pool=None):
         self.api_key = validation_api_key
+        self.session_pool = session_pool or get_session_pool()
 
     def _check_email_format(self, email: str) -> bool:
         """
@@ -39,7 +49,7 @@ class LeadValidator:
 
         url = f"https://www.instagram.com/{insta_id}/"
         try:
-            response = requests.head(url, timeout=5)
+            response = self.session_pool.head(url, timeout=5)
 
             return response.status_code < 400
         except requests.RequestException:
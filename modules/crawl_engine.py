@@ -0,0 +1,85 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+
+class AsyncCrawlEngine:
+    """
+    Runs the per-seed A* crawl of a LeadExtractor concurrently on an asyncio loop.
+
+    Each seed is handed to `extractor.crawl_seed` in a worker thread of the engine's own
+    pool (`max_concurrency` threads, independent of the loop's default executor), so the
+    blocking fetches of different seeds overlap. Wall-clock time per keyword becomes
+    roughly that of the slowest seed instead of the sum of all seeds.
+    """
+
+    def __init__(self, extractor, max_concurrency: int = 5, per_host_limit: int = 1, host_key=None):
+        """
+        Args:
+            extractor: The LeadExtractor whose `crawl_seed` is run for every seed.
+            max_concurrency (int): Maximum number of seeds crawled at the same time.
+            per_host_limit (int): Maximum number of seeds of one host crawled at the same time.
+            host_key (callable): Maps a seed URL to its host key (default: the netloc); seeds with
+                the same key share the per-host limit.
+        """
+        self.extractor = extractor
+        self.host_key = host_key or (lambda seed: urlparse(seed).netloc)
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.per_host_limit = max(1, int(per_host_limit))
+
+    def _crawl_and_report(self, seed: str, seen_domains: set, on_result=None):
+        # Runs in a worker thread: on_result (storage, checkpoint writes) stays off the event loop
+        lead = self.extractor.crawl_seed(seed, seen_domains)
+        if on_result is not None:
+            on_result(seed, lead)
+        return lead
+
+    async def _crawl_one(self, seed: str, seen_domains: set, global_slots, host_slots: dict, executor, on_result=None,
+                         collect=True):
+        host = self.host_key(seed)
+        if host not in host_slots:
+            host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        # Take the host slot first so a seed queued behind its own host does not hold a global slot.
+        async with host_slots[host]:
+            async with global_slots:
+                lead = await asyncio.get_running_loop().run_in_executor(
+                    executor, self._crawl_and_report, seed, seen_domains, on_result)
+        return lead if collect else None
+
+    async def _crawl_all(self, seeds: list[str], on_result=None, collect=True) -> list:
+        global_slots = asyncio.Semaphore(self.max_concurrency)
+        host_slots = {}
+        seen_domains = set()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='crawl-seed') as executor:
+            tasks = [self._crawl_one(seed, seen_domains, global_slots, host_slots, executor, on_result, collect)
+                     for seed in seeds]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        leads = []
+        for seed, result in zip(seeds, results):
+            if isinstance(result, BaseException):
+                log_status(f"❌ Error processing {seed}: {str(result)[:80]}. Skipping to next URL...")
+                leads.append(None)
+            else:
+                leads.append(result)
+        return leads
+
+    def run(self, seeds: list[str], on_result=None, collect: bool = True) -> list:
+        """
+        Crawls all seeds and returns one entry per seed (a Lead or None), in seed order.
+        `on_result(seed, lead)` is called from the seed's worker thread as soon as it finishes (not
+        for seeds that raised), so it must be thread-safe.
+        With `collect=False` leads are only handed to `on_result` and every entry is None.
+        """
+        if not seeds:
+            return []
+        log_status(f"⚡ Crawling {len(seeds)} seeds (concurrency={self.max_concurrency}, per host={self.per_host_limit})")
+        return asyncio.run(self._crawl_all(list(seeds), on_result, collect))
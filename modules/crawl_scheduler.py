@@ -0,0 +1,307 @@
+"""Run-level crawl budget and cross-keyword priority scheduling.
+
+`MAX_VISITS` / `MAX_DEPTH` only bound a single seed, so a run over many keywords has no
+overall cap. `CrawlBudget` is a total page-fetch budget (and optional time budget) for a
+whole run. `BudgetedCrawlScheduler` crawls the seeds of every keyword of a run from one
+priority queue: each seed's A* frontier (`SeedFrontier`) competes with all others by the
+f-cost of its best next page, so budget goes to the most promising pages first instead
+of being spent seed by seed in search-result order.
+"""
+
+import collections
+import heapq
+import itertools
+import os
+import threading
+import time
+from urllib.parse import urlparse
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+
+class CrawlBudget:
+    """
+    Thread-safe page-fetch budget (and optional wall-clock budget) shared by every seed
+    and keyword of a run. The clock starts at the first `try_spend`.
+    """
+
+    def __init__(self, max_fetches: int = None, max_seconds: float = None, clock=time.monotonic):
+        """
+        Args:
+            max_fetches (int): Page visits allowed in the run (None = unlimited).
+            max_seconds (float): Seconds after which no new page visit is granted (None = unlimited).
+            clock (callable): Monotonic time source, injectable for testing.
+        """
+        self.max_fetches = max_fetches if max_fetches else None
+        self.max_seconds = max_seconds if max_seconds else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started_at = None
+        self._stopped_reason = None
+        self.fetches = 0
+        self.leads = 0
+        self.keyword_fetches = collections.Counter()
+        self.keyword_leads = collections.Counter()
+
+    def _elapsed(self) -> float:
+        return 0.0 if self._started_at is None else self._clock() - self._started_at
+
+    def try_spend(self, keyword: str = None) -> bool:
+        """Takes one page visit from the budget. Returns False once the fetch or time budget is used up."""
+        with self._lock:
+            if self._started_at is None:
+                self._started_at = self._clock()
+            if self.max_fetches is not None and self.fetches >= self.max_fetches:
+                self._stopped_reason = self._stopped_reason or 'fetch budget'
+                return False
+            if self.max_seconds is not None and self._elapsed() >= self.max_seconds:
+                self._stopped_reason = self._stopped_reason or 'time budget'
+                return False
+            self.fetches += 1
+            self.keyword_fetches[keyword] += 1
+            return True
+
+    def remaining(self):
+        """Page visits left in the fetch budget, or None when it is unlimited."""
+        with self._lock:
+            return None if self.max_fetches is None else max(0, self.max_fetches - self.fetches)
+
+    @property
+    def exhausted(self) -> bool:
+        """True once a request for budget has been refused."""
+        with self._lock:
+            return self._stopped_reason is not None
+
+    def record_lead(self, keyword: str = None):
+        """Counts a complete lead found with this budget."""
+        with self._lock:
+            self.leads += 1
+            self.keyword_leads[keyword] += 1
+
+    def report(self) -> dict:
+        """Budget spent versus leads found, overall and per keyword."""
+        with self._lock:
+            keywords = [k for k in self.keyword_fetches if k is not None]
+            return {
+                'max_fetches': self.max_fetches,
+                'fetches': self.fetches,
+                'max_seconds': self.max_seconds,
+                'seconds': round(self._elapsed(), 2),
+                'leads': self.leads,
+                'fetches_per_lead': round(self.fetches / self.leads, 2) if self.leads else None,
+                'stopped_by': self._stopped_reason,
+                'keywords': {k: {'fetches': self.keyword_fetches[k], 'leads': self.keyword_leads[k]} for k in keywords},
+            }
+
+
+class SeedFrontier:
+    """
+    A* state of one seed: its heap of (f-cost, depth, url), visited set, the anchor text
+    that led to each URL, the pages visited so far and how many of them returned a page. Used by LeadExtractor.bfs for a single
+    seed and by BudgetedCrawlScheduler for many seeds at once.
+    """
+
+    def __init__(self, start_node: str, keyword: str = None):
+        self.start_node = start_node
+        self.keyword = keyword
+        self.queue = []
+        self.visited = set()
+        self.link_texts = {}
+        self.visits = 0
+        # Visits that got an HTTP 2xx page; 0 means the site was never actually reached
+        self.pages_fetched = 0
+        self.opened = False
+        # Set once LeadExtractor has read the site's sitemap without running out of budget
+        # (see LeadExtractor.needs_sitemap / push_sitemap_candidates)
+        self.sitemap_checked = False
+        self.done = False
+        self.lead = None
+
+    def push(self, fcost: float, depth: int, url: str, link_text: str = "") -> bool:
+        """Adds an unvisited URL to the heap. Returns False if it was already known."""
+        if url in self.visited:
+            return False
+        self.visited.add(url)
+        self.link_texts[url] = link_text
+        heapq.heappush(self.queue, (fcost, depth, url))
+        return True
+
+    def best_cost(self):
+        """F-cost of the best queued page, or None when the heap is empty."""
+        return self.queue[0][0] if self.queue else None
+
+
+class BudgetedCrawlScheduler:
+    """
+    Crawls the seeds of many keywords under one CrawlBudget. A global heap holds every
+    seed frontier keyed by the f-cost of its best next page. `max_concurrency` worker
+    threads repeatedly take the globally best frontier, visit that one page through the
+    extractor, and put the frontier back with its new best cost (see `_may_start` for how
+    the last fetches of the budget are held back). A frontier is never visited by two
+    workers at once, and there is one frontier per site (registrable domain), so a site
+    still sees one request at a time.
+    """
+
+    def __init__(self, extractor, budget: CrawlBudget, max_concurrency: int = 5):
+        """
+        Args:
+            extractor: The LeadExtractor doing the fetching, parsing and scoring.
+            budget (CrawlBudget): The run-level budget.
+            max_concurrency (int): Pages fetched at the same time.
+        """
+        self.extractor = extractor
+        self.budget = budget
+        self.max_concurrency = max(1, int(max_concurrency))
+        self._condition = threading.Condition()
+        self._heap = []
+        self._sequence = itertools.count()
+        self._busy = 0
+        # Sites whose homepage has not been fetched yet (see _spend_on_discovery)
+        self._unvisited = 0
+
+    def _push(self, frontier: SeedFrontier, cost: float):
+        heapq.heappush(self._heap, (cost, next(self._sequence), frontier))
+
+    def _open_frontiers(self, seeds_by_keyword: dict) -> list:
+        frontiers = []
+        hosts = set()
+        for keyword, seeds in seeds_by_keyword.items():
+            for seed in seeds:
+                parsed_seed = urlparse(seed)
+                site = self.extractor.site_key(seed)
+                if not parsed_seed.netloc or site in hosts:
+                    continue
+                hosts.add(site)
+                if not self.extractor.should_crawl_site(seed):
+                    continue
+                start_node = self.extractor.normalize_url_key(f"{parsed_seed.scheme}://{parsed_seed.netloc}")
+                frontier = SeedFrontier(start_node, keyword)
+                frontiers.append(frontier)
+                self._unvisited += 1
+                # Unopened frontiers compete with the cost of their homepage
+                self._push(frontier, self.extractor.calculate_heuristic(start_node, ""))
+        return frontiers
+
+    def _may_start(self) -> bool:
+        """
+        Near the end of the fetch budget, waits for pages in flight before starting another:
+        the links they discover may be cheaper than anything queued now, and should compete
+        for the last fetches. Each page in flight keeps one fetch in reserve for a follow-up.
+        """
+        remaining = self.budget.remaining()
+        return remaining is None or self._busy == 0 or remaining > 2 * self._busy
+
+    def _take(self):
+        """Blocks until a frontier is available; returns None when the crawl is over."""
+        with self._condition:
+            while True:
+                if self.budget.exhausted:
+                    return None
+                if self._heap and self._may_start():
+                    _, _, frontier = heapq.heappop(self._heap)
+                    self._busy += 1
+                    return frontier
+                if self._busy == 0:
+                    return None
+                self._condition.wait()
+
+    def _release(self, frontier: SeedFrontier):
+        with self._condition:
+            self._busy -= 1
+            if not frontier.done and frontier.best_cost() is not None:
+                self._push(frontier, frontier.best_cost())
+            self._condition.notify_all()
+
+    def _spend_on_discovery(self, keyword: str) -> bool:
+        """
+        Charges one robots.txt/sitemap fetch to the budget, but only out of its surplus: one fetch
+        stays reserved for the homepage of every unvisited site and for a follow-up of every page in flight.
+        """
+        remaining = self.budget.remaining()
+        with self._condition:
+            reserved = self._unvisited + self._busy
+        if remaining is not None and remaining <= reserved:
+            return False
+        return self.budget.try_spend(keyword)
+
+    def _step(self, frontier: SeedFrontier):
+        """Opens an unopened frontier or visits its best page (sitemap discovery may follow, see expand_frontier)."""
+        if not frontier.opened:
+            self.extractor.open_frontier(frontier)
+            if frontier.visits:
+                # Resumed from a checkpoint: its homepage was fetched in an earlier run
+                with self._condition:
+                    self._unvisited -= 1
+            return
+        first_visit = frontier.visits == 0
+        node = self.extractor.next_frontier_node(frontier)
+        if first_visit:
+            with self._condition:
+                self._unvisited -= 1
+        if node is None:
+            frontier.done = True
+            # A site that only answered with errors may be back next time
+            if frontier.pages_fetched:
+                self.extractor.record_site_crawl(frontier.start_node, False)
+            return
+        if not self.budget.try_spend(frontier.keyword):
+            frontier.done = True
+            return
+        _, depth, url = node
+        lead = self.extractor.expand_frontier(frontier, url, depth,
+                                              spend=lambda: self._spend_on_discovery(frontier.keyword))
+        if lead is not None:
+            # Recorded in the known-domain index once the lead is stored (see LeadGenerationTool._record_outcome)
+            frontier.done = True
+            self.budget.record_lead(frontier.keyword)
+
+    def _worker(self):
+        while True:
+            frontier = self._take()
+            if frontier is None:
+                with self._condition:
+                    self._condition.notify_all()
+                return
+            try:
+                self._step(frontier)
+            except Exception as e:
+                log_status(f"❌ Error processing {frontier.start_node}: {str(e)[:80]}. Skipping to next URL...")
+                frontier.done = True
+            finally:
+                self._release(frontier)
+
+    def _requests_made(self) -> int:
+        """Network requests of the extractor so far: page fetches (retries included) and robots.txt/sitemap documents."""
+        stats = self.extractor.fetch_stats()
+        return stats['fetches'] + stats['sitemap_documents']
+
+    def run(self, seeds_by_keyword: dict) -> dict:
+        """
+        Crawls {keyword: [seed urls]} until every frontier is finished or the budget is used up.
+        Returns {keyword: [Lead, ...]} in the order the leads were found.
+        """
+        frontiers = self._open_frontiers(seeds_by_keyword)
+        requests_before = self._requests_made()
+        log_status(f"💰 Budgeted crawl of {len(frontiers)} sites for {len(seeds_by_keyword)} keywords "
+                   f"(fetch budget: {self.budget.max_fetches or 'unlimited'}, time budget: {self.budget.max_seconds or 'unlimited'}s)")
+        workers = [threading.Thread(target=self._worker, daemon=True) for _ in range(min(self.max_concurrency, len(frontiers)))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        leads = {keyword: [] for keyword in seeds_by_keyword}
+        for frontier in frontiers:
+            if frontier.lead is not None:
+                leads[frontier.keyword].append(frontier.lead)
+        report = self.budget.report()
+        log_status(f"💰 Budget spent: {report['fetches']}/{report['max_fetches'] or '∞'} fetches "
+                   f"({self._requests_made() - requests_before} HTTP requests incl. retries and sitemaps) in {report['seconds']}s, "
+                   f"{report['leads']} leads ({report['fetches_per_lead']} fetches per lead)"
+                   + (f", stopped by {report['stopped_by']}" if report['stopped_by'] else ""))
+        return leads
@@ -0,0 +1,420 @@
+"""Resumable crawl state, checkpointed to a local SQLite file.
+
+A restart of the Streamlit process used to lose the whole run: the A* frontier of every
+site, the seeds already crawled and the leads found but not stored yet. `CrawlStateStore`
+checkpoints, per run ID:
+
+- the seed list of every keyword and the result of every crawled seed (lead or none),
+- the number of leads stored for a keyword once it is finished, or the error it failed with,
+- the frontier of every site being crawled (heap, visited set, anchor texts, visits, lead).
+
+A run ends as 'finished' even when some keywords failed; those keep their error and no stored
+count, so resuming the run by ID retries only them. Runs not updated for `KEEP_DAYS` are
+pruned (with their keywords, seed results and frontiers) whenever a store is opened.
+
+Frontier writes are coalesced to at most one per site every `checkpoint_interval`
+seconds, so the cost per page stays bounded; `stats()` reports what it actually was.
+Page bodies are not part of the state: `http_cache.db` already keeps them across restarts.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from sqlalchemy import create_engine, event, inspect, text, Column, String, Integer, Float, Text
+from sqlalchemy.orm import sessionmaker, declarative_base
+try:
+    from .Lead import Lead
+    from .crawl_scheduler import SeedFrontier
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.Lead import Lead
+    from modules.crawl_scheduler import SeedFrontier
+    from modules.shared_log import log_status
+
+Base = declarative_base()
+
+
+class CrawlRunORM(Base):
+    """One run: its keywords and whether it finished."""
+    __tablename__ = 'crawl_runs'
+
+    run_id = Column(String(64), primary_key=True)
+    keywords = Column(Text, nullable=False)  # JSON list
+    status = Column(String(16), nullable=False, default='running')
+    created_at = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False)
+
+
+class KeywordStateORM(Base):
+    """
+    Seed list of a keyword (once searched), the number of leads stored (once finished), or the
+    stage and error it failed with at the end of the run.
+    """
+    __tablename__ = 'crawl_keywords'
+
+    run_id = Column(String(64), primary_key=True)
+    keyword = Column(String(255), primary_key=True)
+    seeds = Column(Text, nullable=True)  # JSON list
+    stored = Column(Integer, nullable=True)
+    failed_stage = Column(String(16), nullable=True)
+    error = Column(Text, nullable=True)
+
+
+class SeedResultORM(Base):
+    """Result of one crawled seed of a keyword; lead is NULL when the seed produced none."""
+    __tablename__ = 'crawl_seed_results'
+
+    run_id = Column(String(64), primary_key=True)
+    keyword = Column(String(255), primary_key=True)
+    seed = Column(String(2048), primary_key=True)
+    lead = Column(Text, nullable=True)  # JSON object
+
+
+class FrontierStateORM(Base):
+    """A* state of one site of a run."""
+    __tablename__ = 'crawl_frontiers'
+
+    run_id = Column(String(64), primary_key=True)
+    start_node = Column(String(2048), primary_key=True)
+    queue = Column(Text, nullable=False)  # JSON list of [fcost, depth, url]
+    visited = Column(Text, nullable=False)  # JSON list
+    link_texts = Column(Text, nullable=False)  # JSON object
+    visits = Column(Integer, default=0)
+    pages_fetched = Column(Integer, default=0)
+    sitemap_checked = Column(Integer, default=0)
+    done = Column(Integer, default=0)
+    lead = Column(Text, nullable=True)  # JSON object
+    saved_at = Column(Float, nullable=False)
+
+
+def lead_to_json(lead: Lead) -> str:
+    if lead is None:
+        return None
+    return json.dumps({
+        'title': lead.title,
+        'email': lead.email,
+        'website_url': lead.source_url,
+        'scraped_at': lead.scraped_at,
+        'instagram_id': lead.instagram_id,
+        'is_email_valid': lead.is_email_valid,
+        'is_insta_valid': lead.is_insta_valid,
+        'is_lead_valid': lead.is_lead_valid,
+    })
+
+
+def lead_from_json(value: str) -> Lead:
+    if not value:
+        return None
+    data = json.loads(value)
+    lead = Lead(data['title'], data['email'], data['website_url'], data['scraped_at'], data.get('instagram_id'))
+    lead.is_email_valid = data.get('is_email_valid', False)
+    lead.is_insta_valid = data.get('is_insta_valid', False)
+    lead.is_lead_valid = data.get('is_lead_valid', False)
+    return lead
+
+
+class CrawlStateStore:
+    """
+    Checkpoints of one run, identified by `run_id`. Opening a store with the ID of an
+    earlier run resumes it. Thread-safe: the keywords and sites of a run are crawled in parallel.
+    """
+    DB_FILE_NAME = 'crawl_state.db'
+    CHECKPOINT_INTERVAL = 2.0
+    # Runs (finished or not) not updated for this long are dropped when a store is opened
+    KEEP_DAYS = 14
+
+    def __init__(self, run_id: str = None, keywords: list = None, db_file: str = None,
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL, clock=time.monotonic,
+                 keep_days: float = KEEP_DAYS):
+        """
+        Args:
+            run_id (str): Run to resume; a new run is created when it is None or unknown.
+            keywords (list): Keywords of a new run (ignored when resuming).
+            db_file (str): SQLite file; defaults to crawl_state.db in the 'modules' directory.
+            checkpoint_interval (float): Minimum seconds between two frontier writes of the same site.
+            clock (callable): Monotonic time source, injectable for testing.
+            keep_days (float): Age after which other runs are pruned (see prune).
+        """
+        if db_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            db_file = os.path.join(current_dir, self.DB_FILE_NAME)
+        self.engine = create_engine(f'sqlite:///{db_file}')
+        # WAL without a sync per commit: a checkpoint costs a page append, not an fsync
+        event.listen(self.engine, 'connect', _enable_wal)
+        _create_schema(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.checkpoint_interval = checkpoint_interval
+        self._clock = clock
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._last_saved = {}
+        self.pages = 0
+        self.writes = 0
+        self.write_seconds = 0.0
+        self.bytes_written = 0
+        self.run_id, self.keywords, self.resumed = self._open_run(run_id, keywords or [])
+        self.prune(keep_days)
+
+    def _open_run(self, run_id: str, keywords: list):
+        session = self.Session()
+        try:
+            run = session.get(CrawlRunORM, run_id) if run_id else None
+            if run is not None:
+                run.status = 'running'
+                run.updated_at = time.time()
+                session.commit()
+                return run.run_id, json.loads(run.keywords), True
+            run_id = run_id or uuid.uuid4().hex[:12]
+            now = time.time()
+            session.add(CrawlRunORM(run_id=run_id, keywords=json.dumps(list(keywords)), status='running',
+                                    created_at=now, updated_at=now))
+            session.commit()
+            return run_id, list(keywords), False
+        finally:
+            session.close()
+
+    def _write(self, *rows):
+        started_at = time.perf_counter()
+        with self._write_lock:
+            session = self.Session()
+            try:
+                for row in rows:
+                    session.merge(row)
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+        with self._stats_lock:
+            self.writes += 1
+            self.write_seconds += time.perf_counter() - started_at
+
+    # --- keyword loop ---
+
+    def load_keyword(self, keyword: str):
+        """Returns (seeds or None, {seed: Lead or None}, stored count or None) checkpointed for `keyword`."""
+        session = self.Session()
+        try:
+            state = session.get(KeywordStateORM, (self.run_id, keyword))
+            results = session.query(SeedResultORM).filter_by(run_id=self.run_id, keyword=keyword).all()
+            seeds = json.loads(state.seeds) if state is not None and state.seeds is not None else None
+            stored = state.stored if state is not None else None
+            return seeds, {row.seed: lead_from_json(row.lead) for row in results}, stored
+        finally:
+            session.close()
+
+    def save_seeds(self, keyword: str, seeds: list):
+        self._write(KeywordStateORM(run_id=self.run_id, keyword=keyword, seeds=json.dumps(list(seeds))))
+
+    def save_seed_result(self, keyword: str, seed: str, lead: Lead):
+        self._write(SeedResultORM(run_id=self.run_id, keyword=keyword, seed=seed, lead=lead_to_json(lead)))
+
+    def save_stored(self, keyword: str, seeds: list, stored: int):
+        self._write(KeywordStateORM(run_id=self.run_id, keyword=keyword, seeds=json.dumps(list(seeds)), stored=stored,
+                                    failed_stage=None, error=None))
+
+    def failed_keywords(self) -> dict:
+        """{keyword: (stage, error)} of the keywords that failed when the run last finished."""
+        session = self.Session()
+        try:
+            rows = session.query(KeywordStateORM).filter(KeywordStateORM.run_id == self.run_id,
+                                                         KeywordStateORM.failed_stage.isnot(None)).all()
+            return {row.keyword: (row.failed_stage, row.error) for row in rows}
+        finally:
+            session.close()
+
+    # --- frontiers ---
+
+    def restore_frontier(self, frontier: SeedFrontier) -> bool:
+        """Loads the checkpointed state of `frontier`'s site into it. Returns False if there is none."""
+        session = self.Session()
+        try:
+            row = session.get(FrontierStateORM, (self.run_id, frontier.start_node))
+            if row is None:
+                return False
+            frontier.queue = [tuple(entry) for entry in json.loads(row.queue)]
+            frontier.visited = set(json.loads(row.visited))
+            frontier.link_texts = json.loads(row.link_texts)
+            frontier.visits = row.visits
+            frontier.pages_fetched = row.pages_fetched or 0
+            frontier.sitemap_checked = bool(row.sitemap_checked)
+            frontier.opened = True
+            frontier.done = bool(row.done)
+            frontier.lead = lead_from_json(row.lead)
+        finally:
+            session.close()
+        with self._stats_lock:
+            self._last_saved[frontier.start_node] = self._clock()
+        return True
+
+    def save_frontier(self, frontier: SeedFrontier, force: bool = False) -> bool:
+        """
+        Called after every page of `frontier`. Writes its state when `force` is set, when the
+        frontier is done, or when its last write is `checkpoint_interval` seconds old.
+        Returns True if it was written. A failed write is logged, not raised: losing a
+        checkpoint must not end the crawl.
+        """
+        now = self._clock()
+        with self._stats_lock:
+            self.pages += 1
+            last_saved = self._last_saved.get(frontier.start_node)
+            if not (force or frontier.done or last_saved is None or now - last_saved >= self.checkpoint_interval):
+                return False
+            self._last_saved[frontier.start_node] = now
+        queue = json.dumps([list(entry) for entry in frontier.queue])
+        visited = json.dumps(sorted(frontier.visited))
+        link_texts = json.dumps(frontier.link_texts)
+        lead = lead_to_json(frontier.lead)
+        try:
+            self._write(FrontierStateORM(run_id=self.run_id, start_node=frontier.start_node, queue=queue,
+                                         visited=visited, link_texts=link_texts, visits=frontier.visits,
+                                         pages_fetched=frontier.pages_fetched,
+                                         sitemap_checked=1 if frontier.sitemap_checked else 0,
+                                         done=1 if frontier.done else 0, lead=lead, saved_at=time.time()))
+        except Exception as e:
+            log_status(f"⚠️ Could not checkpoint {frontier.start_node}: {str(e)[:80]}")
+            return False
+        with self._stats_lock:
+            self.bytes_written += len(queue) + len(visited) + len(link_texts) + len(lead or '')
+        return True
+
+    # --- run ---
+
+    def finish(self, failed: dict = None):
+        """
+        Marks the run finished and drops its frontiers (the keyword checkpoints stay as the run's
+        record). `failed` maps each keyword that failed to its (stage, error); those keywords keep
+        no stored count, so resuming the run retries them.
+        """
+        with self._write_lock:
+            session = self.Session()
+            try:
+                session.query(FrontierStateORM).filter_by(run_id=self.run_id).delete()
+                for keyword, (stage, error) in (failed or {}).items():
+                    state = session.get(KeywordStateORM, (self.run_id, keyword))
+                    if state is None:
+                        state = KeywordStateORM(run_id=self.run_id, keyword=keyword)
+                        session.add(state)
+                    state.failed_stage = stage
+                    state.error = str(error)[:500]
+                run = session.get(CrawlRunORM, self.run_id)
+                if run is not None:
+                    run.status = 'finished'
+                    run.updated_at = time.time()
+                session.commit()
+            finally:
+                session.close()
+
+    def prune(self, keep_days: float = KEEP_DAYS) -> int:
+        """
+        Deletes every other run not updated for `keep_days`, with its keywords, seed results and
+        frontiers. Returns the number of runs deleted; a failure is logged, not raised.
+        """
+        cutoff = time.time() - keep_days * 86400
+        with self._write_lock:
+            session = self.Session()
+            try:
+                run_ids = [run_id for (run_id,) in session.query(CrawlRunORM.run_id)
+                           .filter(CrawlRunORM.updated_at < cutoff, CrawlRunORM.run_id != self.run_id)]
+                for table in (FrontierStateORM, SeedResultORM, KeywordStateORM, CrawlRunORM):
+                    session.query(table).filter(table.run_id.in_(run_ids)).delete(synchronize_session=False)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                log_status(f"⚠️ Could not prune old crawl runs: {str(e)[:80]}")
+                return 0
+            finally:
+                session.close()
+        if run_ids:
+            log_status(f"🧹 Pruned {len(run_ids)} crawl runs older than {keep_days:g} days")
+        return len(run_ids)
+
+    def stats(self) -> dict:
+        """Checkpoint writes, the time they took and their cost per crawled page."""
+        with self._stats_lock:
+            return {
+                'run_id': self.run_id,
+                'pages': self.pages,
+                'writes': self.writes,
+                'write_seconds': round(self.write_seconds, 4),
+                'frontier_bytes': self.bytes_written,
+                'ms_per_page': round(1000 * self.write_seconds / self.pages, 3) if self.pages else 0.0,
+            }
+
+
+def _create_schema(engine):
+    """Creates the tables, adding the columns that state files of older versions lack."""
+    Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(engine.dialect)
+                    connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.close()
+
+
+def unfinished_runs(db_file: str = None) -> list:
+    """Runs that were not finished, newest first, as [(run_id, keywords, updated_at)]."""
+    if db_file is None:
+        db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), CrawlStateStore.DB_FILE_NAME)
+    if not os.path.exists(db_file):
+        return []
+    engine = create_engine(f'sqlite:///{db_file}')
+    _create_schema(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        runs = (session.query(CrawlRunORM).filter(CrawlRunORM.status != 'finished')
+                .order_by(CrawlRunORM.updated_at.desc()).all())
+        return [(run.run_id, json.loads(run.keywords), run.updated_at) for run in runs]
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def benchmark(pages: int = 300, queued: int = 200) -> dict:
+    """
+    Checkpoints a frontier holding `queued` URLs after each of `pages` simulated page visits,
+    once writing on every page and once with the default CHECKPOINT_INTERVAL, and reports
+    the write overhead per page (in a temporary database).
+    """
+    import tempfile
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, interval in (('every_page', 0.0), ('interval', CrawlStateStore.CHECKPOINT_INTERVAL)):
+            store = CrawlStateStore(keywords=['benchmark'], db_file=os.path.join(tmp, f'{label}.db'),
+                                    checkpoint_interval=interval)
+            frontier = SeedFrontier('https://www.example-brand.com')
+            for i in range(queued):
+                frontier.push(2 + i % 5, 1, f'https://www.example-brand.com/collections/item-{i}', f'Item {i}')
+            started = time.perf_counter()
+            for page in range(pages):
+                frontier.visits += 1
+                frontier.push(3, 2, f'https://www.example-brand.com/pages/page-{page}', 'More')
+                store.save_frontier(frontier)
+                time.sleep(0.005)  # stands in for the fetch and parse of the page
+            elapsed = time.perf_counter() - started
+            stats = store.stats()
+            report[label] = {'writes': stats['writes'], 'ms_per_page': stats['ms_per_page'],
+                             'overhead_percent': round(100 * stats['write_seconds'] / elapsed, 2)}
+            store.engine.dispose()
+    return report
+
+
+if __name__ == "__main__":
+    print(benchmark())
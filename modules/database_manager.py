@@ -1,4 +1,5 @@
 import os
+import threading
 from typing import List
 from sqlalchemy import create_engine, Column, String, Integer
 from sqlalchemy.orm import sessionmaker, declarative_base
@@ -80,11 +81,20 @@ class DatabaseManager:
         
         # Create a configured Session class
         self.Session = sessionmaker(bind=self.engine)
+        # Serializes writers: keywords processed in parallel share this manager, and the
+        # check-then-insert in add_all_leads must not interleave
+        self._write_lock = threading.Lock()
 
-    def add_all_leads(self, leads: List[Lead], keyword: str = None) -> int:
+    def add_all_leads(self, leads: List[Lead], keyword: str = None, raise_errors: bool = False) -> int:
         """
         Adds a list of Lead objects to the database, skipping duplicates.
+        Safe to call from several threads at once. Database errors are logged and 0 is
+        returned, unless `raise_errors` is set (for callers that retry the write).
         """
+        with self._write_lock:
+            return self._add_all_leads(leads, keyword, raise_errors)
+
+    def _add_all_leads(self, leads: List[Lead], keyword: str = None, raise_errors: bool = False) -> int:
         session = self.Session()
         new_leads_added = 0
         try:
@@ -118,6 +128,8 @@ class DatabaseManager:
 
         except Exception as e:
             session.rollback()
+            if raise_errors:
+                raise
             print(f"❌ Database Error during bulk insertion: {e}")
             return 0
         finally:
@@ -142,6 +154,10 @@ class DatabaseManager:
         """
         Deletes all records from the 'leads' table.
         """
+        with self._write_lock:
+            self._clear_storage()
+
+    def _clear_storage(self) -> None:
         session = self.Session()
         try:
             deleted_count = session.query(LeadORM).delete()
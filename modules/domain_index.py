@@ -0,0 +1,212 @@
+"""Registrable-domain (eTLD+1) index of sites already crawled.
+
+Seeds used to be deduplicated per `intelligent_scraper` call on the raw netloc, so
+`www.brand.com` and `brand.com` were both crawled, and sites already stored in `leads`
+were recrawled on every run only for `add_all_leads` to drop the duplicate.
+`KnownDomainIndex` keys sites by registrable domain, keeps them in memory and backs them
+by `leads_database.db`, so repeat sites can be skipped (or refreshed) before any fetch.
+"""
+
+import datetime
+import ipaddress
+import os
+import threading
+import time
+from urllib.parse import urlparse
+from sqlalchemy import create_engine, Column, String, Integer, Float, text
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+try:
+    import tldextract  # Optional: full Public Suffix List instead of the built-in suffixes below
+except ImportError:
+    tldextract = None
+
+Base = declarative_base()
+
+# Multi-label public suffixes common in our seed lists; any other host is split as name + last label.
+MULTI_PART_SUFFIXES = frozenset({
+    'co.uk', 'org.uk', 'me.uk', 'ltd.uk', 'plc.uk', 'net.uk', 'ac.uk', 'gov.uk',
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au', 'asn.au', 'id.au',
+    'co.nz', 'org.nz', 'net.nz', 'ac.nz', 'govt.nz',
+    'co.jp', 'ne.jp', 'or.jp', 'ac.jp', 'go.jp',
+    'co.kr', 'or.kr', 'ne.kr', 'co.in', 'net.in', 'org.in', 'firm.in', 'gen.in', 'ind.in',
+    'com.br', 'net.br', 'org.br', 'com.mx', 'org.mx', 'com.ar', 'com.co', 'com.pe', 'com.tr',
+    'com.cn', 'net.cn', 'org.cn', 'com.hk', 'org.hk', 'com.tw', 'org.tw', 'com.sg', 'org.sg',
+    'com.my', 'com.ph', 'com.pk', 'com.bd', 'com.vn', 'co.id', 'or.id', 'co.th', 'in.th',
+    'co.za', 'org.za', 'com.ng', 'com.eg', 'co.ke', 'co.il', 'org.il', 'com.sa', 'com.ua',
+    'co.at', 'or.at', 'com.pl', 'com.es', 'com.pt', 'com.gr', 'co.hu',
+    'github.io', 'myshopify.com', 'wixsite.com', 'squarespace.com', 'blogspot.com',
+    'herokuapp.com', 'netlify.app', 'vercel.app', 'web.app', 'pages.dev',
+})
+
+
+def registrable_domain(url_or_host: str) -> str:
+    """
+    Returns the registrable domain (eTLD+1) of a URL or host: 'https://www.shop.brand.co.uk/x'
+    -> 'brand.co.uk'. IP addresses and single-label hosts have no registrable domain; they are
+    returned as host[:port].
+    """
+    netloc = urlparse(url_or_host).netloc if '//' in url_or_host else url_or_host
+    netloc = netloc.rpartition('@')[2].lower()
+    host = urlparse('//' + netloc).hostname or ''
+    host = host.strip('.')
+    if not host or '.' not in host:
+        return netloc
+    try:
+        ipaddress.ip_address(host)
+        return netloc
+    except ValueError:
+        pass
+    if tldextract is not None:
+        extracted = tldextract.extract(host)
+        if extracted.domain and extracted.suffix:
+            return f"{extracted.domain}.{extracted.suffix}"
+    labels = host.split('.')
+    suffix_labels = 2 if len(labels) > 2 and '.'.join(labels[-2:]) in MULTI_PART_SUFFIXES else 1
+    return '.'.join(labels[-(suffix_labels + 1):])
+
+
+class KnownDomainORM(Base):
+    """When a registrable domain was last crawled and whether that crawl produced a lead."""
+    __tablename__ = 'known_domains'
+
+    domain = Column(String(255), primary_key=True)
+    last_crawled_at = Column(Float, nullable=False)
+    has_lead = Column(Integer, default=0)
+
+
+class KnownDomainIndex:
+    """
+    In-memory map of registrable domain -> (last crawl time, produced a lead), loaded from the
+    `known_domains` table and from the website URLs already stored in `leads`.
+
+    Policies for a seed whose domain is known:
+    - 'skip': never recrawl a domain that produced a lead; retry lead-less domains after
+      `retry_after_days`.
+    - 'refresh': like 'skip', but domains with a lead are recrawled once their crawl is older
+      than `refresh_after_days`.
+    - 'off': crawl everything (the index is still updated).
+    """
+    DB_FILE_NAME = 'leads_database.db'
+    POLICIES = ('skip', 'refresh', 'off')
+
+    def __init__(self, db_file: str = None, policy: str = 'skip', refresh_after_days: float = 30,
+                 retry_after_days: float = 7, clock=time.time):
+        """
+        Args:
+            db_file (str): SQLite file; defaults to leads_database.db in the 'modules' directory.
+            policy (str): One of POLICIES.
+            refresh_after_days (float): Age after which the 'refresh' policy recrawls a domain with a lead.
+            retry_after_days (float): Age after which a domain crawled without a lead is crawled again.
+            clock (callable): Wall-clock time source, injectable for testing.
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown known-domain policy: {policy}")
+        if db_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            db_file = os.path.join(current_dir, self.DB_FILE_NAME)
+        self.engine = create_engine(f'sqlite:///{db_file}')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self.policy = policy
+        self.refresh_after = refresh_after_days * 86400
+        self.retry_after = retry_after_days * 86400
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._domains = {}  # domain -> [last_crawled_at, has_lead]
+        self.skipped = 0
+        self._load()
+
+    def _load(self):
+        session = self.Session()
+        try:
+            for row in session.query(KnownDomainORM).all():
+                self._merge(row.domain, row.last_crawled_at, bool(row.has_lead))
+            recorded = set(self._domains)
+            # Leads stored by earlier runs (the table may not exist yet on a fresh database). A recorded
+            # crawl wins: a site whose stored lead was rejected by validation stays retryable
+            try:
+                rows = session.execute(text('SELECT website_url, scraped_at FROM leads')).all()
+            except Exception:
+                rows = []
+            for website_url, scraped_at in rows:
+                domain = registrable_domain(website_url or '')
+                if domain and domain not in recorded:
+                    self._merge(domain, self._parse_timestamp(scraped_at), True)
+        finally:
+            session.close()
+
+    def _parse_timestamp(self, value) -> float:
+        try:
+            return datetime.datetime.fromisoformat(value).timestamp()
+        except (TypeError, ValueError):
+            return 0.0
+
+    def _merge(self, domain: str, crawled_at: float, has_lead: bool):
+        entry = self._domains.get(domain)
+        if entry is None:
+            self._domains[domain] = [crawled_at, has_lead]
+        else:
+            entry[0] = max(entry[0], crawled_at)
+            entry[1] = entry[1] or has_lead
+
+    def __contains__(self, url: str) -> bool:
+        with self._lock:
+            return registrable_domain(url) in self._domains
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._domains)
+
+    def should_crawl(self, url: str, policy: str = None) -> bool:
+        """Applies the policy (the index's own unless `policy` is given) to the registrable domain of `url`."""
+        policy = policy or self.policy
+        domain = registrable_domain(url)
+        with self._lock:
+            entry = self._domains.get(domain)
+            if entry is None or policy == 'off':
+                return True
+            crawled_at, has_lead = entry
+            age = self._clock() - crawled_at
+            if has_lead:
+                crawl = policy == 'refresh' and age >= self.refresh_after
+            else:
+                crawl = age >= self.retry_after
+            if not crawl:
+                self.skipped += 1
+            return crawl
+
+    def record_crawl(self, url: str, has_lead: bool):
+        """Marks the registrable domain of `url` as crawled now, in memory and in the database."""
+        domain = registrable_domain(url)
+        if not domain:
+            return
+        now = self._clock()
+        with self._lock:
+            entry = self._domains.setdefault(domain, [now, has_lead])
+            entry[0] = now
+            # A later lead-less crawl does not erase an earlier lead
+            entry[1] = entry[1] or has_lead
+            has_lead = entry[1]
+        session = self.Session()
+        try:
+            session.merge(KnownDomainORM(domain=domain, last_crawled_at=now, has_lead=1 if has_lead else 0))
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"❌ Database Error while saving known domain: {e}")
+        finally:
+            session.close()
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_known_domain_index() -> KnownDomainIndex:
+    """Returns the process-wide KnownDomainIndex, creating it on first use."""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = KnownDomainIndex()
+        return _shared_index
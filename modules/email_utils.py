@@ -1,22 +1,48 @@
 """Utilities for extracting email addresses from web pages.
 
 This module avoids network calls at import time (no top-level requests).
-Use `extract_emails_from_url(url)` or `extract_emails_from_html(html)`.
+Use `extract_emails_from_html(html)`, or `extract_emails_batch(pages)` for bulk re-processing.
+`python -m modules.email_utils [dir]` benchmarks extraction over saved pages.
 """
 
 from typing import List
+import html as html_lib
+import os
 import re
+import time
 from bs4 import BeautifulSoup
 import requests
 class Email_Utils:
 
     EMAIL_REGEX = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", re.IGNORECASE)
+    # The two halves of EMAIL_REGEX, matched outwards from each '@' (see find_email_hits)
+    LOCAL_PART_REGEX = re.compile(r"[A-Za-z0-9._%+-]{1,65}\Z")
+    LOCAL_RUN_REGEX = re.compile(r"[A-Za-z0-9._%+-]*")
+    DOMAIN_PART_REGEX = re.compile(r"[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+    # href="mailto:..." of a closed <a> tag, quoted or not. The address cannot run across tags or whitespace,
+    # and an unquoted one must end the attribute (html.parser reads "mailto:a@b.com<p" as one value)
+    MAILTO_REGEX = re.compile(r"""<a\s[^>]*?\bhref\s*=\s*(?:"mailto:([^"<>\s]*)"|'mailto:([^'<>\s]*)'|mailto:([^\s"'<>]+)(?=[\s>]))[^>]*>""", re.IGNORECASE)
 
 # Heuristics configuration
     BLACKLIST_DOMAINS = {"example.com", "example.org", "example.net", "localhost"}
     BLACKLIST_SUBSTRINGS = {"no-reply", "noreply", "no_reply", "notify", "mailer-daemon", "postmaster"}
     TELEMETRY_SUBSTRINGS = {"sentry", "wix", "wixpress", "sentry-next"}
     IMAGE_EXTS = {"jpg", "jpeg", "png", "gif", "svg", "ico", "webp", "bmp"}
+    HEX_TOKEN_REGEX = re.compile(r"[0-9a-f]{16,}")
+    BAD_LOCAL_CHARS_REGEX = re.compile(r"[/\\` ]")
+
+    _substring_matcher = None
+    _substring_matcher_key = None
+
+    @classmethod
+    def _blocked_substring_matcher(cls):
+        """One compiled alternation of BLACKLIST_SUBSTRINGS and TELEMETRY_SUBSTRINGS, rebuilt if either set changes."""
+        key = (frozenset(cls.BLACKLIST_SUBSTRINGS), frozenset(cls.TELEMETRY_SUBSTRINGS))
+        if key != cls._substring_matcher_key:
+            substrings = sorted(key[0] | key[1], key=len, reverse=True)
+            cls._substring_matcher = re.compile('|'.join(map(re.escape, substrings))) if substrings else None
+            cls._substring_matcher_key = key
+        return cls._substring_matcher
 
     def _clean_email(self, addr: str) -> str:
         """Trim common trailing punctuation and whitespace."""
@@ -39,20 +65,18 @@ class Email_Utils:
         if domain in self.BLACKLIST_DOMAINS:
             return True
 
-        # Substring checks for placeholders, no-reply, telemetry, etc.
-        if any(sub in local for sub in self.BLACKLIST_SUBSTRINGS) or any(sub in domain for sub in self.BLACKLIST_SUBSTRINGS):
-            return True
-        if any(sub in local for sub in self.TELEMETRY_SUBSTRINGS) or any(sub in domain for sub in self.TELEMETRY_SUBSTRINGS):
+        # Substring checks for placeholders, no-reply, telemetry, etc. (none of them contains '@',
+        # so one search over "local@domain" is the same as searching both halves)
+        matcher = self._blocked_substring_matcher()
+        if matcher is not None and matcher.search(local + '@' + domain):
             return True
 
         # Image/file extension in domain (e.g., '3x.jpg')
-        if '.' in domain:
-            ext = domain.rsplit('.', 1)[-1]
-            if ext in self.IMAGE_EXTS:
-                return True
+        if domain.rpartition('.')[2] in self.IMAGE_EXTS:
+            return True
 
         # Local part that is a long hex-like token (common for telemetry/email tokens)
-        if re.fullmatch(r"[0-9a-f]{16,}", local):
+        if self.HEX_TOKEN_REGEX.fullmatch(local):
             return True
 
         # Unreasonably long local part
@@ -60,11 +84,71 @@ class Email_Utils:
             return True
 
         # Contains suspicious punctuation or whitespace
-        if any(ch in local for ch in ['/', '\\', '`', ' ']):
+        if self.BAD_LOCAL_CHARS_REGEX.search(local):
             return True
 
         return False
 
+    @classmethod
+    def find_email_hits(cls, text: str) -> List[str]:
+        """Return the EMAIL_REGEX matches of `text`, in order.
+
+        Matches are grown outwards from each '@' instead of letting the regex try every start
+        position, which is quadratic on long runs of letters (minified scripts, base64 blobs).
+        Pages without an '@' cost a single scan. Candidates whose local part is longer than 64
+        characters once leading dots are trimmed (see _clean_email) are dropped, since
+        `is_suspicious_email` rejects them anyway; their domain is still consumed like the regex
+        would, so the next hit cannot start inside it.
+        """
+        hits = []
+        if not text:
+            return hits
+        find = text.find
+        previous_end = 0
+        at = find('@')
+        while at != -1:
+            local = cls.LOCAL_PART_REGEX.search(text, max(previous_end, at - 65), at)
+            domain = cls.DOMAIN_PART_REGEX.match(text, at + 1) if local is not None else None
+            if domain is not None:
+                start = local.start()
+                if start == at - 65 and start > previous_end:
+                    # The window is full: the local part may start further left
+                    start = cls._local_run_start(text, previous_end, start)
+                if len(text[start:at].lstrip('.')) <= 64:
+                    hits.append(text[start:domain.end()])
+                previous_end = domain.end()
+                at = find('@', previous_end)
+            else:
+                at = find('@', at + 1)
+        return hits
+
+    @classmethod
+    def _local_run_start(cls, text: str, lower: int, end: int) -> int:
+        """Start of the run of local-part characters ending at `end`, not before `lower`.
+        Reads backwards in growing chunks, so the cost is linear in the length of the run."""
+        size = 128
+        while True:
+            start = max(lower, end - size)
+            run = cls.LOCAL_RUN_REGEX.match(text[start:end][::-1]).end()
+            if run < end - start or start == lower:
+                return end - run
+            size *= 2
+
+    @classmethod
+    def find_mailto_addresses(cls, html: str) -> List[str]:
+        """Return the addresses of <a href="mailto:..."> links (entities decoded, query dropped).
+
+        Only addresses that EMAIL_REGEX matches in full are returned, so a malformed attribute cannot
+        yield markup as an address. Matches what html.parser reads except in markup it resolves
+        differently: a repeated href (the last one wins there) and links inside an unclosed <script>.
+        """
+        addresses = []
+        for groups in cls.MAILTO_REGEX.findall(html):
+            href = html_lib.unescape(groups[0] or groups[1] or groups[2])
+            address = href.split('?')[0]
+            if cls.EMAIL_REGEX.fullmatch(address):
+                addresses.append(address)
+        return addresses
 
     def extract_emails_from_html(self, html: str) -> List[str]:
         """Return a de-duplicated list of email addresses found in the given HTML/text.
@@ -76,20 +160,40 @@ class Email_Utils:
         if not html:
             return []
 
-        matches = self.EMAIL_REGEX.findall(html)
+        # Fast path: no '@' and no mailto link means nothing to filter
+        matches = self.find_email_hits(html)
+        mailto_list = self.find_mailto_addresses(html)
+        if not matches and not mailto_list:
+            return []
+        return self._filter_candidates(matches + mailto_list, filter_placeholders)
 
-        soup = BeautifulSoup(html, "html.parser")
-        mailto_list: List[str] = []
-        for a in soup.find_all("a", href=True):
-            href = a["href"]
-            if isinstance(href, str) and href.lower().startswith("mailto:"):
-                addr = href.split(":", 1)[1].split("?")[0]
-                mailto_list.append(addr)
+    def extract_emails_from_page(self, page) -> List[str]:
+        """Same as `extract_emails_from_html`, but reuses the regex hits and mailto links
+        already collected by a `ParsedPage`, so the page is not parsed again."""
+        return self._filter_candidates(page.email_hits + page.mailto_links)
+
+    def extract_emails_batch(self, pages) -> List[List[str]]:
+        """Extracts emails from many pages (HTML strings or ParsedPage objects) for bulk re-processing.
+
+        Returns one list per page, in order. The suspicious-address verdicts are shared across the
+        batch, since the same addresses repeat on every page of a site.
+        """
+        verdicts = {}
+        results = []
+        for page in pages:
+            if isinstance(page, str):
+                candidates = self.find_email_hits(page) + self.find_mailto_addresses(page)
+            else:
+                candidates = page.email_hits + page.mailto_links
+            results.append(self._filter_candidates(candidates, verdicts=verdicts))
+        return results
 
-        # Clean and dedupe while preserving order
+    def _filter_candidates(self, candidates: List[str], filter_placeholders: bool = True, verdicts: dict = None) -> List[str]:
+        """Clean and dedupe candidate addresses while preserving order, then drop suspicious ones.
+        `verdicts` memoises is_suspicious_email results across calls."""
         cleaned: List[str] = []
         seen = set()
-        for raw in (matches + mailto_list):
+        for raw in candidates:
             e = self._clean_email(raw)
             if not e:
                 continue
@@ -97,25 +201,121 @@ class Email_Utils:
                 seen.add(e)
                 cleaned.append(e)
 
-        if filter_placeholders:
-            final = [e for e in cleaned if not self.is_suspicious_email(e)]
-        else:
-            final = cleaned
-
+        if not filter_placeholders:
+            return cleaned
+        if verdicts is None:
+            return [e for e in cleaned if not self.is_suspicious_email(e)]
+        final = []
+        for e in cleaned:
+            suspicious = verdicts.get(e)
+            if suspicious is None:
+                suspicious = verdicts[e] = self.is_suspicious_email(e)
+            if not suspicious:
+                final.append(e)
         return final
 
+    def extract_emails_naive(self, html: str) -> List[str]:
+        """Reference implementation (full regex scan, html.parser soup for mailto links, any() scans per
+        candidate), as extract_emails_from_html used to work, with the same EMAIL_REGEX check of mailto
+        addresses. Kept for the benchmark and the equivalence tests."""
+        if not html:
+            return []
+        matches = self.EMAIL_REGEX.findall(html)
+        soup = BeautifulSoup(html, "html.parser")
+        mailto_list: List[str] = []
+        for a in soup.find_all("a", href=True):
+            href = a["href"]
+            if isinstance(href, str) and href.lower().startswith("mailto:"):
+                address = href.split(":", 1)[1].split("?")[0]
+                # Same acceptance rule as find_mailto_addresses
+                if self.EMAIL_REGEX.fullmatch(address):
+                    mailto_list.append(address)
+        cleaned: List[str] = []
+        for raw in matches + mailto_list:
+            e = self._clean_email(raw)
+            if e and e not in cleaned:
+                cleaned.append(e)
+        return [e for e in cleaned if not _is_suspicious_email_naive(self, e)]
+
+
+def _is_suspicious_email_naive(utils: Email_Utils, addr: str) -> bool:
+    """The original is_suspicious_email checks, kept as the benchmark reference."""
+    if not addr or '@' not in addr:
+        return True
+    local, _, domain = addr.partition('@')
+    local = local.lower().strip()
+    domain = domain.lower().strip()
+    if domain in utils.BLACKLIST_DOMAINS:
+        return True
+    if any(sub in local for sub in utils.BLACKLIST_SUBSTRINGS) or any(sub in domain for sub in utils.BLACKLIST_SUBSTRINGS):
+        return True
+    if any(sub in local for sub in utils.TELEMETRY_SUBSTRINGS) or any(sub in domain for sub in utils.TELEMETRY_SUBSTRINGS):
+        return True
+    if '.' in domain and domain.rsplit('.', 1)[-1] in utils.IMAGE_EXTS:
+        return True
+    if re.fullmatch(r"[0-9a-f]{16,}", local):
+        return True
+    if len(local) > 64:
+        return True
+    return any(ch in local for ch in ['/', '\\', '`', ' '])
+
+
+def load_saved_pages(path: str = None) -> List[str]:
+    """Loads a corpus of saved pages: every *.html / *.htm file under `path` when given,
+    otherwise the bodies stored in the on-disk HTTP cache (http_cache.db)."""
+    pages = []
+    if path:
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.lower().endswith(('.html', '.htm')):
+                    with open(os.path.join(root, name), encoding='utf-8', errors='replace') as file:
+                        pages.append(file.read())
+        return pages
+    import sqlite3
+    import zlib
+    db_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'http_cache.db')
+    if os.path.exists(db_file):
+        connection = sqlite3.connect(db_file)
+        try:
+            for (body,) in connection.execute('SELECT body FROM http_cache'):
+                pages.append(zlib.decompress(body).decode('utf-8', 'replace'))
+        except sqlite3.Error:
+            pass
+        finally:
+            connection.close()
+    return pages
+
+
+def benchmark(pages: List[str] = None, rounds: int = 3) -> dict:
+    """Times the naive and the fast-path extraction over a corpus of saved pages (see
+    load_saved_pages; a small synthetic corpus is used when nothing is saved) and checks
+    that both return the same addresses."""
+    if not pages:
+        filler = ''.join(f'<p>Paragraph {i} about our products.</p>' for i in range(400))
+        script = '<script>var blob="' + 'QmFzZTY0' * 250 + '";</script>'
+        pages = [f'<html><title>No contact {i}</title><body>{filler}{script}</body></html>' for i in range(30)]
+        pages += [f'<html><title>Shop {i}</title><body>{filler}<a href="mailto:hello{i}@brand.com?subject=Hi">Mail</a>'
+                  f' or sales{i}@brand.com, not noreply@brand.com or 0123456789abcdef01@sentry.io</body></html>'
+                  for i in range(10)]
+    utils = Email_Utils()
+    expected = [utils.extract_emails_naive(page) for page in pages]
+    if utils.extract_emails_batch(pages) != expected or [utils.extract_emails_from_html(p) for p in pages] != expected:
+        raise AssertionError("fast-path email extraction differs from the reference implementation")
+
+    def timed(run) -> float:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            run()
+        return (time.perf_counter() - started) / (rounds * len(pages)) * 1e3
 
+    timings = {
+        'naive': timed(lambda: [utils.extract_emails_naive(page) for page in pages]),
+        'fast_path': timed(lambda: [utils.extract_emails_from_html(page) for page in pages]),
+        'batch': timed(lambda: utils.extract_emails_batch(pages)),
+    }
+    return {'pages': len(pages), 'msec_per_page': {k: round(v, 3) for k, v in timings.items()}}
 
-# if __name__ == "__main__":
-#     import sys
 
-#     demo_url = (
-#         sys.argv[1]
-#         if len(sys.argv) > 1
-#         else "https://conaturalintl.com/collections/skincare?srsltid=AfmBOops7Exp0z2FQl-9YzCn6cKLUT9X-TsMVrXUk9jVTpvoiKyqyS2a"
-#     )
-#     results = Email_Utils.extract_emails_from_url(demo_url)
-#     if results:
-#         print("Found emails:", results)
-#     else:
-#         print("No emails found.")
\ No newline at end of file
+if __name__ == "__main__":
+    import sys
+    print(benchmark(load_saved_pages(sys.argv[1] if len(sys.argv) > 1 else None)))
@@ -20,6 +20,8 @@ try:
     from .leadgenerationtool import LeadGenerationTool 
     from .LeadValidator import LeadValidator
     from .shared_log import log_status, LOG_QUEUE
+    from .crawl_scheduler import CrawlBudget
+    from .crawl_state import unfinished_runs
     from .login import authenticate_user, render_simple_login, logout as simple_logout
 except (ImportError, ValueError):
     import sys
@@ -33,6 +35,8 @@ except (ImportError, ValueError):
     from modules.leadgenerationtool import LeadGenerationTool 
     from modules.LeadValidator import LeadValidator
     from modules.shared_log import log_status, LOG_QUEUE
+    from modules.crawl_scheduler import CrawlBudget
+    from modules.crawl_state import unfinished_runs
     from modules.login import authenticate_user, render_simple_login, logout as simple_logout
 
 # --- CONFIGURATION & AUTHENTICATION SETUP ---
@@ -134,15 +138,19 @@ if authentication_status:
             st.error(f"Backend Init Error: {e}")
             return None, None
 
-    def run_extraction_process_in_thread(keywords_list, lead_tool, db_storage, max_visits, max_depth,max_seed_urls=10):
+    def run_extraction_process_in_thread(keywords_list, lead_tool, db_storage, max_visits, max_depth,max_seed_urls=10,fetch_budget=0,time_budget=0,keyword_workers=4,run_id=None):
         try:
             log_status("--- STARTING INTELLIGENT SCRAPE ---")
-            if hasattr(lead_tool.extractor, 'MAX_VISITS'):
-                lead_tool.extractor.MAX_VISITS = max_visits
-            if hasattr(lead_tool.extractor, 'MAX_DEPTH'):
-                lead_tool.extractor.MAX_DEPTH = max_depth
+            # Per-run limits go to this run's extractor instead of mutating shared class attributes
+            extractor = LeadExtractor(max_visits=max_visits, max_depth=max_depth)
             if hasattr(lead_tool.scraper, 'MAX_RESULTS'):
                 lead_tool.scraper.MAX_RESULTS = max_seed_urls
+            pending_keywords = []
+            if run_id:
+                # Resuming an interrupted run: its checkpoints know which keywords are finished
+                log_status(f"♻️ Resuming run {run_id}...")
+                lead_tool.process_keywords([], workers=keyword_workers, extractor_instance=extractor, run_id=run_id)
+                keywords_list = []
             for keyword in keywords_list:
                 clean_keyword = keyword.strip()
                 if not clean_keyword: continue
@@ -154,8 +162,18 @@ if authentication_status:
                     log_status(f"✅ Found {len(cached_leads)} leads in DB. Skipping scrape.")
                     continue
                 
-                log_status(f"🔍 Starting A* search for '{clean_keyword}'...")
-                lead_tool.process_keyword(keyword=clean_keyword, extractor_instance=LeadExtractor())
+                pending_keywords.append(clean_keyword)
+
+            if pending_keywords and (fetch_budget or time_budget):
+                log_status(f"🔍 Starting A* search for {pending_keywords}...")
+                budget = CrawlBudget(max_fetches=fetch_budget or None, max_seconds=time_budget or None)
+                lead_tool.process_keywords_with_budget(pending_keywords, budget, extractor_instance=extractor)
+            elif pending_keywords:
+                log_status(f"🔍 Starting A* search for {pending_keywords}...")
+                results = lead_tool.process_keywords(pending_keywords, workers=keyword_workers, extractor_instance=extractor)
+                for result in results.values():
+                    if result.error is not None:
+                        log_status(f"❌ '{result.keyword}' failed: {str(result.error)[:100]}")
 
             all_leads_from_db = db_storage.get_all_leads()
             st.session_state['results'] = [l.to_dict() if hasattr(l, 'to_dict') else l for l in all_leads_from_db]
@@ -201,6 +219,21 @@ if authentication_status:
         max_v = st.number_input("Max Links", 3, 50, value=3, key='max_visits_ui', disabled=is_running)
         max_d = st.slider("Max Depth", 1, 5, value=2, key='max_depth_ui', disabled=is_running)
         max_seed_urls = st.slider("Max Seed URLs", 5, 50, value=20, key='max_seed_urls_ui', disabled=is_running)
+        fetch_budget = st.number_input("Run Fetch Budget (0 = unlimited)", 0, 100000, value=0, key='fetch_budget_ui', disabled=is_running)
+        time_budget = st.number_input("Run Time Budget in seconds (0 = unlimited)", 0, 86400, value=0, key='time_budget_ui', disabled=is_running)
+        keyword_workers = st.slider("Parallel Keywords", 1, 8, value=LeadGenerationTool.KEYWORD_WORKERS, key='keyword_workers_ui', disabled=is_running)
+        interrupted_runs = unfinished_runs()
+        if interrupted_runs:
+            run_labels = {f"{run_id}: {', '.join(keywords)}": run_id for run_id, keywords, _ in interrupted_runs}
+            selected_run = st.selectbox("Interrupted Runs", list(run_labels), key='resume_run_ui', disabled=is_running)
+            if st.button("▶️ Resume Run", use_container_width=True, disabled=is_running):
+                st.session_state.update({'results': None, 'process_log': [], 'execution_status': "Processing..."})
+                st.session_state['scraping_thread'] = threading.Thread(
+                    target=run_extraction_process_in_thread,
+                    args=([], lead_tool, db_storage, max_v, max_d, max_seed_urls, 0, 0, keyword_workers, run_labels[selected_run])
+                )
+                st.session_state['scraping_thread'].start()
+                st.rerun()
 
     tab_input, tab_results = st.tabs(["Input", "Results"])
 
@@ -212,7 +245,7 @@ if authentication_status:
                 st.session_state.update({'results': None, 'process_log': [], 'execution_status': "Processing..."})
                 st.session_state['scraping_thread'] = threading.Thread(
                     target=run_extraction_process_in_thread, 
-                    args=(k_list, lead_tool, db_storage, max_v, max_d,max_seed_urls)
+                    args=(k_list, lead_tool, db_storage, max_v, max_d,max_seed_urls,fetch_budget,time_budget,keyword_workers)
                 )
                 st.session_state['scraping_thread'].start()
                 st.rerun()
@@ -0,0 +1,373 @@
+"""Learned frontier heuristic from historical crawl outcomes.
+
+Every page `bfs` visits is counted in `crawl_outcomes.db` under the path pattern and
+anchor-text tokens of the link that led to it, together with whether it yielded a complete
+lead. The per-page log used for offline replay is opt-in, and both tables are capped.
+`AdaptiveLinkScorer` turns those counts into a multiplier on the static LinkScorer cost,
+so patterns that historically produced leads move up the A* heap and dead ends move down.
+`evaluate_offline` replays recorded crawls to compare fetches per found lead.
+"""
+
+import collections
+import heapq
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from urllib.parse import urlparse
+from sqlalchemy import create_engine, Column, String, Integer, Float, Text
+from sqlalchemy.orm import sessionmaker, declarative_base
+try:
+    from .link_scorer import LinkScorer
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.link_scorer import LinkScorer
+
+Base = declarative_base()
+
+# Counter row holding the totals over all visited pages
+TOTAL_FEATURE = '__all__'
+
+
+class CrawlFeatureStatsORM(Base):
+    """Visit and success counts of one link feature (path pattern or anchor token)."""
+    __tablename__ = 'crawl_feature_stats'
+
+    feature = Column(String(255), primary_key=True)
+    visits = Column(Integer, default=0, nullable=False)
+    successes = Column(Integer, default=0, nullable=False)
+
+
+class CrawlPageLogORM(Base):
+    """One visited page of a recorded crawl, kept for offline replay."""
+    __tablename__ = 'crawl_page_log'
+
+    id = Column(Integer, primary_key=True)
+    seed = Column(String(512), nullable=False, index=True)
+    url = Column(String(1024), nullable=False)
+    link_text = Column(String(255), nullable=True)
+    depth = Column(Integer, nullable=False)
+    yielded = Column(Integer, default=0)  # 1 when the page produced a complete lead
+    out_links = Column(Text, nullable=True)  # JSON list of [url, link_text]
+    recorded_at = Column(Float, nullable=False)
+
+
+def link_features(url: str, link_text: str) -> list[str]:
+    """
+    Features of a link: its path pattern (first two path segments, digits folded to '#')
+    and the distinct alphabetic tokens of its anchor text.
+    """
+    path = urlparse(url).path.lower().strip('/')
+    segments = [re.sub(r'\d+', '#', segment) for segment in path.split('/') if segment][:2]
+    features = ['path:/' + '/'.join(segments)]
+    tokens = sorted(set(re.findall(r'[a-z]{3,}', (link_text or '').lower())))
+    features.extend('anchor:' + token for token in tokens[:8])
+    return features
+
+
+class CrawlOutcomeStats:
+    """
+    In-memory feature counters backed by their own SQLite file. `record_visit` updates the
+    counters immediately (so the scorer learns within a run) and buffers the page log;
+    `flush` persists everything in one transaction and applies the retention caps.
+    """
+    DB_FILE_NAME = 'crawl_outcomes.db'
+    MAX_LOGGED_OUT_LINKS = 200
+    # The page log (every visited page with its out-links) only feeds evaluate_offline
+    LOG_PAGES = False
+    # Retention: the oldest page-log rows beyond MAX_PAGE_LOG_ROWS are deleted on flush, and
+    # beyond MAX_FEATURES feature counters the least visited ones are dropped
+    MAX_PAGE_LOG_ROWS = 20000
+    MAX_FEATURES = 5000
+
+    def __init__(self, db_file: str = None, log_pages: bool = LOG_PAGES, max_page_log_rows: int = MAX_PAGE_LOG_ROWS,
+                 max_features: int = MAX_FEATURES):
+        """
+        Args:
+            db_file (str): SQLite file; 'crawl_outcomes.db' in the 'modules' directory by default.
+            log_pages (bool): Also keep the page log needed by evaluate_offline.
+            max_page_log_rows (int): Page-log rows kept.
+            max_features (int): Feature counters kept (the global total always is).
+        """
+        if db_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            db_file = os.path.join(current_dir, self.DB_FILE_NAME)
+        self.log_pages = log_pages
+        self.max_page_log_rows = max_page_log_rows
+        self.max_features = max_features
+        self.engine = create_engine(f'sqlite:///{db_file}')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self._lock = threading.Lock()
+        # Serializes flushes: concurrent sessions would race on the same counter rows
+        self._write_lock = threading.Lock()
+        self._counts = {}  # feature -> [visits, successes]
+        self._pending_counts = collections.defaultdict(lambda: [0, 0])
+        self._pending_pages = []
+        self._load()
+
+    def _load(self):
+        session = self.Session()
+        try:
+            for row in session.query(CrawlFeatureStatsORM).all():
+                self._counts[row.feature] = [row.visits, row.successes]
+        finally:
+            session.close()
+
+    def record_visit(self, seed: str, url: str, link_text: str, depth: int, yielded: bool, out_links: list = None):
+        """Counts one visited page under its link features and buffers it for the page log."""
+        success = 1 if yielded else 0
+        with self._lock:
+            for feature in link_features(url, link_text) + [TOTAL_FEATURE]:
+                counts = self._counts.setdefault(feature, [0, 0])
+                counts[0] += 1
+                counts[1] += success
+                pending = self._pending_counts[feature]
+                pending[0] += 1
+                pending[1] += success
+            if not self.log_pages:
+                return
+            self._pending_pages.append(CrawlPageLogORM(
+                seed=seed,
+                url=url,
+                link_text=(link_text or '')[:255],
+                depth=depth,
+                yielded=success,
+                out_links=json.dumps([list(pair) for pair in (out_links or [])[:self.MAX_LOGGED_OUT_LINKS]]),
+                recorded_at=time.time(),
+            ))
+
+    def flush(self) -> int:
+        """
+        Writes buffered counters and page logs to the database. Returns the pages written.
+        One flush runs at a time; when the write fails, its counters and pages are put back
+        into the buffer so the next flush writes them.
+        """
+        with self._write_lock:
+            with self._lock:
+                pending_counts = dict(self._pending_counts)
+                pending_pages = self._pending_pages
+                self._pending_counts = collections.defaultdict(lambda: [0, 0])
+                self._pending_pages = []
+            if not pending_counts and not pending_pages:
+                return 0
+            session = self.Session()
+            try:
+                for feature, (visits, successes) in pending_counts.items():
+                    row = session.get(CrawlFeatureStatsORM, feature)
+                    if row is None:
+                        session.add(CrawlFeatureStatsORM(feature=feature, visits=visits, successes=successes))
+                    else:
+                        row.visits += visits
+                        row.successes += successes
+                session.add_all(pending_pages)
+                session.flush()
+                self._apply_retention(session)
+                session.commit()
+                return len(pending_pages)
+            except Exception as e:
+                session.rollback()
+                self._restore_pending(pending_counts, pending_pages)
+                print(f"❌ Database Error while saving crawl outcomes: {e}")
+                return 0
+            finally:
+                session.close()
+
+    def _restore_pending(self, pending_counts: dict, pending_pages: list):
+        """Merges the counters and pages of a failed flush back into the buffer."""
+        with self._lock:
+            for feature, (visits, successes) in pending_counts.items():
+                pending = self._pending_counts[feature]
+                pending[0] += visits
+                pending[1] += successes
+            self._pending_pages = pending_pages + self._pending_pages
+
+    def _apply_retention(self, session):
+        """Deletes the page-log rows and feature counters beyond the caps (inside the flush transaction)."""
+        if self.max_page_log_rows is not None:
+            cutoff = (session.query(CrawlPageLogORM.id).order_by(CrawlPageLogORM.id.desc())
+                      .offset(self.max_page_log_rows).limit(1).scalar())
+            if cutoff is not None:
+                session.query(CrawlPageLogORM).filter(CrawlPageLogORM.id <= cutoff).delete(synchronize_session=False)
+        if self.max_features is not None:
+            with self._lock:
+                visits = sorted((counts[0] for feature, counts in self._counts.items() if feature != TOTAL_FEATURE),
+                                reverse=True)
+                if len(visits) <= self.max_features:
+                    return
+                # Keep the features visited more often than the first one beyond the cap
+                threshold = visits[self.max_features]
+                for feature in [f for f, counts in self._counts.items() if f != TOTAL_FEATURE and counts[0] <= threshold]:
+                    del self._counts[feature]
+            session.query(CrawlFeatureStatsORM).filter(
+                CrawlFeatureStatsORM.feature != TOTAL_FEATURE,
+                CrawlFeatureStatsORM.visits <= threshold,
+            ).delete(synchronize_session=False)
+
+    def counts(self, feature: str):
+        """Returns (visits, successes) of a feature."""
+        with self._lock:
+            visits, successes = self._counts.get(feature, (0, 0))
+        return visits, successes
+
+    def load_page_logs(self) -> dict:
+        """Returns the recorded crawls as {seed: {url: (yielded, link_text, [(out_url, out_text), ...])}}."""
+        crawls = collections.defaultdict(dict)
+        session = self.Session()
+        try:
+            for row in session.query(CrawlPageLogORM).order_by(CrawlPageLogORM.id).all():
+                out_links = [tuple(pair) for pair in json.loads(row.out_links or '[]')]
+                previous = crawls[row.seed].get(row.url)
+                yielded = bool(row.yielded) or bool(previous and previous[0])
+                crawls[row.seed][row.url] = (yielded, row.link_text or '', out_links or (previous[2] if previous else []))
+        finally:
+            session.close()
+        return dict(crawls)
+
+
+class AdaptiveLinkScorer:
+    """
+    Wraps a LinkScorer and scales its cost by how much better or worse than average the
+    link's features have historically performed (smoothed success rate / global rate).
+    Falls back to the static cost until MIN_TOTAL_VISITS pages have been recorded.
+    """
+    MIN_TOTAL_VISITS = 50
+    MIN_FEATURE_VISITS = 3
+    PRIOR_STRENGTH = 5.0
+    MIN_MULTIPLIER = 0.25
+    MAX_MULTIPLIER = 4.0
+
+    def __init__(self, base: LinkScorer, stats):
+        """
+        Args:
+            base (LinkScorer): The static keyword -> cost scorer.
+            stats: Anything with `counts(feature) -> (visits, successes)` (CrawlOutcomeStats or a replay table).
+        """
+        self.base = base
+        self.stats = stats
+
+    def multiplier(self, url: str, link_text: str) -> float:
+        """Cost multiplier for a link; 1.0 when there is not enough history."""
+        total_visits, total_successes = self.stats.counts(TOTAL_FEATURE)
+        if total_visits < self.MIN_TOTAL_VISITS or total_successes == 0:
+            return 1.0
+        global_rate = total_successes / total_visits
+        log_lifts = []
+        for feature in link_features(url, link_text):
+            visits, successes = self.stats.counts(feature)
+            if visits < self.MIN_FEATURE_VISITS:
+                continue
+            rate = (successes + self.PRIOR_STRENGTH * global_rate) / (visits + self.PRIOR_STRENGTH)
+            log_lifts.append(math.log(rate / global_rate))
+        if not log_lifts:
+            return 1.0
+        lift = math.exp(sum(log_lifts) / len(log_lifts))
+        return min(self.MAX_MULTIPLIER, max(self.MIN_MULTIPLIER, 1.0 / lift))
+
+    def score(self, url: str, link_text: str = "") -> float:
+        return self.base.score(url, link_text) * self.multiplier(url, link_text)
+
+    def score_links(self, links: list) -> list[float]:
+        return self.adjust(links, self.base.score_links(links))
+
+    def adjust(self, links: list, base_costs: list) -> list[float]:
+        """Applies the learned multipliers to static costs computed elsewhere (e.g. in a parser worker)."""
+        return [cost * self.multiplier(url, link_text or '') for cost, (url, link_text) in zip(base_costs, links)]
+
+
+class _ReplayCounts:
+    """Feature counts rebuilt from a subset of recorded crawls (training side of an evaluation)."""
+
+    def __init__(self, crawls: dict):
+        self._counts = collections.defaultdict(lambda: [0, 0])
+        for pages in crawls.values():
+            for url, (yielded, link_text, _) in pages.items():
+                for feature in link_features(url, link_text) + [TOTAL_FEATURE]:
+                    self._counts[feature][0] += 1
+                    self._counts[feature][1] += 1 if yielded else 0
+
+    def counts(self, feature: str):
+        visits, successes = self._counts.get(feature, (0, 0))
+        return visits, successes
+
+
+def replay_crawl(seed: str, pages: dict, scorer, max_visits: int, max_depth: int):
+    """
+    Re-runs the bfs A* loop over one recorded crawl. Pages that were never recorded count as
+    fetches without a lead and without links. Returns (fetches, found_lead).
+    """
+    queue = [(scorer.score(seed, ''), 0, seed)]
+    visited = {seed}
+    fetches = 0
+    while queue:
+        _, depth, url = heapq.heappop(queue)
+        if depth >= max_depth:
+            continue
+        fetches += 1
+        if fetches > max_visits:
+            return max_visits, False
+        yielded, _, out_links = pages.get(url, (False, '', []))
+        if yielded:
+            return fetches, True
+        new_links = [(link, text) for link, text in out_links if link not in visited]
+        visited.update(link for link, _ in new_links)
+        for (link, _), cost in zip(new_links, scorer.score_links(new_links)):
+            heapq.heappush(queue, (depth + 1 + cost, depth + 1, link))
+    return fetches, False
+
+
+def evaluate_offline(stats: CrawlOutcomeStats, max_visits: int = 3, max_depth: int = 2,
+                     train_fraction: float = 0.7, seed: int = 0) -> dict:
+    """
+    Offline evaluation: splits the recorded crawls into a training and a held-out set,
+    learns feature counts on the training crawls only, then replays the held-out crawls
+    with the static and the adaptive scorer under the same MAX_VISITS / MAX_DEPTH budget.
+    Reports fetches per found lead for both. Needs crawls recorded with the page log on
+    (CrawlOutcomeStats.LOG_PAGES).
+    """
+    crawls = stats.load_page_logs()
+    seeds = sorted(crawls)
+    random.Random(seed).shuffle(seeds)
+    split = int(len(seeds) * train_fraction)
+    training = {s: crawls[s] for s in seeds[:split]}
+    held_out = {s: crawls[s] for s in seeds[split:]}
+
+    static = LinkScorer()
+    adaptive = AdaptiveLinkScorer(LinkScorer(), _ReplayCounts(training))
+    report = {'training_crawls': len(training), 'held_out_crawls': len(held_out)}
+    for name, scorer in (('static', static), ('adaptive', adaptive)):
+        fetches = 0
+        found = 0
+        for crawl_seed, pages in held_out.items():
+            crawl_fetches, found_lead = replay_crawl(crawl_seed, pages, scorer, max_visits, max_depth)
+            fetches += crawl_fetches
+            found += 1 if found_lead else 0
+        report[name] = {
+            'fetches': fetches,
+            'leads_found': found,
+            'fetches_per_lead': round(fetches / found, 2) if found else None,
+        }
+    return report
+
+
+_shared_stats = None
+_shared_stats_lock = threading.Lock()
+
+
+def get_crawl_outcome_stats() -> CrawlOutcomeStats:
+    """Returns the process-wide CrawlOutcomeStats, creating it on first use."""
+    global _shared_stats
+    with _shared_stats_lock:
+        if _shared_stats is None:
+            _shared_stats = CrawlOutcomeStats()
+        return _shared_stats
+
+
+if __name__ == "__main__":
+    print(evaluate_offline(get_crawl_outcome_stats()))
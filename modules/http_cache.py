@@ -0,0 +1,260 @@
+"""Persistent on-disk HTTP cache with conditional revalidation.
+
+Page bodies are stored in a small SQLite file next to `leads_database.db` together with
+their ETag / Last-Modified validators. Later fetches of the same URL send
+`If-None-Match` / `If-Modified-Since`, so an unchanged page costs a 304 instead of a
+full download. Like PageCache, the file is bounded: entries not validated for
+`max_age_days` are dropped, and past `max_bytes` of stored bodies the least recently
+validated entries are evicted.
+"""
+
+import collections
+import os
+import threading
+import time
+import zlib
+from sqlalchemy import create_engine, func, Column, String, Float, LargeBinary
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+Base = declarative_base()
+
+# Response shape returned by DiskHttpCache.fetch (mirrors the parts of requests.Response we use).
+# complete is False when a streaming reader stopped before the end of the body.
+CachedResponse = collections.namedtuple('CachedResponse', ['status_code', 'text', 'from_cache', 'complete'], defaults=(True,))
+
+
+class HttpCacheEntryORM(Base):
+    """One cached page body with its revalidation headers."""
+    __tablename__ = 'http_cache'
+
+    url = Column(String(2048), primary_key=True)
+    body = Column(LargeBinary, nullable=False)  # zlib-compressed UTF-8 text
+    etag = Column(String(255), nullable=True)
+    last_modified = Column(String(64), nullable=True)
+    fetched_at = Column(Float, nullable=False)
+    validated_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<HttpCacheEntryORM(url='{self.url}', etag='{self.etag}')>"
+
+
+class DiskHttpCache:
+    """
+    SQLite-backed HTTP cache that revalidates entries with conditional requests.
+    Only responses carrying an ETag or Last-Modified header are stored, since
+    anything else could not be revalidated.
+    """
+    DB_FILE_NAME = 'http_cache.db'
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_MAX_AGE_DAYS = 30
+    # Age-based pruning runs at most this often (the byte budget is checked on every store)
+    PRUNE_INTERVAL_SECONDS = 3600
+    # An eviction frees room down to this fraction of max_bytes, so it does not run on every store
+    EVICT_TO_FRACTION = 0.9
+
+    def __init__(self, db_file: str = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_age_days: float = DEFAULT_MAX_AGE_DAYS):
+        """
+        Opens (and creates if needed) the cache database. By default the file lives in
+        the 'modules' directory next to leads_database.db.
+
+        Args:
+            db_file (str): SQLite file.
+            max_bytes (int): Upper bound on the stored (compressed) bytes of all bodies.
+            max_age_days (float): Entries not fetched or revalidated for this long are dropped.
+        """
+        if db_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            db_file = os.path.join(current_dir, self.DB_FILE_NAME)
+        self.db_file = db_file
+        self.engine = create_engine(f'sqlite:///{db_file}')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.revalidated = 0
+        self.downloads = 0
+        self.stores = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._last_pruned = 0.0
+        self.prune()
+
+    def lookup(self, url: str):
+        """Returns the cached entry for `url` as a dict, or None."""
+        session = self.Session()
+        try:
+            entry = session.get(HttpCacheEntryORM, url)
+            if entry is None:
+                return None
+            return {
+                'body': entry.body,
+                'etag': entry.etag,
+                'last_modified': entry.last_modified,
+                'fetched_at': entry.fetched_at,
+            }
+        finally:
+            session.close()
+
+    def conditional_headers(self, entry: dict) -> dict:
+        """Builds If-None-Match / If-Modified-Since headers from a cached entry."""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url: str, text: str, etag: str = None, last_modified: str = None):
+        """Inserts or replaces the cached body and validators for `url`, then applies the bounds if needed."""
+        now = time.time()
+        body = zlib.compress(text.encode('utf-8'), 6)
+        if len(body) > self.max_bytes:
+            return
+        with self._write_lock:
+            session = self.Session()
+            try:
+                replaced = session.query(func.length(HttpCacheEntryORM.body)).filter(HttpCacheEntryORM.url == url).scalar()
+                session.merge(HttpCacheEntryORM(
+                    url=url,
+                    body=body,
+                    etag=etag,
+                    last_modified=last_modified,
+                    fetched_at=now,
+                    validated_at=now,
+                ))
+                session.commit()
+                self._bytes += len(body) - (replaced or 0)
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+            due = self._bytes > self.max_bytes or now - self._last_pruned >= self.PRUNE_INTERVAL_SECONDS
+        with self._stats_lock:
+            self.stores += 1
+        if due:
+            self.prune()
+
+    def prune(self) -> int:
+        """
+        Drops the entries not validated for `max_age_days`, then evicts the least recently
+        validated ones until the stored bodies fit in `max_bytes` (down to EVICT_TO_FRACTION
+        of it). Returns the number of entries removed; a failure is swallowed like a failed store.
+        """
+        now = time.time()
+        removed = 0
+        with self._write_lock:
+            session = self.Session()
+            try:
+                removed += session.query(HttpCacheEntryORM).filter(
+                    HttpCacheEntryORM.validated_at < now - self.max_age).delete(synchronize_session=False)
+                total = session.query(func.coalesce(func.sum(func.length(HttpCacheEntryORM.body)), 0)).scalar()
+                if total > self.max_bytes:
+                    target = self.max_bytes * self.EVICT_TO_FRACTION
+                    evicted = []
+                    rows = (session.query(HttpCacheEntryORM.url, func.length(HttpCacheEntryORM.body))
+                            .order_by(HttpCacheEntryORM.validated_at).all())
+                    for url, size in rows:
+                        if total <= target:
+                            break
+                        evicted.append(url)
+                        total -= size
+                    for start in range(0, len(evicted), 500):
+                        session.query(HttpCacheEntryORM).filter(
+                            HttpCacheEntryORM.url.in_(evicted[start:start + 500])).delete(synchronize_session=False)
+                    removed += len(evicted)
+                session.commit()
+                self._bytes = total
+                self._last_pruned = now
+            except Exception:
+                session.rollback()
+                return 0
+            finally:
+                session.close()
+        with self._stats_lock:
+            self.evictions += removed
+        return removed
+
+    def _mark_validated(self, url: str):
+        with self._write_lock:
+            session = self.Session()
+            try:
+                entry = session.get(HttpCacheEntryORM, url)
+                if entry is not None:
+                    entry.validated_at = time.time()
+                    session.commit()
+            except Exception:
+                session.rollback()
+            finally:
+                session.close()
+
+    def fetch(self, session_pool, url: str, headers: dict = None, timeout: float = 10, reader=None) -> CachedResponse:
+        """
+        GETs `url` through `session_pool`, revalidating a cached copy when one exists.
+        A 304 answer returns the stored body; a fresh, completely read 200 with validators
+        replaces it. `reader(response) -> StreamedBody` switches to a streamed download
+        (see streaming_fetch.read_html_stream). Network errors are raised to the caller.
+        """
+        entry = self.lookup(url)
+        request_headers = dict(headers or {})
+        request_headers.update(self.conditional_headers(entry))
+        response = session_pool.get(url, headers=request_headers, timeout=timeout, stream=reader is not None)
+
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            self._mark_validated(url)
+            with self._stats_lock:
+                self.revalidated += 1
+            return CachedResponse(200, zlib.decompress(entry['body']).decode('utf-8'), True)
+
+        with self._stats_lock:
+            self.downloads += 1
+        if reader is not None:
+            body = reader(response)
+            text, complete = body.text, body.complete
+        else:
+            text, complete = response.text, True
+        if response.status_code == 200 and text is not None and complete:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                try:
+                    self.store(url, text, etag, last_modified)
+                except Exception:
+                    pass
+        return CachedResponse(response.status_code, text, False, complete)
+
+    def stats(self) -> dict:
+        """Returns how many fetches were answered by a 304, downloaded in full, or stored, and how many entries were evicted."""
+        with self._stats_lock:
+            return {'revalidated': self.revalidated, 'downloads': self.downloads, 'stores': self.stores,
+                    'evictions': self.evictions}
+
+    def clear(self):
+        """Deletes every cached entry."""
+        with self._write_lock:
+            session = self.Session()
+            try:
+                session.query(HttpCacheEntryORM).delete()
+                session.commit()
+                self._bytes = 0
+            except Exception:
+                session.rollback()
+            finally:
+                session.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> DiskHttpCache:
+    """Returns the process-wide DiskHttpCache, creating it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = DiskHttpCache()
+        return _shared_cache
@@ -0,0 +1,114 @@
+"""Shared HTTP fetch layer.
+
+Keeps one pooled keep-alive `requests.Session` per host so repeated fetches of the
+same site reuse their TCP/TLS connection instead of paying a new handshake per page.
+Only the MAX_SESSIONS most recently used hosts keep a session; older ones are closed.
+Use `get_session_pool()` to obtain the process-wide pool.
+"""
+
+import collections
+import threading
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class SessionPool:
+    """
+    Thread-safe registry of keep-alive sessions, one per host.
+
+    Every session mounts an HTTPAdapter with a bounded connection pool and retries
+    failed connection attempts, so several crawls can share the same pool safely.
+    Status codes are never retried here (and Retry-After is never slept on): a worker
+    thread must not be parked by a server, and callers retry with their own RetryPolicy.
+    """
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 8
+    RETRY_TOTAL = 2
+    RETRY_BACKOFF_FACTOR = 0.5
+    # Hosts that keep a session (and its kept-alive sockets); the least recently used one is closed beyond this
+    MAX_SESSIONS = 64
+
+    def __init__(self, pool_connections: int = None, pool_maxsize: int = None, max_retries: Retry = None,
+                 max_sessions: int = None):
+        """
+        Args:
+            pool_connections (int): Number of connection pools cached per session.
+            pool_maxsize (int): Maximum number of kept-alive connections per pool.
+            max_retries (Retry): urllib3 retry policy; defaults to retrying failed connection attempts only.
+            max_sessions (int): Hosts that keep a session at the same time.
+        """
+        self.pool_connections = pool_connections or self.POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or self.POOL_MAXSIZE
+        self.max_sessions = max(1, int(max_sessions or self.MAX_SESSIONS))
+        self.max_retries = max_retries if max_retries is not None else Retry(
+            total=self.RETRY_TOTAL,
+            connect=self.RETRY_TOTAL,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=self.RETRY_BACKOFF_FACTOR,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._sessions = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.max_retries,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def session_for(self, url: str) -> requests.Session:
+        """Returns the shared session for the host of `url`, creating it on first use."""
+        host = urlparse(url).netloc.lower()
+        evicted = []
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = self._build_session()
+                self._sessions[host] = session
+                while len(self._sessions) > self.max_sessions:
+                    evicted.append(self._sessions.popitem(last=False)[1])
+                self.evicted += len(evicted)
+            else:
+                self._sessions.move_to_end(host)
+        for old_session in evicted:
+            old_session.close()
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.session_for(url).get(url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.session_for(url).head(url, **kwargs)
+
+    def close(self):
+        """Closes every pooled session and forgets them."""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions = collections.OrderedDict()
+        for session in sessions:
+            session.close()
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> SessionPool:
+    """Returns the process-wide SessionPool, creating it on first use."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionPool()
+        return _shared_pool
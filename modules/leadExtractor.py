@@ -3,13 +3,13 @@ from bs4 import BeautifulSoup
 import datetime
 import requests
 import re
-import networkx as nx
 import collections
+import copy
 import heapq
 from urllib.parse import urlparse, urljoin
 import datetime
-import lxml
 import random
+import threading
 import time
 try:
     from .scrapinghandler import ScrapingHandler
@@ -17,6 +17,21 @@ try:
     from .shared_log import log_status, LOG_QUEUE
     from .Lead import Lead
     from .email_utils import Email_Utils
+    from .crawl_engine import AsyncCrawlEngine
+    from .http_client import get_session_pool
+    from .parsed_page import InternalLinkFilter
+    from .parse_pool import PageExtraction, extract_page, get_parse_pool
+    from .page_cache import PageCache
+    from .http_cache import get_http_cache
+    from .politeness import get_politeness_scheduler
+    from .link_scorer import LinkScorer
+    from .frontier_stats import AdaptiveLinkScorer, get_crawl_outcome_stats
+    from .sitemap_discovery import SitemapDiscovery
+    from .streaming_fetch import read_html_stream
+    from .crawl_scheduler import CrawlBudget, SeedFrontier, BudgetedCrawlScheduler
+    from .domain_index import registrable_domain, get_known_domain_index
+    from .retry import RetryPolicy
+    from .crawl_state import CrawlStateStore
 except (ImportError, ValueError):
     import sys
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -27,6 +42,21 @@ except (ImportError, ValueError):
     from modules.shared_log import log_status, LOG_QUEUE
     from modules.Lead import Lead
     from modules.email_utils import Email_Utils
+    from modules.crawl_engine import AsyncCrawlEngine
+    from modules.http_client import get_session_pool
+    from modules.parsed_page import InternalLinkFilter
+    from modules.parse_pool import PageExtraction, extract_page, get_parse_pool
+    from modules.page_cache import PageCache
+    from modules.http_cache import get_http_cache
+    from modules.politeness import get_politeness_scheduler
+    from modules.link_scorer import LinkScorer
+    from modules.frontier_stats import AdaptiveLinkScorer, get_crawl_outcome_stats
+    from modules.sitemap_discovery import SitemapDiscovery
+    from modules.streaming_fetch import read_html_stream
+    from modules.crawl_scheduler import CrawlBudget, SeedFrontier, BudgetedCrawlScheduler
+    from modules.domain_index import registrable_domain, get_known_domain_index
+    from modules.retry import RetryPolicy
+    from modules.crawl_state import CrawlStateStore
 class LeadExtractor:
     user_agent_pool = [
         'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -40,7 +70,11 @@ class LeadExtractor:
     ]
 
 
-    cache={}
+    # Page bodies shared by every extractor in the process, bounded by byte budget and TTL
+    CACHE_MAX_BYTES=64 * 1024 * 1024
+    CACHE_TTL_SECONDS=60 * 60
+    CACHE_COMPRESSION='zlib'
+    cache=PageCache(CACHE_MAX_BYTES, CACHE_TTL_SECONDS, CACHE_COMPRESSION)
     BLACKLISTED_DOMAINS = [
     'apps.apple.com', 'play.google.com', 'www.reddit.com', 
     'substack.com', 'en.wikipedia.org', 'twitter.com', 
@@ -50,6 +84,91 @@ class LeadExtractor:
 ]
     MAX_VISITS=3
     MAX_DEPTH=2
+    # Seeds crawled at the same time by intelligent_scraper, overall and per host
+    MAX_CONCURRENCY=5
+    MAX_CONCURRENCY_PER_HOST=1
+    # Revalidate pages against the on-disk HTTP cache (ETag / Last-Modified) instead of re-downloading
+    HTTP_CACHE_ENABLED=True
+    # Streamed page downloads: byte cap, read deadline, and stop once a title and a usable email are in
+    MAX_PAGE_BYTES=2 * 1024 * 1024
+    MAX_PAGE_SECONDS=20
+    EARLY_STOP_ON_LEAD=True
+    # Parse pages in this many worker processes (0 = parse in the fetching thread);
+    # at most PARSE_QUEUE_DEPTH pages wait for a parser (None = 2 per worker)
+    PARSE_WORKERS=0
+    PARSE_QUEUE_DEPTH=None
+    # Keyword -> cost table used by calculate_heuristic; load another with LinkScorer.from_config
+    link_scorer=LinkScorer()
+    # Record which link features led to complete leads (crawl_outcomes.db, see CrawlOutcomeStats) and let that history reorder the heap
+    RECORD_CRAWL_OUTCOMES=True
+    ADAPTIVE_HEURISTIC=True
+    # When a reachable site has no lead yet and nothing queued as promising as SITEMAP_MAX_COST (e.g. the
+    # homepage has no contact-like link), push its best-scoring sitemap.xml entries, at most SITEMAP_MAX_CANDIDATES
+    # of them, each costing at most SITEMAP_MAX_COST
+    SITEMAP_DISCOVERY=True
+    SITEMAP_MAX_CANDIDATES=3
+    SITEMAP_MAX_COST=4
+    # Keep the (page -> link) edges bfs discovers so build_site_graph can export them later
+    RECORD_SITE_GRAPH=False
+    # Sites already crawled (by registrable domain, see KnownDomainIndex): 'skip' never recrawls a
+    # domain with a stored lead, 'refresh' recrawls it once stale, 'off' crawls everything; None disables the index
+    KNOWN_DOMAIN_POLICY='skip'
+    # A page fetch failing with a connection error or timeout is retried on its own (backoff with jitter)
+    fetch_retry=RetryPolicy(attempts=2, base_delay=0.5, max_delay=4.0)
+    RETRYABLE_FETCH_ERRORS=(requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                            requests.exceptions.ChunkedEncodingError)
+
+    def __init__(self, session_pool=None, page_cache: PageCache = None, http_cache=None, politeness=None, link_scorer: LinkScorer = None, outcome_stats=None, parse_pool=None, max_visits: int = None, max_depth: int = None, crawl_budget: CrawlBudget = None, domain_index=None, crawl_state: CrawlStateStore = None):
+        """
+        `session_pool` is the pooled HTTP fetch layer; the process-wide pool is used if omitted.
+        `page_cache` replaces the process-wide page cache for this instance.
+        `http_cache` is the persistent DiskHttpCache; the process-wide one is used if omitted
+        and HTTP_CACHE_ENABLED is set.
+        `politeness` spaces requests per host; the process-wide PolitenessScheduler is used if omitted.
+        `link_scorer` replaces the shared keyword -> cost table for this instance.
+        `outcome_stats` is the CrawlOutcomeStats store; the process-wide one is used if omitted.
+        `parse_pool` is the ParsePool pages are parsed in; the process-wide one is used if omitted
+        and PARSE_WORKERS is set.
+        `max_visits` / `max_depth` override MAX_VISITS / MAX_DEPTH for this instance only.
+        `crawl_budget` is a run-level CrawlBudget every page visit of `bfs` is taken from.
+        `domain_index` is the KnownDomainIndex of already crawled sites; the process-wide one is used
+        if omitted and KNOWN_DOMAIN_POLICY is set.
+        `crawl_state` is the CrawlStateStore of a resumable run; site frontiers are checkpointed
+        to it and restored from it.
+        """
+        self.crawl_state = crawl_state
+        if domain_index is None and self.KNOWN_DOMAIN_POLICY:
+            domain_index = get_known_domain_index()
+        self.domain_index = domain_index
+        if max_visits is not None:
+            self.MAX_VISITS = max_visits
+        if max_depth is not None:
+            self.MAX_DEPTH = max_depth
+        self.crawl_budget = crawl_budget
+        if link_scorer is not None:
+            self.link_scorer = link_scorer
+        self.outcome_stats = None
+        if self.RECORD_CRAWL_OUTCOMES or self.ADAPTIVE_HEURISTIC:
+            self.outcome_stats = outcome_stats or get_crawl_outcome_stats()
+        if self.ADAPTIVE_HEURISTIC:
+            self.link_scorer = AdaptiveLinkScorer(self.link_scorer, self.outcome_stats)
+        self.session_pool = session_pool or get_session_pool()
+        self.politeness = politeness or get_politeness_scheduler()
+        if http_cache is None and self.HTTP_CACHE_ENABLED:
+            http_cache = get_http_cache()
+        self.http_cache = http_cache
+        if page_cache is not None:
+            self.cache = page_cache
+        if parse_pool is None and self.PARSE_WORKERS:
+            parse_pool = get_parse_pool(self.PARSE_WORKERS, self.PARSE_QUEUE_DEPTH)
+        self.parse_pool = parse_pool
+        # Per-run counters proving each URL is fetched over the network at most once
+        self._stats_lock = threading.Lock()
+        self.fetch_counts = collections.Counter()
+        self.cache_hits = 0
+        self.sitemap_documents = 0
+        self.site_edges = collections.defaultdict(list)
+
     # 1. FIX: Indentation starts here
     def clean_url(self, urls)->list[str]:
         try:
@@ -80,52 +199,127 @@ class LeadExtractor:
             log_status("clean_url execution completed.")
     
     
+    def _fetch_page(self, url: str, stop_early: bool = None):
+        """
+        Fetches the HTML of `url` at most once per run: served from `cache` when present,
+        otherwise fetched through the session pool (revalidating any copy held by the
+        on-disk `http_cache`) and cached on HTTP 200.
+        A body cut short (byte cap, deadline, or the early stop once a lead is complete) is
+        returned but not cached, so callers needing every link fetch the page again.
+        `stop_early` overrides EARLY_STOP_ON_LEAD.
+        Returns the HTML text, or None for non-200 responses.
+        Network errors are raised to the caller.
+        """
+        normalized_url = self.normalize_url_key(url)
+        cached_html = self.cache.get(normalized_url)
+        if cached_html is not None:
+            log_status(f"Using cached content for: {normalized_url}")
+            with self._stats_lock:
+                self.cache_hits += 1
+            return cached_html
+
+        selected_agent = random.choice(self.user_agent_pool)
+        dynamic_headers = {'User-Agent': selected_agent}
+        with self._stats_lock:
+            self.fetch_counts[normalized_url] += 1
+        # Wait only for the previous request to this host; other hosts are fetched meanwhile
+        self.politeness.wait_for_slot(url)
+        if stop_early is None:
+            stop_early = self.EARLY_STOP_ON_LEAD
+        reader = lambda response: self._read_page_body(response, stop_early)
+        if self.http_cache is not None:
+            response = self.http_cache.fetch(self.session_pool, url, headers=dynamic_headers, timeout=10,
+                                             reader=reader)
+            html_content, complete = response.text, response.complete
+        else:
+            response = self.session_pool.get(url, headers=dynamic_headers, timeout=10, stream=True)
+            body = reader(response)
+            html_content, complete = body.text, body.complete
+        if response.status_code != 200 or html_content is None:
+            return None
+        if complete:
+            self.cache.set(normalized_url, html_content)
+        return html_content
+
+    def _read_page_body(self, response, stop_early: bool = True):
+        """Streams a page body under the MAX_PAGE_BYTES / MAX_PAGE_SECONDS guards (see read_html_stream)."""
+        body = read_html_stream(response, self.MAX_PAGE_BYTES, stop_early, self.MAX_PAGE_SECONDS)
+        if body.text is None and body.reason == 'content_type':
+            log_status(f"⏭️ Skipping non-HTML response from {response.url}")
+        elif body.reason in ('size_cap', 'deadline'):
+            log_status(f"✂️ Truncated {response.url} ({body.reason})")
+        return body
+
+    def clone(self) -> 'LeadExtractor':
+        """
+        Returns an extractor sharing this one's configuration, pools, caches and indexes but with
+        its own per-run counters, so several runs (e.g. one per keyword) can go on at the same time.
+        """
+        twin = copy.copy(self)
+        twin._stats_lock = threading.Lock()
+        twin.fetch_counts = collections.Counter()
+        twin.cache_hits = 0
+        twin.sitemap_documents = 0
+        twin.site_edges = collections.defaultdict(list)
+        return twin
+
+    def reset_fetch_stats(self):
+        """Clears the per-run fetch counters."""
+        with self._stats_lock:
+            self.fetch_counts = collections.Counter()
+            self.cache_hits = 0
+            self.sitemap_documents = 0
+
+    def fetch_stats(self) -> dict:
+        """
+        Returns the per-run fetch counters: network fetches, distinct URLs fetched,
+        the highest fetch count of any single URL (1 when every URL was fetched once),
+        cache hits and robots.txt/sitemap documents fetched.
+        """
+        with self._stats_lock:
+            return {
+                'fetches': sum(self.fetch_counts.values()),
+                'unique_urls': len(self.fetch_counts),
+                'max_fetches_per_url': max(self.fetch_counts.values(), default=0),
+                'cache_hits': self.cache_hits,
+                'sitemap_documents': self.sitemap_documents,
+            }
+
+    def _extract_page(self, url: str, html_content: str) -> PageExtraction:
+        """
+        Parses fetched HTML into a PageExtraction (title, emails, Instagram handle, internal links
+        passing `clean_all_urls` and their static heuristic costs), in the parse pool when there is one.
+        """
+        scorer = self.link_scorer.base if isinstance(self.link_scorer, AdaptiveLinkScorer) else self.link_scorer
+        args = (self.normalize_url_key(url), html_content, InternalLinkFilter(self.BLACKLISTED_DOMAINS),
+                scorer.tiers, scorer.default_cost)
+        if self.parse_pool is not None:
+            return self.parse_pool.extract(*args)
+        return extract_page(*args)
+
+    def _build_lead(self, url: str, page: PageExtraction) -> Lead:
+        """Builds a Lead (title, first email, Instagram handle) from an extracted page."""
+        title=page.title if page.title is not None else 'No Title Found'
+        email = page.emails
+
+        # Instagram extraction: ONLY from anchor hrefs (instagram.com or instagr.am)
+        # We intentionally removed regex/@-mention fallbacks to avoid noisy/non-link matches.
+        return Lead(
+            title=title,
+            email=email[0] if email else 'No Email Found',
+            website_url=url,
+            instagram_id=page.instagram_handle,
+            scraped_at=datetime.datetime.now().isoformat()
+        )
+
     def extract_lead_info(self,result_block):
-        # 3. FIX: Indentation for the second function starts here
         try:
             Leads=[]
             for url in result_block:
                 try: # Use a nested try block for safe individual URL fetching
-                    selected_agent = random.choice(self.user_agent_pool)
-                    dynamic_headers = {'User-Agent': selected_agent}
-                    lead_instance=requests.get(url,headers=dynamic_headers, timeout=10) 
-                    sleep_time = random.uniform(1, 4) 
-                    time.sleep(sleep_time)
-                    if lead_instance.status_code==200:
-                        soup=BeautifulSoup(lead_instance.text,'html.parser')
-                        title_tag=soup.find('title')
-                        title=title_tag.text if title_tag else 'No Title Found'
-                        # Instantiate Email_Utils and pass HTML text (lead_instance.text)
-                        email = Email_Utils().extract_emails_from_html(lead_instance.text)
-
-                        # Instagram extraction: ONLY from anchor hrefs (instagram.com or instagr.am)
-                        # We intentionally removed regex/@-mention fallbacks to avoid noisy/non-link matches.
-                        insta_id = None
-
-                        for a_tag in soup.find_all('a', href=True):
-                            href = a_tag['href']
-                            if 'instagram.com' in href or 'instagr.am' in href:
-                                try:
-                                    parsed_inst = urlparse(href)
-                                    # clean path and remove any trailing/query parts
-                                    path = (parsed_inst.path or '').lstrip('/')
-                                    candidate = path.split('/')[0].split('?')[0].split('#')[0].strip()
-                                    # Filter out non-profile paths and noisy candidates
-                                    blacklist = {'p', 'explore', 'about', 'accounts', 'developer', 'share', 'stories', 'tags', 'directory'}
-                                    if candidate and len(candidate) <= 30 and re.match(r'^[A-Za-z0-9._]+$', candidate) and candidate.lower() not in blacklist and '.' not in candidate:
-                                        insta_id = candidate
-                                        break
-                                except Exception:
-                                    continue
-
-                        lead_obj = Lead(
-                            title=title,
-                            email=email[0] if email else 'No Email Found',
-                            website_url=url,
-                            instagram_id=insta_id,
-                            scraped_at=datetime.datetime.now().isoformat()
-                        )
-                        Leads.append(lead_obj)
+                    html_content = self._fetch_page(url)
+                    if html_content is not None:
+                        Leads.append(self._build_lead(url, self._extract_page(url, html_content)))
                 
                 except requests.exceptions.RequestException as req_e:
                     log_status(f"❌ Network/Connection Error skipping URL {url}: {req_e}")
@@ -140,11 +334,50 @@ class LeadExtractor:
             
         finally:
             log_status("extract_lead_info execution completed.")
-    def Make_A_Graph(self, url: str) -> nx.Graph:
+    def visit_page(self, url: str):
+        """
+        Fetches `url` once and feeds that single response to both lead extraction and
+        link discovery. Returns (lead or None, PageExtraction or None).
+        """
+        try:
+            html_content = self.fetch_retry.call(self._fetch_page, url, retry_on=self.RETRYABLE_FETCH_ERRORS,
+                                                 label=f"Fetch of {url}")
+        except requests.exceptions.RequestException as req_e:
+            log_status(f"❌ Network/Connection Error skipping URL {url}: {req_e}")
+            return None, None
+        if html_content is None:
+            return None, None
+        try:
+            page = self._extract_page(url, html_content)
+            return self._build_lead(url, page), page
+        except Exception as e:
+            log_status(f"Error extracting lead from {url}: {e}")
+            return None, None
+
+    def build_site_graph(self, seed: str = None) -> 'networkx.Graph':
+        """
+        Builds a networkx graph from the edges bfs recorded (RECORD_SITE_GRAPH must be set).
+        Only the given seed's site is included when `seed` is passed. networkx is imported
+        lazily so normal crawls never load it.
+        """
+        import networkx as nx
+        G = nx.Graph()
+        with self._stats_lock:
+            if seed is not None:
+                edge_lists = [list(self.site_edges.get(self.normalize_url_key(seed), []))]
+            else:
+                edge_lists = [list(edges) for edges in self.site_edges.values()]
+        for edges in edge_lists:
+            G.add_edges_from(edges)
+        return G
+
+    def Make_A_Graph(self, url: str) -> 'networkx.Graph':
         """
         Build a graph of internal links from the given URL.
         Returns an empty graph if timeout/network errors occur.
+        Not part of the crawl itself; kept for one-off site-graph exports.
         """
+        import networkx as nx
         G = nx.Graph()
         
         try:
@@ -153,28 +386,22 @@ class LeadExtractor:
             base_url = parsed_url.netloc
             G.add_node(full_base_url)
             
-            selected_agent = random.choice(self.user_agent_pool)
-            dynamic_headers = {'User-Agent': selected_agent}      
-            lead_instance = requests.get(full_base_url, headers=dynamic_headers, timeout=10)      
+            html_content = self._fetch_page(full_base_url, stop_early=False)
             
-            if lead_instance.status_code == 200:
-                soup = BeautifulSoup(lead_instance.text, 'html.parser')
-                all_links = soup.find_all('a', href=True)
-                for link in all_links:
-                    url_address = urljoin(full_base_url, link['href'])
-                    parsed_link_obj = urlparse(url_address)
-                    condition = self.clean_all_urls(parsed_link_obj, base_url)
-                    if condition:
-                        clean_link = requests.utils.urlunparse((
-                            parsed_link_obj.scheme,
-                            parsed_link_obj.netloc,
-                            '',
-                            '',
-                            '',
-                            ''
-                        ))
-                        G.add_node(clean_link)
-                        G.add_edge(full_base_url, clean_link)
+            if html_content is not None:
+                page = self._extract_page(full_base_url, html_content)
+                for link, _ in page.internal_links:
+                    parsed_link_obj = urlparse(link)
+                    clean_link = requests.utils.urlunparse((
+                        parsed_link_obj.scheme,
+                        parsed_link_obj.netloc,
+                        '',
+                        '',
+                        '',
+                        ''
+                    ))
+                    G.add_node(clean_link)
+                    G.add_edge(full_base_url, clean_link)
         except requests.exceptions.Timeout:
             log_status(f"⏱️ Timeout while building graph for {url}. Returning empty graph.")
         except requests.exceptions.RequestException as req_e:
@@ -183,101 +410,276 @@ class LeadExtractor:
             log_status(f"❌ Error building graph for {url}: {e}. Returning empty graph.")
         
         return G
-    def bfs(self,graph,start_node:str)->list[Lead]:
-        visited=set()
-        queue=[]
-        max_visits=self.MAX_VISITS
-        max_depth=self.MAX_DEPTH
-        visits_count=0
-        gnode=0
-        hscore=self.calculate_heuristic(start_node,"")
-        
-        fcost=gnode+hscore
+    def bfs(self,start_node:str,frontier:SeedFrontier=None)->list[Lead]:
+        """
+        A* search over the site of `start_node`. The heap frontier and the visited set are
+        the only representation of the site; links are discovered page by page.
+        Every page visit is taken from `crawl_budget` when one is set.
+        Pass a fresh `frontier` to inspect the crawl state afterwards.
+        """
         if start_node in self.BLACKLISTED_DOMAINS:
             return None
-        start_node=self.normalize_url_key(start_node)
-        heapq.heappush( queue,(fcost,gnode,start_node))
-        visited.add(start_node)
-        while queue:
-            fcost,current_depth,normalized_url=heapq.heappop(queue)
+        if frontier is None:
+            frontier=SeedFrontier(self.normalize_url_key(start_node))
+        self.open_frontier(frontier)
+        if frontier.done:
+            # Finished before a restart (see crawl_state)
+            return frontier.lead
+        while True:
+            node=self.next_frontier_node(frontier)
+            if node is None:
+                break
+            if self.crawl_budget is not None and not self.crawl_budget.try_spend(frontier.keyword):
+                log_status(f"💰 Run budget exhausted. Ending search at: {frontier.start_node}")
+                break
+            _,current_depth,normalized_url=node
+            current_lead=self.expand_frontier(frontier,normalized_url,current_depth)
+            if current_lead is not None:
+                return current_lead
+        return None
+
+    def open_frontier(self,frontier:SeedFrontier):
+        """
+        Pushes the homepage of the frontier's site onto its heap, or restores the site's
+        checkpoint when `crawl_state` has one.
+        """
+        start_node=frontier.start_node
+        if self.crawl_state is not None and self.crawl_state.restore_frontier(frontier):
+            log_status(f"♻️ Resuming {start_node} from checkpoint ({frontier.visits} pages visited, {len(frontier.queue)} queued)")
+            return
+        frontier.opened=True
+        frontier.push(0+self.calculate_heuristic(start_node,""),0,start_node)
+
+    def needs_sitemap(self,frontier:SeedFrontier)->bool:
+        """
+        True when the frontier's site was reached but nothing queued is as promising as a
+        sitemap candidate could be, and its sitemap has not been read yet.
+        """
+        if not self.SITEMAP_DISCOVERY or frontier.sitemap_checked or not frontier.pages_fetched:
+            return False
+        if frontier.visits>=self.MAX_VISITS:
+            return False
+        best_cost=frontier.best_cost()
+        return best_cost is None or best_cost>1+self.SITEMAP_MAX_COST
+
+    def push_sitemap_candidates(self,frontier:SeedFrontier,spend=None):
+        """
+        Pushes the best sitemap candidates of the frontier's site onto its heap.
+        Every robots.txt/sitemap fetch is first charged to `spend()` (the `crawl_budget` by default);
+        discovery stops once it returns False. The frontier is marked as checked only when discovery
+        ran to the end, so a site cut short by the budget is tried again at its next visit.
+        """
+        if spend is None and self.crawl_budget is not None:
+            spend=lambda: self.crawl_budget.try_spend(frontier.keyword)
+        refusals=[]
+        def charge():
+            if spend():
+                return True
+            refusals.append(True)
+            return False
+        # Sitemap entries are treated as links from the homepage (depth 1)
+        for hcost,candidate in self.discover_sitemap_candidates(frontier.start_node,charge if spend is not None else None):
+            frontier.push(1+hcost,1,candidate)
+        frontier.sitemap_checked=not refusals
+
+    def next_frontier_node(self,frontier:SeedFrontier):
+        """
+        Pops the next page to visit as (fcost, depth, url), skipping pages at MAX_DEPTH.
+        Returns None (and marks the frontier done) when the heap is empty or MAX_VISITS is reached.
+        """
+        max_visits=self.MAX_VISITS
+        max_depth=self.MAX_DEPTH
+        while frontier.queue:
+            fcost,current_depth,normalized_url=heapq.heappop(frontier.queue)
             log_status(f"Visiting: {normalized_url}")
             if current_depth >= max_depth:
                 log_status(f"🛑 Max Depth ({max_depth}) reached at: {normalized_url}")
                 continue # Skip processing this node and move to the next in the queue
-            visits_count+=1
-            if visits_count>max_visits:
+            frontier.visits+=1
+            if frontier.visits>max_visits:
                 log_status(f"🛑 Max Visits ({max_visits}) reached. Ending search.")
                 break
-            extracted_leads=self.extract_lead_info([normalized_url])
-            if extracted_leads:
-                current_lead=extracted_leads[0]
-                if self.lead_is_complete(current_lead):
-                    return current_lead
-            newly_discovered_neighbors_pairs = self.get_new_neighbors(normalized_url)
-            for neighbor,neighbor_link_text in newly_discovered_neighbors_pairs:
-                if neighbor not in visited:
-                    gcostneighbor=current_depth+1
-                    hcostneighbor=self.calculate_heuristic(neighbor,neighbor_link_text)
-                    fneighbor=gcostneighbor+hcostneighbor
-                    visited.add(neighbor)
-                    heapq.heappush(queue,(fneighbor,gcostneighbor,neighbor))
-                    
+            return fcost,current_depth,normalized_url
+        frontier.done=True
+        return None
+
+    def expand_frontier(self,frontier:SeedFrontier,normalized_url:str,current_depth:int,spend=None):
+        """
+        Visits one page of the frontier, records the outcome and pushes its new links, then its
+        sitemap candidates if the links are not promising enough (see needs_sitemap; `spend` is
+        passed on to push_sitemap_candidates).
+        Returns the Lead (also stored on the frontier) when the page completes it, else None.
+        """
+        start_node=frontier.start_node
+        current_lead,page=self.visit_page(normalized_url)
+        if page is not None:
+            frontier.pages_fetched+=1
+        newly_discovered_neighbors_pairs=page.internal_links if page is not None else []
+        if self.RECORD_SITE_GRAPH:
+            with self._stats_lock:
+                self.site_edges[start_node].extend((normalized_url, neighbor) for neighbor, _ in newly_discovered_neighbors_pairs)
+        lead_found=current_lead is not None and self.lead_is_complete(current_lead)
+        if self.RECORD_CRAWL_OUTCOMES and self.outcome_stats is not None:
+            self.outcome_stats.record_visit(start_node, normalized_url, frontier.link_texts.get(normalized_url, ""),
+                                            current_depth, lead_found, newly_discovered_neighbors_pairs)
+        if lead_found:
+            frontier.lead=current_lead
+            frontier.done=True
+            if self.crawl_state is not None:
+                self.crawl_state.save_frontier(frontier)
+            return current_lead
+        new_neighbors_pairs=[]
+        new_neighbors_costs=[]
+        for (neighbor,neighbor_link_text),base_cost in zip(newly_discovered_neighbors_pairs,page.link_costs if page is not None else []):
+            if neighbor not in frontier.visited:
+                new_neighbors_pairs.append((neighbor,neighbor_link_text))
+                new_neighbors_costs.append(base_cost)
+        gcostneighbor=current_depth+1
+        for (neighbor,neighbor_link_text),hcostneighbor in zip(new_neighbors_pairs,self.score_neighbors(new_neighbors_pairs,new_neighbors_costs)):
+            fneighbor=gcostneighbor+hcostneighbor
+            frontier.push(fneighbor,gcostneighbor,neighbor,neighbor_link_text)
+        if self.needs_sitemap(frontier):
+            self.push_sitemap_candidates(frontier,spend)
+        if self.crawl_state is not None:
+            self.crawl_state.save_frontier(frontier)
         return None
 
     def clean_all_urls(self,url_address,base_url:str)->bool:
-           
-            if url_address.netloc in self.BLACKLISTED_DOMAINS:
-                return False
-            if url_address.netloc!=base_url:
-                return False
-            if url_address.scheme not in ['http','https']:
-                return False
-            path=url_address.path.lower()
-            if path.endswith(('.jpg','.png','.gif','.css','.js','.svg','.ico')):
-                return False
-            
+            """Internal-link test (see InternalLinkFilter, which parser workers use)."""
+            return InternalLinkFilter(self.BLACKLISTED_DOMAINS)(url_address,base_url)
+    def crawl_seed(self, url: str, seen_domains: set):
+        """
+        Runs the A* crawl for a single seed URL and returns a complete Lead or None.
+        Seeds whose domain is already in `seen_domains` are skipped; the domain is
+        added once a lead has been found there.
+        """
+        try:
+            parsed_seed = urlparse(url)
+            seed_domain = self.site_key(url)
+
+            if seed_domain in seen_domains:
+                log_status(f"⚠️ Skipping seed {url} because domain {seed_domain} already produced a lead.")
+                return None
+            if not self.should_crawl_site(url):
+                return None
+
+            log_status(f"🔗 Processing seed URL: {url}")
+            full_base_url = f"{parsed_seed.scheme}://{parsed_seed.netloc}"
+
+            frontier = SeedFrontier(self.normalize_url_key(full_base_url))
+            lead = self.bfs(full_base_url, frontier)
+
+            # If BFS found a complete lead, record domain and return it. The site is recorded in the
+            # known-domain index only once storage has the lead (see LeadGenerationTool._record_outcome)
+            if lead is not None and self.lead_is_complete(lead):
+                seen_domains.add(seed_domain)
+                return lead
+            # A crawl cut short by the run budget says nothing about the site, and neither does
+            # one where no page was fetched (connection errors, timeouts, 5xx homepage)
+            if frontier.pages_fetched and (self.crawl_budget is None or not self.crawl_budget.exhausted):
+                self.record_site_crawl(url, False)
+            return None
+        except requests.exceptions.Timeout as timeout_e:
+            log_status(f"⏱️ Timeout on {url}: {str(timeout_e)[:80]}. Skipping to next URL...")
+            return None
+        except requests.exceptions.RequestException as req_e:
+            log_status(f"❌ Network error on {url}: {str(req_e)[:80]}. Skipping to next URL...")
+            return None
+        except Exception as e:
+            log_status(f"❌ Error processing {url}: {str(e)[:80]}. Skipping to next URL...")
+            return None
+
+    def site_key(self, url: str) -> str:
+        """Registrable domain (eTLD+1) of `url`; www.brand.com and brand.com are one site."""
+        return registrable_domain(url)
+
+    def should_crawl_site(self, url: str) -> bool:
+        """Consults the known-domain index (KNOWN_DOMAIN_POLICY) before a site is crawled."""
+        if self.domain_index is None or self.domain_index.should_crawl(url, self.KNOWN_DOMAIN_POLICY):
             return True
-    def intelligent_scraper(self, result_block) -> list[Lead]:
+        log_status(f"⏭️ Skipping seed {url}: domain {self.site_key(url)} was already crawled (policy: {self.KNOWN_DOMAIN_POLICY}).")
+        return False
+
+    def record_site_crawl(self, url: str, has_lead: bool):
+        """Records a finished crawl of the site of `url` in the known-domain index."""
+        if self.domain_index is not None:
+            self.domain_index.record_crawl(url, has_lead)
+
+    def intelligent_scraper(self, result_block, seed_results: dict = None, on_seed_result=None) -> list[Lead]:
         """
         Intelligently scrape each URL in result_block.
+        Seeds are crawled concurrently by AsyncCrawlEngine (bounded by MAX_CONCURRENCY
+        overall and MAX_CONCURRENCY_PER_HOST per host).
         Skip individual URLs on timeout instead of crashing the entire batch.
         Will skip subsequent seed URLs from a domain after a lead (email) has been found there
         and returns a deduplicated list of leads (unique emails).
+        `seed_results` is a checkpoint ({seed: Lead or None}): seeds already in it are not crawled
+        again, and the result of every crawled seed is added to it (and passed to
+        `on_seed_result(seed, lead)` as soon as the seed finishes).
         """
-        lead_list = []
-        seen_domains = set()
-        for url in result_block:
-            try:
-                parsed_seed = urlparse(url)
-                seed_domain = parsed_seed.netloc
-
-                if seed_domain in seen_domains:
-                    log_status(f"⚠️ Skipping seed {url} because domain {seed_domain} already produced a lead.")
-                    continue
-
-                log_status(f"🔗 Processing seed URL: {url}")
-                graph = self.Make_A_Graph(url)
-                parsed_url = urlparse(url)
-                full_base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
-
-                lead = self.bfs(graph, full_base_url)
-
-                # If BFS found a complete lead, record domain and append
-                if lead is not None and self.lead_is_complete(lead):
-                    lead_list.append(lead)
-                    seen_domains.add(seed_domain)
-                else:
-                    lead_list.append(None)
-            except requests.exceptions.Timeout as timeout_e:
-                log_status(f"⏱️ Timeout on {url}: {str(timeout_e)[:80]}. Skipping to next URL...")
-                lead_list.append(None)
-            except requests.exceptions.RequestException as req_e:
-                log_status(f"❌ Network error on {url}: {str(req_e)[:80]}. Skipping to next URL...")
-                lead_list.append(None)
-            except Exception as e:
-                log_status(f"❌ Error processing {url}: {str(e)[:80]}. Skipping to next URL...")
-                lead_list.append(None)
-        
+        if seed_results is None:
+            seed_results = {}
+
+        def record(seed, lead):
+            seed_results[seed] = lead
+            if on_seed_result is not None:
+                on_seed_result(seed, lead)
+        self.stream_leads(result_block, record, skip_seeds=seed_results)
+        return self._dedupe_leads(seed_results.get(seed) for seed in result_block)
+
+    def stream_leads(self, result_block, sink, skip_seeds=()) -> int:
+        """
+        Crawls the seeds of result_block like `intelligent_scraper`, but hands the result of every
+        seed to `sink(seed, lead or None)` as soon as the seed finishes instead of collecting them
+        (see LeadPipeline). Seeds in `skip_seeds` are not crawled. Returns the number of seeds crawled.
+        """
+        pending = [seed for seed in result_block if seed not in skip_seeds]
+        if len(pending) < len(result_block):
+            log_status(f"♻️ Resuming from checkpoint: {len(result_block) - len(pending)} seeds already crawled.")
+        self.reset_fetch_stats()
+        engine = AsyncCrawlEngine(self, self.MAX_CONCURRENCY, self.MAX_CONCURRENCY_PER_HOST, host_key=self.site_key)
+        engine.run(pending, on_result=sink, collect=False)
+        self._finish_run()
+        return len(pending)
+
+    def budgeted_scraper(self, seeds_by_keyword: dict, budget: CrawlBudget) -> dict:
+        """
+        Crawls the seeds of several keywords ({keyword: [seed urls]}) under one run-level
+        CrawlBudget. BudgetedCrawlScheduler spends the budget on the most promising pages
+        across all keywords first (MAX_VISITS / MAX_DEPTH still bound each seed).
+        Returns {keyword: deduplicated list of leads}.
+        """
+        self.reset_fetch_stats()
+        scheduler = BudgetedCrawlScheduler(self, budget, self.MAX_CONCURRENCY)
+        leads_by_keyword = scheduler.run(seeds_by_keyword)
+        self._finish_run()
+        return {keyword: self._dedupe_leads(leads) for keyword, leads in leads_by_keyword.items()}
+
+    def _finish_run(self):
+        """Persists the recorded crawl outcomes and logs the fetch, politeness, cache and parse counters."""
+        if self.RECORD_CRAWL_OUTCOMES and self.outcome_stats is not None:
+            self.outcome_stats.flush()
+        stats = self.fetch_stats()
+        log_status(f"📊 Fetches: {stats['fetches']} for {stats['unique_urls']} URLs "
+                   f"(max per URL: {stats['max_fetches_per_url']}, cache hits: {stats['cache_hits']}, "
+                   f"sitemap documents: {stats['sitemap_documents']})")
+        polite_stats = self.politeness.stats()
+        log_status(f"🐢 Politeness: {polite_stats['requests']} scheduled requests over {polite_stats['hosts']} hosts, "
+                   f"{polite_stats['total_wait_seconds']}s spent waiting for host slots")
+        cache_stats = self.cache.stats()
+        log_status(f"🗄️ Page cache: {cache_stats['entries']} entries, {cache_stats['bytes']}/{cache_stats['max_bytes']} bytes, "
+                   f"hits={cache_stats['hits']} misses={cache_stats['misses']} evictions={cache_stats['evictions']}")
+        if self.crawl_state is not None:
+            state_stats = self.crawl_state.stats()
+            log_status(f"🧷 Checkpoints of run {state_stats['run_id']}: {state_stats['writes']} writes for {state_stats['pages']} pages, "
+                       f"{state_stats['write_seconds']}s ({state_stats['ms_per_page']} ms per page)")
+        if self.parse_pool is not None:
+            parse_stats = self.parse_pool.stats()
+            log_status(f"🧩 Parse pool: {parse_stats['pages']} pages over {parse_stats['workers']} workers "
+                       f"(queue depth {parse_stats['max_pending']}, {parse_stats['queue_wait_seconds']}s waiting for a slot)")
+
+    def _dedupe_leads(self, lead_list) -> list[Lead]:
+        """Drops None entries and later leads repeating an email, preserving order."""
         # Deduplicate by email while preserving order
         unique_leads = []
         seen_emails = set()
@@ -298,92 +700,59 @@ class LeadExtractor:
         return unique_leads
     
     def calculate_heuristic(self, url: str, link_text: str) -> int:
-        """Estimates the remaining clicks (h(n)) to find the lead based on commercial footer data."""
-        
-        full_text = (url + " " + link_text).lower()
-        
-        # 1. IMMEDIATE GOAL INDICATORS (Cost: 1)
-        if any(kw in full_text for kw in ['contact', 'contact-us','support', 'email', 'billing', 'shipment','privacy-policy', 'terms-of-service','about-us','terms-of-use']):
-            return 1
-
-        # 2. HIGH PROXIMITY TO GOAL (Cost: 2)
-        # Customer Service, Affiliates, Returns are highly likely to contain contact info.
-        if any(kw in full_text for kw in ['customer service', 'affiliates', 'returns', 'exchanges']):
-            return 2
-
-        # 3. MEDIUM PROXIMITY (Cost: 3)
-        # General corporate information links.
-        if any(kw in full_text for kw in ['careers', 'newsroom', 'community', 'team']):
-            return 3
-
-        # 4. LOW PROXIMITY / LEGAL (Cost: 4)
-        # Standard legal/compliance pages.
-        if any(kw in full_text for kw in ['privacy', 'legal', 'terms', 'accessibility']):
-            return 4
-            
-        # 5. IRRELEVANT / COMMERCIAL CONTENT (Highest Penalty: 15)
-        # These link to product/shopping pages, which are dead ends for leads.
-        if any(kw in full_text for kw in [
-            'blog', 'news', 'shop', 'product', 'gifts', 'sale', 'best-sellers', 
-            'basket', 'checkout', 'login', 'rewards', 'auto-replenish', 'card'
-        ]):
-            return 15
-            
-        # 6. DEFAULT COST (Unspecified/Neutral Link: 10)
-        # Forces A* to visit every single link above before visiting an unmarked link.
-        return 10
+        """Estimates the remaining clicks (h(n)) to find the lead based on commercial footer data.
+        The keyword -> cost tiers live in `link_scorer` (see LinkScorer.DEFAULT_TIERS)."""
+        return self.link_scorer.score(url, link_text)
+
+    def discover_sitemap_candidates(self, start_node: str, spend=None) -> list[tuple]:
+        """
+        Reads robots.txt / sitemap.xml of the seed's site, scores every listed page with the
+        link heuristic and returns the best (cost, url) candidates for the A* heap.
+        `spend()` is asked before every document fetch (see SitemapDiscovery).
+        """
+        discovery = SitemapDiscovery(self.session_pool, self.politeness, random.choice(self.user_agent_pool), spend=spend)
+        try:
+            pages = discovery.discover(start_node, link_filter=self.clean_all_urls)
+        except Exception as e:
+            log_status(f"⚠️ Sitemap discovery failed for {start_node}: {e}")
+            pages = []
+        finally:
+            with self._stats_lock:
+                self.sitemap_documents += discovery.documents_fetched
+        pairs = [(page, "") for page in pages if self.normalize_url_key(page) != start_node]
+        scored = sorted(
+            (cost, url) for (url, _), cost in zip(pairs, self.score_neighbors(pairs))
+            if cost <= self.SITEMAP_MAX_COST
+        )
+        candidates = scored[:self.SITEMAP_MAX_CANDIDATES]
+        if candidates:
+            log_status(f"🗺️ Sitemap candidates for {start_node}: {[url for _, url in candidates]}")
+        return candidates
+
+    def score_neighbors(self, neighbor_pairs: list, base_costs: list = None) -> list[int]:
+        """
+        Heuristic costs of all (url, link_text) pairs of one page, scored in a single batch.
+        `base_costs` are static costs already computed by the parser (PageExtraction.link_costs);
+        only the learned multipliers are applied to them.
+        """
+        if base_costs is None:
+            return self.link_scorer.score_links(neighbor_pairs)
+        if isinstance(self.link_scorer, AdaptiveLinkScorer):
+            return self.link_scorer.adjust(neighbor_pairs, base_costs)
+        return list(base_costs)
+
     def get_new_neighbors(self, current_url: str) -> list[str]:
-   
-    # 1. Define the base domain (needed for filtering)
-        internal_links = []
+        """Fetches `current_url` (through the page cache) and returns its internal (link, text) pairs."""
         normalized_url=self.normalize_url_key(current_url)
-        parsed_base_url = urlparse(normalized_url)
-        base_netloc = parsed_base_url.netloc
-        full_base_url = f"{parsed_base_url.scheme}://{base_netloc}"
         try:
-            if normalized_url in self.cache:
-                log_status(f"Using cached content for: {normalized_url}")
-                html_content=self.cache[normalized_url]
-            else:
-                try:
-                    selected_agent = random.choice(self.user_agent_pool)
-                    dynamic_headers = {'User-Agent': selected_agent}  
-                    # 2. Fetch Content (using requests, assuming no Selenium needed here)
-                    response = requests.get(normalized_url, headers=dynamic_headers, timeout=10)
-                    response.raise_for_status()
-                    html_content = response.text
-                    self.cache[normalized_url]=html_content
-                    sleep_time = random.uniform(2, 4) 
-                    time.sleep(sleep_time)
-                    # Check for HTTP errors 
-                except requests.exceptions.RequestException as e:
-                    log_status(f"❌ Error fetching {normalized_url}: {e}")
-                    return []
-            soup = BeautifulSoup(html_content, 'lxml')
-            all_link_tags = soup.find_all('a', href=True)
-                    
-            # 3. Iterate, Normalize, and Filter Links
-            for link_tag in all_link_tags:
-                        # Normalize to an absolute URL
-                url_address = urljoin(full_base_url, link_tag['href'])
-                url_text=link_tag.get_text(strip=True)
-                parsed_link_obj = urlparse(url_address)
-                        
-                # Use the cleaning method to check if the link is valid and internal
-                if self.clean_all_urls(parsed_link_obj, base_netloc):
-                            
-                # Create the clean, scheme-prefixed link string for the queue
-                    clean_link_string = requests.utils.urlunparse((
-                    parsed_link_obj.scheme, 
-                    parsed_link_obj.netloc, 
-                    parsed_link_obj.path, # Keep the path for deeper traversal
-                                    '', '', ''
-                                ))
-                    internal_links.append((clean_link_string,url_text))
-            return internal_links
+            html_content = self._fetch_page(normalized_url, stop_early=False)
         except requests.exceptions.RequestException as e:
-            log_status(f"❌ Failed to fetch links from {normalized_url}: {e}")
-            return internal_links
+            log_status(f"❌ Error fetching {normalized_url}: {e}")
+            return []
+        if html_content is None:
+            return []
+        try:
+            return self._extract_page(normalized_url, html_content).internal_links
         except Exception as e:
             log_status(f"❌ General error during neighbor discovery for {normalized_url}: {e}")
             return [] # Return an empty list for general errors too.
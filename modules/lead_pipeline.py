@@ -0,0 +1,156 @@
+"""Streaming lead pipeline from the crawler to storage.
+
+`intelligent_scraper` returns its leads only once every seed is done, so a lead found in
+the first minute of a long keyword was neither visible nor persisted until the end, and
+a crash lost it. `LeadPipeline` takes each complete lead as soon as its seed finishes,
+validates it, drops repeated emails and writes it to the DatabaseManager in small batched
+commits from a writer thread. Its queue is bounded, so memory does not grow with the
+number of seeds: a crawler that outpaces storage waits instead.
+"""
+
+import queue
+import threading
+import time
+try:
+    from .shared_log import log_status
+    from .retry import RetryPolicy
+except (ImportError, ValueError):
+    import os
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+    from modules.retry import RetryPolicy
+
+_CLOSE = object()
+
+
+class LeadPipeline:
+    """
+    Validates and stores the leads of one keyword while it is being crawled.
+    `put` is thread-safe; call `close` once the crawl is over to flush the last batch.
+    """
+    BATCH_SIZE = 5
+    FLUSH_SECONDS = 2.0
+    MAX_PENDING = 100
+
+    def __init__(self, storage, keyword: str = None, validator=None, batch_size: int = BATCH_SIZE,
+                 flush_seconds: float = FLUSH_SECONDS, max_pending: int = MAX_PENDING,
+                 retry_policy: RetryPolicy = None, on_outcome=None):
+        """
+        Args:
+            storage: The DatabaseManager leads are written to.
+            keyword (str): Keyword the leads were found for, used in log messages. Leads are stored
+                without it, as LeadGenerationTool._store does.
+            validator: Optional LeadValidator run on every lead before it is stored.
+            batch_size (int): Leads per commit.
+            flush_seconds (float): Longest time a lead waits in a partial batch.
+            max_pending (int): Leads waiting for the writer before `put` blocks.
+            retry_policy (RetryPolicy): Retries of a failed commit (a single attempt if omitted).
+            on_outcome (callable): Called from the writer as `on_outcome(lead, kept)` once a lead is settled:
+                kept is True when its commit succeeded and the validator (if any) accepted it, False for
+                rejected leads and repeated emails. Leads whose commit failed are not reported.
+        """
+        self.storage = storage
+        self.keyword = keyword
+        self.validator = validator
+        self.batch_size = max(1, int(batch_size))
+        self.flush_seconds = flush_seconds
+        self.retry_policy = retry_policy or RetryPolicy(attempts=1)
+        self.on_outcome = on_outcome
+        self._queue = queue.Queue(maxsize=max(1, int(max_pending)))
+        self._batch = []
+        self._batch_started = None
+        self._seen_emails = set()
+        self.received = 0
+        self.duplicates = 0
+        self.stored = 0
+        self.commits = 0
+        self.failed = 0
+        self.error = None
+        self._writer = threading.Thread(target=self._run, name=f'lead-pipeline-{keyword}', daemon=True)
+        self._writer.start()
+
+    def put(self, lead):
+        """Hands a lead to the writer; None is ignored. Blocks while MAX_PENDING leads are waiting."""
+        if lead is not None:
+            self._queue.put(lead)
+
+    def close(self) -> dict:
+        """Flushes the remaining leads, stops the writer and returns `stats()`."""
+        self._queue.put(_CLOSE)
+        self._writer.join()
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {
+            'received': self.received,
+            'duplicates': self.duplicates,
+            'stored': self.stored,
+            'commits': self.commits,
+            'failed': self.failed,
+        }
+
+    def _run(self):
+        while True:
+            timeout = None
+            if self._batch:
+                timeout = max(0.0, self._batch_started + self.flush_seconds - time.monotonic())
+            try:
+                lead = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush()
+                continue
+            if lead is _CLOSE:
+                self._flush()
+                return
+            self._accept(lead)
+            if len(self._batch) >= self.batch_size:
+                self._flush()
+
+    def _accept(self, lead):
+        self.received += 1
+        email = getattr(lead, 'email', None)
+        if email:
+            if email in self._seen_emails:
+                log_status(f"🔁 Skipping duplicate lead with email: {email}")
+                self.duplicates += 1
+                self._report(lead, False)
+                return
+            self._seen_emails.add(email)
+        if self.validator is not None:
+            try:
+                # validator may modify lead in-place (sets is_lead_valid etc.)
+                self.validator.validate_lead(lead)
+            except Exception as e:
+                log_status(f"⚠️ Lead validation error: {e}")
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(lead)
+
+    def _flush(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        try:
+            count = self.retry_policy.call(self.storage.add_all_leads, batch, raise_errors=True,
+                                           label=f"Storing leads for '{self.keyword}'")
+        except Exception as e:
+            log_status(f"❌ Could not store {len(batch)} leads for '{self.keyword}': {str(e)[:100]}")
+            self.failed += len(batch)
+            self.error = e
+            return
+        self.stored += count
+        self.commits += 1
+        log_status(f"💾 Stored {count} new leads for '{self.keyword}' ({self.stored} so far).")
+        for lead in batch:
+            self._report(lead, self.validator is None or bool(getattr(lead, 'is_lead_valid', False)))
+
+    def _report(self, lead, kept: bool):
+        if self.on_outcome is None:
+            return
+        try:
+            self.on_outcome(lead, kept)
+        except Exception as e:
+            log_status(f"⚠️ Could not record the outcome of {getattr(lead, 'source_url', lead)}: {str(e)[:100]}")
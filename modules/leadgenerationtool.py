@@ -1,7 +1,9 @@
 from typing import TypeVar
+import collections
 import os
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 try:
     from .scrapinghandler import ScrapingHandler
     from .leadExtractor import LeadExtractor
@@ -10,6 +12,10 @@ try:
     from .LeadValidator import LeadValidator
     from .shared_log import log_status, LOG_QUEUE
     from .Lead import Lead
+    from .crawl_scheduler import CrawlBudget
+    from .retry import RetryPolicy
+    from .crawl_state import CrawlStateStore
+    from .lead_pipeline import LeadPipeline
 except (ImportError, ValueError):
     import sys
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -22,10 +28,67 @@ except (ImportError, ValueError):
     from modules.LeadValidator import LeadValidator
     from modules.shared_log import log_status, LOG_QUEUE
     from modules.Lead import Lead
+    from modules.crawl_scheduler import CrawlBudget
+    from modules.retry import RetryPolicy
+    from modules.crawl_state import CrawlStateStore
+    from modules.lead_pipeline import LeadPipeline
 # Define the type alias for clarity
 StorageType = TypeVar('StorageType', bound=DatabaseManager)
 
+# Outcome of one keyword of process_keywords: the extracted leads (empty when they were streamed
+# to storage), the number of new leads stored, the number of seed URLs the search returned, the
+# error and the stage ('search', 'crawl' or 'store') that failed (both None on success) and the
+# wall-clock seconds spent
+KeywordResult = collections.namedtuple('KeywordResult', ['keyword', 'leads', 'stored', 'seeds', 'error', 'stage', 'seconds'])
+
+
+class KeywordCheckpoint:
+    """
+    Stage results of one keyword, kept across retries so that a failure only repeats the
+    failed unit: the seed list (search), the result of every crawled seed, and the stored count.
+    With a CrawlStateStore they are also persisted, and loaded back when a run is resumed.
+    """
+
+    def __init__(self, keyword: str, state: CrawlStateStore = None):
+        self.keyword = keyword
+        self.state = state
+        self.seeds = None
+        self.seed_results = {}
+        self.leads = None
+        self.stored = None
+        if state is not None:
+            self.seeds, self.seed_results, self.stored = state.load_keyword(keyword)
+
+    def set_seeds(self, seeds: list[str]):
+        self.seeds = seeds
+        if self.state is not None:
+            self.state.save_seeds(self.keyword, seeds)
+
+    def save_seed_result(self, seed: str, lead: Lead):
+        if self.state is not None:
+            self.state.save_seed_result(self.keyword, seed, lead)
+
+    def set_stored(self, count: int):
+        self.stored = count
+        if self.state is not None:
+            self.state.save_stored(self.keyword, self.seeds, count)
+
 class LeadGenerationTool:
+    # Keywords processed at the same time by process_keywords, and Selenium searches (one Firefox
+    # each) running at the same time among them
+    KEYWORD_WORKERS=4
+    MAX_PARALLEL_SEARCHES=2
+    # Each stage of a keyword (search, crawl, storage) is retried on its own, with exponential
+    # backoff and jitter between attempts
+    RETRY_ATTEMPTS=3
+    RETRY_BASE_DELAY=1.0
+    RETRY_MAX_DELAY=10.0
+    # Checkpoint every process_keywords run to crawl_state.db so it can be resumed by run ID
+    CHECKPOINT_RUNS=True
+    # process_keywords streams every lead to storage as soon as its seed finishes (see LeadPipeline)
+    # instead of storing all leads of a keyword at the end
+    STREAM_LEADS=True
+
     def __init__(self, input_module: keywordmodule, scraper: ScrapingHandler, storage: StorageType, extractor: LeadExtractor = None, validator: LeadValidator = None):
         """
         Initializes the tool with dependencies.
@@ -38,64 +101,263 @@ class LeadGenerationTool:
         self.storage = storage 
         self.extractor = extractor
         self.validator = validator
+        self._search_slots = threading.BoundedSemaphore(self.MAX_PARALLEL_SEARCHES)
         log_status("🔧 LeadGenerationTool initialized.")
 
-    def process_keyword(self, keyword: str, extractor_instance: LeadExtractor = None, max_seed_urls: int = 3, MAX_DEPTH: int = 2, MAX_VISITS=3) -> list[Lead]:
+    def _retry_policy(self, attempts: int = None) -> RetryPolicy:
+        return RetryPolicy(attempts or self.RETRY_ATTEMPTS, self.RETRY_BASE_DELAY, self.RETRY_MAX_DELAY)
+
+    def _search(self, keyword: str) -> list[str]:
+        """
+        Seed URLs for `keyword`; at most MAX_PARALLEL_SEARCHES searches run at the same time.
+        Raises when the search itself failed (as opposed to finding nothing), so it can be retried.
+        """
+        with self._search_slots:
+            clean_urls = self.scraper.scrape_keyword(keyword)
+        if clean_urls is None:
+            raise RuntimeError(f"search for '{keyword}' failed")
+        return clean_urls
+
+    def _validate(self, leads: list[Lead]):
+        """Validates each lead in place when a validator is set; a failing lead does not stop the others."""
+        if not self.validator:
+            return
+        for lead in leads:
+            try:
+                # validator may modify lead in-place (sets is_lead_valid etc.)
+                self.validator.validate_lead(lead)
+            except Exception as e:
+                log_status(f"⚠️ Lead validation error: {e}")
+
+    def _record_outcome(self, extractor: LeadExtractor, lead: Lead, kept: bool):
+        """
+        Records the site of a crawled lead in the extractor's known-domain index once storage is
+        done with it: a stored lead marks the site as done for good (KNOWN_DOMAIN_POLICY), a lead
+        the validator rejected as crawled without a lead, so it is retried later.
+        """
+        extractor.record_site_crawl(lead.source_url, kept)
+
+    def _record_stored(self, extractor: LeadExtractor, leads: list[Lead]):
+        """Records the outcome of leads that `_store` has committed (see _record_outcome)."""
+        for lead in leads:
+            self._record_outcome(extractor, lead, self.validator is None or bool(lead.is_lead_valid))
+
+    def _store(self, keyword: str, valid_leads: list[Lead], attempts: int = None) -> int:
+        """
+        Stores the leads of one keyword, retrying the write alone; returns the number stored.
+        Leads are stored without their keyword: the frontend skips any keyword that has leads
+        stored under it (DatabaseManager.get_leads_by_keyword).
+        """
+        if not valid_leads:
+            log_status(f"⚠️ No leads extracted for '{keyword}'.")
+            return 0
+        count = self._retry_policy(attempts).call(self.storage.add_all_leads, valid_leads, raise_errors=True,
+                                                  label=f"Storing leads for '{keyword}'")
+        log_status(f"✅ Successfully extracted and stored {count} leads for '{keyword}'.")
+        return count
+
+    def _stream_keyword(self, keyword: str, extractor_to_use: LeadExtractor, checkpoint: KeywordCheckpoint,
+                        policy: RetryPolicy):
+        """
+        Crawls the seeds of a keyword and streams each lead through a LeadPipeline (validation,
+        email dedup, batched commits) as soon as its seed finishes.
+        Returns (number stored, storage error or None); crawl errors are raised.
+        """
+        pipeline = LeadPipeline(self.storage, keyword, self.validator, retry_policy=policy,
+                                on_outcome=lambda lead, kept: self._record_outcome(extractor_to_use, lead, kept))
+        try:
+            # Leads checkpointed before a restart may not have been committed yet; storage
+            # skips the ones that were
+            for seed, lead in checkpoint.seed_results.items():
+                pipeline.put(lead)
+                checkpoint.seed_results[seed] = None
+
+            def sink(seed, lead):
+                checkpoint.save_seed_result(seed, lead)
+                # The lead now belongs to the pipeline; the checkpoint only remembers the seed is done
+                checkpoint.seed_results[seed] = None
+                pipeline.put(lead)
+            policy.call(extractor_to_use.stream_leads, checkpoint.seeds, sink, checkpoint.seed_results,
+                        label=f"Crawl for '{keyword}'")
+        finally:
+            stats = pipeline.close()
+        log_status(f"✅ Streamed {stats['received']} leads for '{keyword}': {stats['stored']} stored in {stats['commits']} commits, "
+                   f"{stats['duplicates']} duplicate emails" + (f", {stats['failed']} failed" if stats['failed'] else ""))
+        return stats['stored'], pipeline.error
+
+    def _run_keyword(self, keyword: str, extractor_to_use: LeadExtractor, attempts: int = None,
+                     checkpoint: KeywordCheckpoint = None, stream: bool = False, max_seeds: int = None) -> KeywordResult:
+        """
+        Searches, crawls and stores one keyword. Every stage is checkpointed and retried on its
+        own (up to `attempts` times): a storage error does not repeat the search or the crawl,
+        and a repeated crawl only visits the seeds without a result yet.
+        With `stream`, leads are stored while the crawl goes on (see _stream_keyword).
+        `max_seeds` keeps only the first seed URLs of the search.
+        Never raises: the error and the failed stage are reported in the KeywordResult.
+        """
+        started_at = time.monotonic()
+        checkpoint = checkpoint or KeywordCheckpoint(keyword)
+        policy = self._retry_policy(attempts)
+        stage = 'search'
+        try:
+            # 1. Scrape the content
+            if checkpoint.seeds is None:
+                log_status(f"🔍 Starting search and scraping for seed URLs for '{keyword}'...")
+                seeds = policy.call(self._search, keyword, label=f"Search for '{keyword}'")
+                checkpoint.set_seeds(seeds[:max_seeds] if max_seeds is not None else seeds)
+            if not checkpoint.seeds:
+                log_status(f"🛑 Skipping keyword '{keyword}' due to failed scrape (no seed URLs found).")
+                return KeywordResult(keyword, [], 0, 0, None, None, time.monotonic() - started_at)
+
+            # 2./3. Extract results and store them as they come
+            if stream:
+                stage = 'crawl'
+                if checkpoint.stored is None:
+                    log_status(f"🧩 Streaming leads from {len(checkpoint.seeds)} seed URLs...")
+                    stored, store_error = self._stream_keyword(keyword, extractor_to_use, checkpoint, policy)
+                    stage = 'store'
+                    if store_error is not None:
+                        raise store_error
+                    checkpoint.set_stored(stored)
+                return KeywordResult(keyword, [], checkpoint.stored, len(checkpoint.seeds), None, None, time.monotonic() - started_at)
+
+            # 2. Extract results
+            stage = 'crawl'
+            if checkpoint.leads is None:
+                log_status(f"🧩 Starting intelligent crawling and extraction from {len(checkpoint.seeds)} seed URLs...")
+                extracted_leads = policy.call(extractor_to_use.intelligent_scraper, checkpoint.seeds, checkpoint.seed_results,
+                                              checkpoint.save_seed_result, label=f"Crawl for '{keyword}'")
+                checkpoint.leads = [lead for lead in extracted_leads if lead is not None]
+                self._validate(checkpoint.leads)
+
+            # 3. Store the extracted leads using the DatabaseManager
+            stage = 'store'
+            if checkpoint.stored is None:
+                checkpoint.set_stored(self._store(keyword, checkpoint.leads, attempts))
+                self._record_stored(extractor_to_use, checkpoint.leads)
+            return KeywordResult(keyword, checkpoint.leads, checkpoint.stored, len(checkpoint.seeds), None, None, time.monotonic() - started_at)
+
+        except Exception as e:
+            log_status(f"⚠️ Skipping keyword '{keyword}': {stage} failed after {policy.attempts} attempts. Last error: {str(e)[:100]}")
+            return KeywordResult(keyword, [], 0, len(checkpoint.seeds or []), e, stage, time.monotonic() - started_at)
+
+    def process_keyword(self, keyword: str, extractor_instance: LeadExtractor = None, max_seed_urls: int = None, MAX_DEPTH: int = 2, MAX_VISITS: int = None) -> list[Lead]:
         """
         Processes a single keyword: scrapes, extracts leads, and stores them.
         - `extractor_instance` may be provided to override the instance stored on the tool. If omitted, `self.extractor` will be used.
-        Retries on timeout/network errors instead of crashing the entire thread.
+        - `max_seed_urls` crawls only the first seed URLs of the search (all of them if None).
+        - `MAX_VISITS` caps the pages visited per seed for this call (the extractor's MAX_VISITS if None).
+        Retries the failed stage (up to MAX_DEPTH + 1 attempts) instead of crashing the entire thread.
         Returns the list of newly extracted Leads (objects).
         """
-        for attempt in range(MAX_DEPTH + 1):
+        # Choose extractor (instance param overrides internal extractor)
+        extractor_to_use = extractor_instance or self.extractor
+        if extractor_to_use is None:
+            log_status(f"🛑 No extractor available to process keyword '{keyword}'.")
+            return []
+        if MAX_VISITS is not None:
+            extractor_to_use = extractor_to_use.clone()
+            extractor_to_use.MAX_VISITS = MAX_VISITS
+        return self._run_keyword(keyword, extractor_to_use, MAX_DEPTH + 1, max_seeds=max_seed_urls).leads
+
+    def process_keywords(self, keywords: list[str], workers: int = None, extractor_instance: LeadExtractor = None, attempts: int = None, run_id: str = None, stream: bool = None) -> dict:
+        """
+        Processes several keywords concurrently: up to `workers` keywords (default KEYWORD_WORKERS)
+        are searched, crawled and stored at the same time, with at most MAX_PARALLEL_SEARCHES
+        Selenium searches among them. Each keyword is crawled by its own clone of the extractor
+        (shared pools and caches, separate run counters); storage writes are serialized by the
+        DatabaseManager. An error in one keyword does not affect the others.
+        With CHECKPOINT_RUNS (or a `run_id`), progress is checkpointed to a CrawlStateStore;
+        passing the ID of an earlier run resumes it (with its own keywords if `keywords` is
+        empty): searched seeds, crawled seeds and stored keywords are not repeated, and sites of
+        an interrupted run continue from their last frontier checkpoint. A run whose keywords
+        failed is still finished, with each failure recorded; resuming it retries those keywords.
+        With `stream` (default STREAM_LEADS) every lead is validated and stored as soon as its
+        seed finishes, in small batched commits (see LeadPipeline).
+        Returns {keyword: KeywordResult} in the order of `keywords`.
+        """
+        extractor_to_use = extractor_instance or self.extractor
+        keywords = list(dict.fromkeys(k for k in keywords if k))
+        if extractor_to_use is None:
+            log_status("🛑 No extractor available to process keywords.")
+            return {k: KeywordResult(k, [], 0, 0, RuntimeError("no extractor"), 'crawl', 0.0) for k in keywords}
+        state = None
+        if self.CHECKPOINT_RUNS or run_id:
+            state = CrawlStateStore(run_id, keywords)
+            if state.resumed:
+                keywords = keywords or state.keywords
+                log_status(f"♻️ Resuming run {state.run_id} ({len(keywords)} keywords)")
+            else:
+                log_status(f"🧷 Checkpointing run {state.run_id} (resume it with run_id='{state.run_id}')")
+        if not keywords:
+            return {}
+
+        workers = max(1, min(int(workers or self.KEYWORD_WORKERS), len(keywords)))
+        log_status(f"⚡ Processing {len(keywords)} keywords ({workers} at a time, {self.MAX_PARALLEL_SEARCHES} searches at a time)")
+        started_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='keyword') as executor:
+            futures = {}
+            for k in keywords:
+                extractor_clone = extractor_to_use.clone()
+                extractor_clone.crawl_state = state
+                futures[k] = executor.submit(self._run_keyword, k, extractor_clone, attempts, KeywordCheckpoint(k, state),
+                                             self.STREAM_LEADS if stream is None else stream)
+            results = {k: future.result() for k, future in futures.items()}
+
+        failed = {r.keyword: (r.stage, r.error) for r in results.values() if r.error is not None}
+        log_status(f"🏁 {len(keywords)} keywords in {time.monotonic() - started_at:.1f}s: "
+                   f"{sum(r.stored or 0 for r in results.values())} new leads stored, {len(failed)} failed"
+                   + (f" ({', '.join(failed)})" if failed else ""))
+        if state is not None:
+            state.finish(failed)
+            if failed:
+                log_status(f"🧷 Retry the failed keywords with run_id='{state.run_id}'")
+        return results
+
+    def process_keywords_with_budget(self, keywords: list[str], budget: CrawlBudget, extractor_instance: LeadExtractor = None) -> dict:
+        """
+        Processes several keywords as one run under a shared CrawlBudget: collects the seed URLs
+        of every keyword first, then crawls them all through `extractor.budgeted_scraper`, so the
+        budget goes to the most promising pages across keywords instead of keyword by keyword.
+        Leads are validated and stored per keyword. Returns {keyword: [Lead, ...]}.
+        """
+        extractor_to_use = extractor_instance or self.extractor
+        if extractor_to_use is None:
+            log_status("🛑 No extractor available to process keywords.")
+            return {}
+
+        def collect_seeds(keyword):
             try:
-                # 1. Scrape the content -> Use the passed parameter for flexibility
-                log_status(f"🔍 Starting search and scraping for seed URLs for '{keyword}'... (attempt {attempt + 1}/{MAX_DEPTH + 1})")
-                clean_urls = self.scraper.scrape_keyword(keyword)
+                log_status(f"🔍 Starting search and scraping for seed URLs for '{keyword}'...")
+                return self._retry_policy().call(self._search, keyword, label=f"Search for '{keyword}'")
+            except Exception as e:
+                log_status(f"⚠️ Skipping keyword '{keyword}': {str(e)[:100]}")
+                return None
 
+        # Searches of different keywords overlap (bounded by MAX_PARALLEL_SEARCHES)
+        seeds_by_keyword = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_PARALLEL_SEARCHES, len(keywords))), thread_name_prefix='search') as executor:
+            for keyword, clean_urls in zip(keywords, executor.map(collect_seeds, keywords)):
                 if not clean_urls:
                     log_status(f"🛑 Skipping keyword '{keyword}' due to failed scrape (no seed URLs found).")
-                    return []
-
-                # 2. Choose extractor (instance param overrides internal extractor)
-                extractor_to_use = extractor_instance or self.extractor
-                if extractor_to_use is None:
-                    log_status(f"🛑 No extractor available to process keyword '{keyword}'.")
-                    return []
-
-                # 3. Extract results
-                log_status(f"🧩 Starting intelligent crawling and extraction from {len(clean_urls)} seed URLs...")
-
-                extracted_leads = extractor_to_use.intelligent_scraper(clean_urls)
-                
-                valid_leads = [lead for lead in extracted_leads if lead is not None]
-
-                # Optional validation step (only if a validator was provided)
-                if self.validator and valid_leads:
-                    try:
-                        for lead in valid_leads:
-                            # validator may modify lead in-place (sets is_lead_valid etc.)
-                            self.validator.validate_lead(lead)
-                    except Exception as e:
-                        log_status(f"⚠️ Lead validation error: {e}")
-
-                # 4. Store the extracted leads using the DatabaseManager
-                if valid_leads:
-                    count = self.storage.add_all_leads(valid_leads) 
-                    log_status(f"✅ Successfully extracted and stored {count} leads for '{keyword}'.")
-                else:
-                    log_status(f"⚠️ No leads extracted for '{keyword}'.")
-                    
-                return valid_leads # Return the data collected
-                
+                    continue
+                seeds_by_keyword[keyword] = clean_urls
+        if not seeds_by_keyword:
+            return {}
+
+        leads_by_keyword = extractor_to_use.budgeted_scraper(seeds_by_keyword, budget)
+        for keyword, valid_leads in leads_by_keyword.items():
+            self._validate(valid_leads)
+            try:
+                self._store(keyword, valid_leads)
+                self._record_stored(extractor_to_use, valid_leads)
             except Exception as e:
-                if attempt < MAX_DEPTH:
-                    log_status(f"⚠️ Timeout/Error on attempt {attempt + 1}: {str(e)[:100]}... Retrying...")
-                else:
-                    log_status(f"⚠️ Skipping keyword '{keyword}' after {MAX_DEPTH + 1} attempts. Last error: {str(e)[:100]}")
-                    return []
-        
-        return []
+                log_status(f"❌ Could not store leads for '{keyword}': {str(e)[:100]}")
+
+        report = budget.report()
+        for keyword, spent in report['keywords'].items():
+            log_status(f"💰 '{keyword}': {spent['fetches']} fetches, {spent['leads']} leads")
+        return leads_by_keyword
 # if __name__ == "__main__":
 #     # Initialize dependencies
 #     input_module = keywordmodule()
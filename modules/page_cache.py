@@ -0,0 +1,143 @@
+"""Bounded in-memory cache for fetched page bodies.
+
+`PageCache` is a thread-safe LRU keyed by URL. It enforces a byte budget, expires
+entries after a TTL and can store bodies zlib- or brotli-compressed.
+"""
+
+import collections
+import threading
+import time
+import zlib
+
+try:
+    import brotli  # Optional: smaller bodies than zlib at similar speed
+except ImportError:
+    brotli = None
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of page bodies with a byte budget and per-entry TTL.
+
+    Sizes are counted on the stored (possibly compressed) bytes, and the least recently
+    used entries are evicted until a new entry fits. Expired entries are dropped on access.
+    """
+    DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+    DEFAULT_TTL_SECONDS = 60 * 60
+    COMPRESSIONS = (None, 'zlib', 'brotli')
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 compression: str = 'zlib', clock=time.monotonic):
+        """
+        Args:
+            max_bytes (int): Upper bound on the stored bytes of all entries.
+            ttl_seconds (float): Default lifetime of an entry; None keeps entries until evicted.
+            compression (str): None, 'zlib' or 'brotli' (falls back to zlib if brotli is not installed).
+            clock (callable): Monotonic time source, injectable for testing.
+        """
+        if compression not in self.COMPRESSIONS:
+            raise ValueError(f"Unknown compression '{compression}', expected one of {self.COMPRESSIONS}")
+        if compression == 'brotli' and brotli is None:
+            compression = 'zlib'
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.compression = compression
+        self._clock = clock
+        self._entries = collections.OrderedDict()  # key -> (blob, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _encode(self, value: str) -> bytes:
+        data = value.encode('utf-8')
+        if self.compression == 'zlib':
+            return zlib.compress(data, 6)
+        if self.compression == 'brotli':
+            return brotli.compress(data, quality=5)
+        return data
+
+    def _decode(self, blob: bytes) -> str:
+        if self.compression == 'zlib':
+            blob = zlib.decompress(blob)
+        elif self.compression == 'brotli':
+            blob = brotli.decompress(blob)
+        return blob.decode('utf-8')
+
+    def _drop(self, key):
+        blob, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str, default=None):
+        """Returns the cached body for `key`, or `default` on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            blob, _, expires_at = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._decode(blob)
+
+    def set(self, key: str, value: str, ttl_seconds: float = None):
+        """Stores `value` under `key`, evicting least recently used entries to stay within budget."""
+        blob = self._encode(value)
+        size = len(blob) + len(key)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = self._clock() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+            self._entries[key] = (blob, size, expires_at)
+            self._bytes += size
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (entry[2] is None or self._clock() < entry[2])
+
+    def __getitem__(self, key: str) -> str:
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: str):
+        self.set(key, value)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Removes every entry; statistics are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss/eviction counters and the current size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+            }
@@ -0,0 +1,185 @@
+"""Process-pool parse stage, decoupled from network I/O.
+
+BeautifulSoup parsing and regex email extraction are CPU-bound and hold the GIL, so the
+crawl threads of one process share a single core for parse work. With `ParsePool`, fetch
+threads hand the downloaded HTML to a `ProcessPoolExecutor` and get back a compact
+`PageExtraction` (title, emails, Instagram handle, internal links with their heuristic
+costs). `extract_page` is the same extraction run in the calling thread.
+"""
+
+import collections
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from .email_utils import Email_Utils
+    from .link_scorer import LinkScorer
+    from .parsed_page import ParsedPage, InternalLinkFilter
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.email_utils import Email_Utils
+    from modules.link_scorer import LinkScorer
+    from modules.parsed_page import ParsedPage, InternalLinkFilter
+
+# What a parser worker sends back: plain strings, lists and ints only.
+# link_costs are the static LinkScorer costs of internal_links, in the same order.
+PageExtraction = collections.namedtuple(
+    'PageExtraction', ['url', 'title', 'emails', 'instagram_handle', 'internal_links', 'link_costs'])
+
+# Scorers built inside a worker, keyed by their table, so the memo survives across pages
+_worker_scorers = {}
+
+
+def _scorer_for(tiers, default_cost) -> LinkScorer:
+    key = (tuple((cost, tuple(keywords)) for cost, keywords in tiers), default_cost)
+    scorer = _worker_scorers.get(key)
+    if scorer is None:
+        scorer = _worker_scorers[key] = LinkScorer(list(key[0]), default_cost)
+    return scorer
+
+
+def extract_page(url: str, html_content: str, link_filter=None, tiers=None,
+                 default_cost: int = LinkScorer.DEFAULT_COST) -> PageExtraction:
+    """
+    Parses one page and returns its PageExtraction. Runs in a parser worker process
+    (every argument must be picklable) or directly in the calling thread.
+
+    Args:
+        url (str): URL the page was fetched from.
+        html_content (str): The page HTML.
+        link_filter: Picklable `link_filter(parsed_link, base_netloc) -> bool` (e.g. InternalLinkFilter).
+        tiers (list): LinkScorer (cost, keywords) table used to score the internal links.
+        default_cost (int): Cost of a link that matches no tier.
+    """
+    page = ParsedPage.from_html(url, html_content, link_filter=link_filter)
+    scorer = _scorer_for(tiers or LinkScorer.DEFAULT_TIERS, default_cost)
+    return PageExtraction(
+        url=url,
+        title=page.title,
+        emails=Email_Utils().extract_emails_from_page(page),
+        instagram_handle=page.instagram_handle,
+        internal_links=page.internal_links,
+        link_costs=scorer.score_links(page.internal_links),
+    )
+
+
+class ParsePool:
+    """
+    A pool of parser processes fed by the fetch threads. At most `max_pending` pages are
+    queued or being parsed at once; `submit` blocks beyond that, so fetchers cannot run
+    ahead of the parsers and pile up page bodies in memory.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None):
+        """
+        Args:
+            workers (int): Parser processes; defaults to the number of CPUs.
+            max_pending (int): Pages queued or in progress at once; defaults to 2 per worker.
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.max_pending = max(1, int(max_pending or 2 * self.workers))
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._stats_lock = threading.Lock()
+        self.pages = 0
+        self.queue_wait_seconds = 0.0
+
+    def submit(self, url: str, html_content: str, link_filter=None, tiers=None,
+               default_cost: int = LinkScorer.DEFAULT_COST):
+        """Queues one page for parsing and returns a Future of its PageExtraction."""
+        started = time.monotonic()
+        self._slots.acquire()
+        waited = time.monotonic() - started
+        try:
+            future = self.executor.submit(extract_page, url, html_content, link_filter, tiers, default_cost)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._stats_lock:
+            self.pages += 1
+            self.queue_wait_seconds += waited
+        return future
+
+    def extract(self, url: str, html_content: str, link_filter=None, tiers=None,
+                default_cost: int = LinkScorer.DEFAULT_COST) -> PageExtraction:
+        """Parses one page in a worker process and waits for the result."""
+        return self.submit(url, html_content, link_filter, tiers, default_cost).result()
+
+    def stats(self) -> dict:
+        """Returns the worker count, queue bound, pages parsed and time fetchers spent waiting for a queue slot."""
+        with self._stats_lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pages': self.pages,
+                'queue_wait_seconds': round(self.queue_wait_seconds, 3),
+            }
+
+    def close(self):
+        """Shuts the worker processes down."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_shared_pools = {}  # (workers, max_pending) -> ParsePool
+_shared_pool_lock = threading.Lock()
+
+
+def get_parse_pool(workers: int = None, max_pending: int = None) -> ParsePool:
+    """
+    Returns the process-wide ParsePool of the requested size and queue depth, creating it on
+    first use. Callers asking for another size get a pool of their own; a pool other callers
+    hold is never shut down.
+    """
+    with _shared_pool_lock:
+        wanted_workers = max(1, int(workers or os.cpu_count() or 1))
+        wanted_pending = max(1, int(max_pending or 2 * wanted_workers))
+        key = (wanted_workers, wanted_pending)
+        pool = _shared_pools.get(key)
+        if pool is None:
+            pool = _shared_pools[key] = ParsePool(wanted_workers, wanted_pending)
+        return pool
+
+
+def benchmark(pages: int = 200, workers: int = None) -> dict:
+    """
+    Parses the same synthetic storefront page `pages` times with 8 fetch threads, once in
+    the threads themselves and once through a ParsePool, and reports pages per second.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    nav = ''.join(f'<li><a href="/collections/item-{i}">Item {i}</a></li>' for i in range(300))
+    footer = ''.join(f'<a href="/pages/{name}">{name}</a>' for name in
+                     ('contact', 'about-us', 'shipping', 'returns', 'privacy-policy', 'terms-of-service'))
+    body = ''.join(f'<p>Product copy paragraph {i} with some text.</p>' for i in range(2000))
+    html = (f'<html><head><title>Example Brand</title></head><body><ul>{nav}</ul>{body}'
+            f'<a href="mailto:hello@example-brand.com">Mail</a>'
+            f'<a href="https://instagram.com/examplebrand">IG</a>{footer}</body></html>')
+    link_filter = InternalLinkFilter()
+    url = 'https://www.example-brand.com'
+
+    def timed(parse) -> float:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(8) as threads:
+            results = list(threads.map(lambda _: parse(url, html, link_filter), range(pages)))
+        assert all(r.emails == ['hello@example-brand.com'] for r in results)
+        return pages / (time.perf_counter() - started)
+
+    pool = ParsePool(workers)
+    try:
+        pool.extract(url, html, link_filter)  # warm the workers up
+        report = {
+            'workers': pool.workers,
+            'threads_pages_per_second': round(timed(extract_page), 1),
+            'process_pool_pages_per_second': round(timed(pool.extract), 1),
+        }
+    finally:
+        pool.close()
+    return report
+
+
+if __name__ == "__main__":
+    print(benchmark())
@@ -0,0 +1,141 @@
+"""Single-parse view of a fetched page.
+
+`ParsedPage.from_html` builds one lxml-backed BeautifulSoup tree and walks its anchors
+once, collecting everything the extractors need: title, mailto links, regex email hits,
+Instagram handles and filtered internal links with their anchor text.
+"""
+
+import os
+import re
+from urllib.parse import urlparse, urljoin
+from bs4 import BeautifulSoup
+import requests
+try:
+    from .email_utils import Email_Utils
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.email_utils import Email_Utils
+
+
+class InternalLinkFilter:
+    """
+    Picklable link filter (the rules of LeadExtractor.clean_all_urls): keeps http(s) links
+    on the page's own host that are not static assets or on a blacklisted domain.
+    """
+    ASSET_EXTENSIONS = ('.jpg', '.png', '.gif', '.css', '.js', '.svg', '.ico')
+
+    def __init__(self, blacklisted_domains=()):
+        self.blacklisted_domains = frozenset(blacklisted_domains)
+
+    def __call__(self, url_address, base_url: str) -> bool:
+        if url_address.netloc in self.blacklisted_domains:
+            return False
+        if url_address.netloc != base_url:
+            return False
+        if url_address.scheme not in ['http', 'https']:
+            return False
+        path = url_address.path.lower()
+        if path.endswith(self.ASSET_EXTENSIONS):
+            return False
+        return True
+
+
+class ParsedPage:
+    """
+    Compact extraction result of one HTML page. Holds only plain strings and lists
+    (no soup), so it is cheap to keep around and to pass between workers.
+    """
+    # Instagram paths that are not profiles
+    INSTAGRAM_PATH_BLACKLIST = {'p', 'explore', 'about', 'accounts', 'developer', 'share', 'stories', 'tags', 'directory'}
+    INSTAGRAM_HANDLE_REGEX = re.compile(r'^[A-Za-z0-9._]+$')
+
+    def __init__(self, url: str, title: str = None, mailto_links: list = None, email_hits: list = None,
+                 instagram_handles: list = None, internal_links: list = None):
+        self.url = url
+        self.title = title
+        self.mailto_links = mailto_links or []
+        self.email_hits = email_hits or []
+        self.instagram_handles = instagram_handles or []
+        self.internal_links = internal_links or []
+
+    @property
+    def instagram_handle(self):
+        """The first Instagram profile handle linked from the page, or None."""
+        return self.instagram_handles[0] if self.instagram_handles else None
+
+    @classmethod
+    def instagram_handle_from_href(cls, href: str):
+        """Returns the profile handle of an instagram.com / instagr.am link, or None."""
+        if 'instagram.com' not in href and 'instagr.am' not in href:
+            return None
+        try:
+            parsed_inst = urlparse(href)
+        except Exception:
+            return None
+        # clean path and remove any trailing/query parts
+        path = (parsed_inst.path or '').lstrip('/')
+        candidate = path.split('/')[0].split('?')[0].split('#')[0].strip()
+        # Filter out non-profile paths and noisy candidates
+        if (candidate and len(candidate) <= 30 and cls.INSTAGRAM_HANDLE_REGEX.match(candidate)
+                and candidate.lower() not in cls.INSTAGRAM_PATH_BLACKLIST and '.' not in candidate):
+            return candidate
+        return None
+
+    @classmethod
+    def from_html(cls, url: str, html_content: str, link_filter=None) -> 'ParsedPage':
+        """
+        Parses `html_content` once and returns the ParsedPage.
+
+        Args:
+            url (str): URL the page was fetched from; relative links resolve against its site root.
+            html_content (str): The page HTML.
+            link_filter (callable): `link_filter(parsed_link, base_netloc) -> bool` deciding which
+                links count as internal. When omitted no internal links are collected.
+        """
+        parsed_base_url = urlparse(url)
+        base_netloc = parsed_base_url.netloc
+        full_base_url = f"{parsed_base_url.scheme}://{base_netloc}"
+
+        soup = BeautifulSoup(html_content, 'lxml')
+        title_tag = soup.find('title')
+        title = title_tag.text if title_tag else None
+
+        mailto_links = []
+        instagram_handles = []
+        internal_links = []
+        for a_tag in soup.find_all('a', href=True):
+            href = a_tag['href']
+            if not isinstance(href, str):
+                continue
+            if href.lower().startswith('mailto:'):
+                address = href.split(':', 1)[1].split('?')[0]
+                # Same acceptance rule as Email_Utils.find_mailto_addresses
+                if Email_Utils.EMAIL_REGEX.fullmatch(address):
+                    mailto_links.append(address)
+                continue
+            handle = cls.instagram_handle_from_href(href)
+            if handle:
+                instagram_handles.append(handle)
+            if link_filter is None:
+                continue
+            parsed_link_obj = urlparse(urljoin(full_base_url, href))
+            if link_filter(parsed_link_obj, base_netloc):
+                clean_link_string = requests.utils.urlunparse((
+                    parsed_link_obj.scheme,
+                    parsed_link_obj.netloc,
+                    parsed_link_obj.path,  # Keep the path for deeper traversal
+                    '', '', ''
+                ))
+                internal_links.append((clean_link_string, a_tag.get_text(strip=True)))
+
+        return cls(
+            url=url,
+            title=title,
+            mailto_links=mailto_links,
+            email_hits=Email_Utils.find_email_hits(html_content),
+            instagram_handles=instagram_handles,
+            internal_links=internal_links,
+        )
@@ -0,0 +1,77 @@
+"""Per-host politeness scheduling.
+
+Replaces the blocking `time.sleep(random.uniform(...))` after every request with a
+next-allowed timestamp per host. A fetch only waits for the previous request to the
+*same* host; fetches to other hosts proceed in the meantime.
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class PolitenessScheduler:
+    """
+    Thread-safe per-host request spacing.
+
+    Each call to `wait_for_slot` reserves the next free slot of the URL's host and
+    pushes that host's next-allowed time forward by a random delay in
+    [min_delay, max_delay], then sleeps only until the reserved slot.
+    """
+    MIN_DELAY = 1.0
+    MAX_DELAY = 4.0
+
+    def __init__(self, min_delay: float = MIN_DELAY, max_delay: float = MAX_DELAY, clock=time.monotonic, sleep=time.sleep):
+        """
+        Args:
+            min_delay (float): Minimum seconds between two requests to the same host.
+            max_delay (float): Maximum seconds between two requests to the same host.
+            clock (callable): Monotonic time source, injectable for testing.
+            sleep (callable): Sleep function, injectable for testing.
+        """
+        self.min_delay = min_delay
+        self.max_delay = max(min_delay, max_delay)
+        self._clock = clock
+        self._sleep = sleep
+        self._next_allowed = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_wait = 0.0
+
+    def reserve(self, url: str) -> float:
+        """Reserves the next slot for the host of `url` and returns how long to wait for it."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = self._clock()
+            slot = max(now, self._next_allowed.get(host, now))
+            self._next_allowed[host] = slot + random.uniform(self.min_delay, self.max_delay)
+            wait = slot - now
+            self.requests += 1
+            self.total_wait += wait
+        return wait
+
+    def wait_for_slot(self, url: str) -> float:
+        """Blocks until a request to the host of `url` is allowed. Returns the seconds waited."""
+        wait = self.reserve(url)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def stats(self) -> dict:
+        """Returns the number of scheduled requests and the total time spent waiting."""
+        with self._lock:
+            return {'requests': self.requests, 'total_wait_seconds': round(self.total_wait, 2), 'hosts': len(self._next_allowed)}
+
+
+_shared_scheduler = None
+_shared_scheduler_lock = threading.Lock()
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    """Returns the process-wide PolitenessScheduler, creating it on first use."""
+    global _shared_scheduler
+    with _shared_scheduler_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = PolitenessScheduler()
+        return _shared_scheduler
@@ -0,0 +1,62 @@
+"""Retries with exponential backoff and jitter for a single unit of work.
+
+Retrying a whole keyword (search, crawl, validation and storage) because one step
+failed repeats all the work that already succeeded. `RetryPolicy` retries only the
+call that failed, waiting base_delay * 2**n (capped at max_delay, with "full jitter")
+between attempts so that workers failing together do not retry in lockstep.
+"""
+
+import random
+import time
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import os
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+
+class RetryPolicy:
+    """
+    How often and how patiently one unit of work is retried.
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 1.0, max_delay: float = 10.0, jitter: bool = True,
+                 sleep=time.sleep):
+        """
+        Args:
+            attempts (int): Total attempts, including the first one.
+            base_delay (float): Delay before the first retry, doubled for every further retry.
+            max_delay (float): Upper bound of any single delay.
+            jitter (bool): Draw each delay uniformly from [0, backoff] instead of waiting the full backoff.
+            sleep (callable): Sleep function, injectable for testing.
+        """
+        self.attempts = max(1, int(attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self._sleep = sleep
+
+    def delay(self, retry: int) -> float:
+        """Seconds to wait before retry number `retry` (0 for the first retry)."""
+        backoff = min(self.max_delay, self.base_delay * (2 ** retry))
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+    def call(self, fn, *args, retry_on=(Exception,), label: str = None, **kwargs):
+        """
+        Calls fn(*args, **kwargs), retrying on the exception types in `retry_on`.
+        Other exceptions, and the last one once attempts are used up, are raised to the caller.
+        """
+        for attempt in range(self.attempts):
+            try:
+                return fn(*args, **kwargs)
+            except retry_on as e:
+                if attempt == self.attempts - 1:
+                    raise
+                wait = self.delay(attempt)
+                log_status(f"🔁 {label or getattr(fn, '__name__', 'call')} failed (attempt {attempt + 1}/{self.attempts}): "
+                           f"{str(e)[:80]}. Retrying in {wait:.1f}s...")
+                self._sleep(wait)
@@ -13,10 +13,14 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoAlertPresentException
 import os
 try:
     
     from .shared_log import log_status, LOG_QUEUE
+    from .webdriver_pool import get_webdriver_pool, driver_rss_mb
+    from .search_backends import SearchBackend, SearchBackendError, DuckDuckGoHtmlBackend, unwrap_result_url
+    from .serp_cache import get_serp_cache
     
 except (ImportError, ValueError):
     import sys
@@ -25,95 +29,198 @@ except (ImportError, ValueError):
         sys.path.insert(0, project_root)
     
     from modules.shared_log import log_status, LOG_QUEUE
+    from modules.webdriver_pool import get_webdriver_pool, driver_rss_mb
+    from modules.search_backends import SearchBackend, SearchBackendError, DuckDuckGoHtmlBackend, unwrap_result_url
+    from modules.serp_cache import get_serp_cache
 ## 1. ScrapingHandler Class (Maira's Task)
 
+# Result anchors on the JavaScript DuckDuckGo page
+RESULT_LINK_SELECTOR = 'a[href^="http"]:not([href*="duckduckgo.com"])'
+
+# Every result href in one round trip instead of one get_attribute call per element
+COLLECT_LINKS_JS = "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);"
+
+# Scrolls to the bottom and resolves with all result hrefs as soon as there are more than
+# arguments[1] of them, or after arguments[2] ms without that happening
+SCROLL_FOR_MORE_LINKS_JS = """
+const [selector, known, timeoutMs, done] = arguments;
+const hrefs = () => Array.from(document.querySelectorAll(selector), a => a.href);
+let finished = false;
+const finish = () => {
+    if (finished) return;
+    finished = true;
+    observer.disconnect();
+    clearTimeout(timer);
+    done(hrefs());
+};
+const observer = new MutationObserver(() => {
+    if (document.querySelectorAll(selector).length > known) finish();
+});
+const timer = setTimeout(finish, timeoutMs);
+observer.observe(document.body, {childList: true, subtree: true});
+window.scrollTo(0, document.body.scrollHeight);
+"""
+
+
 class ScrapingHandler:
     """
     Handles the web scraping process, making requests and returning
     the raw HTML content.
     """
     MAX_RESULTS=20
+    # Browser search: overall time limit, scrolls for more results, and the longest wait for new results per scroll
+    SEARCH_DEADLINE = 15.0
+    MAX_SCROLLS = 5
+    SCROLL_WAIT = 2.0
     BASE_URL: str = "https://duckduckgo.com/?q="  # Placeholder URL
     HEADERS: Dict[str, str] = {
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
     }
 
-    def __init__(self, base_url: str = BASE_URL, headers: Dict[str, str] = HEADERS):
-        """Initializes the ScrapingHandler."""
+    # Backends scrape_keyword tries in order until one returns results
+    SEARCH_BACKENDS = ('duckduckgo_html', 'selenium')
+    # Serve repeated searches from the persistent SerpCache (see serp_cache.py)
+    SERP_CACHE_ENABLED = True
+
+    def __init__(self, base_url: str = BASE_URL, headers: Dict[str, str] = HEADERS, driver_pool=None, backends: list = None, serp_cache=None):
+        """
+        Initializes the ScrapingHandler.
+        `driver_pool` is the WebDriverPool searches lease browsers from; the process-wide one is used if omitted.
+        `backends` are the SearchBackends tried in order; built from SEARCH_BACKENDS if omitted.
+        `serp_cache` is the SerpCache of search results; the process-wide one is used if omitted
+        and SERP_CACHE_ENABLED is set.
+        """
         self.BASE_URL = base_url
         self.HEADERS = headers
+        self._driver_pool = driver_pool
+        if backends is None:
+            backends = [self._build_backend(name) for name in self.SEARCH_BACKENDS]
+        self.backends = backends
+        if serp_cache is None and self.SERP_CACHE_ENABLED:
+            serp_cache = get_serp_cache()
+        self.serp_cache = serp_cache
+
+    @property
+    def driver_pool(self):
+        # Created on first Selenium search only, so HTTP-only searches never touch the browser pool
+        if self._driver_pool is None:
+            self._driver_pool = get_webdriver_pool()
+        return self._driver_pool
+
+    def _build_backend(self, name: str) -> SearchBackend:
+        if name == DuckDuckGoHtmlBackend.name:
+            return DuckDuckGoHtmlBackend(headers=self.HEADERS)
+        if name == SeleniumSearchBackend.name:
+            return SeleniumSearchBackend(self)
+        raise ValueError(f"Unknown search backend: {name}")
 
     def make_request(self, url: str,max_results: int) -> list[str]:
         """
         Performs an HTTP GET request to the given URL and returns the HTML content.
+        The browser is leased from `driver_pool` for this search only.
         """
         try:
-            options=Options()
-            driver = webdriver.Firefox(options=options)
-
-            driver.get(url)
-            time.sleep(1)
-            try:
-                alert = driver.switch_to.alert
-                alert.accept()
-                log_status("Alert accepted")
-            except:
-                pass
-            WebDriverWait(driver, 8).until(
-            EC.presence_of_element_located(
-                (By.CSS_SELECTOR, 'a[href^="http"]:not([href*="duckduckgo.com"])')
-            )
-             )
-
-            time.sleep(1)
-            max_scrolls = 5
-            last_height = driver.execute_script("return document.body.scrollHeight")
-            for _ in range(max_scrolls):
-                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1.2)
-                new_height = driver.execute_script("return document.body.scrollHeight")
-                if new_height == last_height:
-                    break
-                last_height = new_height
-             # Wait for JavaScript to load content
-            links = driver.find_elements(By.CSS_SELECTOR, 'a[href^="http"]:not([href*="duckduckgo.com"])')
-            link_to_process=links[:max_results]
-            results = []
-            for link in link_to_process:
-                href = link.get_attribute("href")
-
-                if "uddg=" in href:  # if DuckDuckGo redirect
-                    parsed = urlparse(href)
-                    qs = parse_qs(parsed.query)
-                    if "uddg" in qs:
-                        href = unquote(qs["uddg"][0])
-
-                if href.startswith("http") and "duckduckgo.com" not in href and href not in results:
-                    results.append(href)
-                log_status(f"✅ Found {len(results)} real URLs")
-            return results
-        
+            with self.driver_pool.lease() as driver:
+                started = time.perf_counter()
+                results = self._collect_result_links(driver, url, max_results)
+                rss = driver_rss_mb(driver)
+                log_status(f"🦊 Search page scraped in {time.perf_counter() - started:.1f}s"
+                           + (f" (browser RSS {rss:.0f} MB)" if rss else ""))
+                return results
         except requests.exceptions.RequestException as e:
             log_status(f"❌ Request Error for {url}: {e}")
             return None
-        finally:
-            driver.quit()
 
-    def scrape_keyword(self, keyword: str ) -> list[str]:
+    def _result_urls(self, hrefs: list) -> list[str]:
+        """Unique result URLs among raw anchor hrefs, in page order."""
+        results = []
+        for href in hrefs or []:
+            href = unwrap_result_url(href)
+            if href and href not in results:
+                results.append(href)
+        return results
+
+    def _collect_result_links(self, driver, url: str, max_results: int) -> list[str]:
         """
-        Constructs the search URL for a given keyword and fetches the HTML content.
+        Loads the result page of `url` in `driver` and returns up to `max_results` result URLs.
+        Scrolls for more results only while fewer than `max_results` are present; each scroll waits
+        for new result links (or SCROLL_WAIT seconds without DOM changes), and the whole search
+        stops at SEARCH_DEADLINE.
         """
+        requested = time.perf_counter()
+        deadline = requested + self.SEARCH_DEADLINE
+        driver.get(url)
         try:
-                search_query = requests.utils.quote(keyword)
-                full_url = f"{self.BASE_URL}{search_query}"
-                
-                log_status(f"🔍 Starting scrape for keyword: '{keyword}'")
-                
-                return self.make_request(full_url,self.MAX_RESULTS)
-        except Exception as e:
-                log_status(f"❌ Error during scraping for keyword '{keyword}': {e}")
-                return None
-    
+            driver.switch_to.alert.accept()
+            log_status("Alert accepted")
+        except NoAlertPresentException:
+            pass
+        WebDriverWait(driver, max(0.1, min(8, deadline - time.perf_counter())), poll_frequency=0.2).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, RESULT_LINK_SELECTOR))
+        )
+        log_status(f"🦊 Result page loaded in {time.perf_counter() - requested:.1f}s")
+
+        hrefs = driver.execute_script(COLLECT_LINKS_JS, RESULT_LINK_SELECTOR)
+        results = self._result_urls(hrefs)
+        for _ in range(self.MAX_SCROLLS):
+            remaining = deadline - time.perf_counter()
+            if len(results) >= max_results or remaining <= 0:
+                break
+            wait_ms = int(min(self.SCROLL_WAIT, remaining) * 1000)
+            more_hrefs = driver.execute_async_script(SCROLL_FOR_MORE_LINKS_JS, RESULT_LINK_SELECTOR, len(hrefs), wait_ms)
+            if len(more_hrefs or []) <= len(hrefs):
+                break  # Nothing new appeared: the page has no more results
+            hrefs = more_hrefs
+            results = self._result_urls(hrefs)
+        log_status(f"✅ Found {len(results[:max_results])} real URLs")
+        return results[:max_results]
+
+    def scrape_keyword(self, keyword: str ) -> list[str]:
+        """
+        Searches `keyword` with each backend in turn and returns the first non-empty result list.
+        Returns an empty list if every backend that answered found nothing, None if all of them failed.
+        Results cached by `serp_cache` are returned without searching.
+        """
+        log_status(f"🔍 Starting scrape for keyword: '{keyword}'")
+        if self.serp_cache is not None:
+            cached = self.serp_cache.get(keyword, [backend.name for backend in self.backends], self.MAX_RESULTS,
+                                         refresh=self._search)
+            if cached is not None:
+                return cached
+        results, backend_name = self._search(keyword)
+        if results and self.serp_cache is not None:
+            self.serp_cache.put(keyword, backend_name, self.MAX_RESULTS, results)
+        return results
+
+    def _search(self, keyword: str) -> tuple:
+        """Runs the backends in order; returns (results, name of the backend that produced them)."""
+        results, backend_name = None, None
+        for backend in self.backends:
+            try:
+                results, backend_name = backend.search(keyword, self.MAX_RESULTS), backend.name
+            except Exception as e:
+                log_status(f"❌ Error during scraping for keyword '{keyword}' with {backend.name}: {e}")
+                continue
+            if results:
+                break
+            log_status(f"⚠️ {backend.name} found no results for '{keyword}'.")
+        return results, backend_name
+
+
+class SeleniumSearchBackend(SearchBackend):
+    """Searches the JavaScript DuckDuckGo page in a pooled browser via `ScrapingHandler.make_request`."""
+    name = 'selenium'
+
+    def __init__(self, handler: ScrapingHandler):
+        self.handler = handler
+
+    def search(self, keyword: str, max_results: int) -> list[str]:
+        search_query = requests.utils.quote(keyword)
+        results = self.handler.make_request(f"{self.handler.BASE_URL}{search_query}", max_results)
+        if results is None:
+            raise SearchBackendError("browser search failed")
+        return results
+
 
 
 # # Example usage:
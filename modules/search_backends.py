@@ -0,0 +1,141 @@
+"""Pluggable search backends for seed discovery.
+
+`ScrapingHandler.scrape_keyword` used to start a browser for every keyword, although
+DuckDuckGo serves a JavaScript-free results page that plain HTTP can fetch and lxml can
+parse in a fraction of the time and memory. A `SearchBackend` turns a keyword into result
+URLs; `DuckDuckGoHtmlBackend` does so over HTTP, unwrapping `uddg=` redirect links and
+following the "Next" form until `max_results` URLs are collected. The Selenium search stays
+available as a fallback backend in scrapinghandler.py.
+"""
+
+import time
+from urllib.parse import parse_qs, unquote, urljoin, urlparse
+import lxml.html
+try:
+    from .shared_log import log_status
+    from .http_client import get_session_pool
+except (ImportError, ValueError):
+    import os
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+    from modules.http_client import get_session_pool
+
+
+class SearchBackendError(Exception):
+    """The search engine could not be queried (as opposed to returning no results)."""
+
+
+def unwrap_result_url(href: str, page_url: str = None) -> str:
+    """
+    Resolves a result link to the URL it points at: relative and protocol-relative links are
+    joined with `page_url` and DuckDuckGo `uddg=` redirects are unwrapped. Returns None for
+    links that are not results (DuckDuckGo's own pages, ads, non-http schemes).
+    """
+    if not href:
+        return None
+    if page_url:
+        href = urljoin(page_url, href)
+    if "uddg=" in href:  # if DuckDuckGo redirect
+        qs = parse_qs(urlparse(href).query)
+        if "uddg" in qs:
+            href = unquote(qs["uddg"][0])
+    if not href.startswith("http") or "duckduckgo.com" in href:
+        return None
+    return href
+
+
+class SearchBackend:
+    """
+    Turns a keyword into up to `max_results` result URLs. `search` raises (SearchBackendError
+    or any other exception) when the engine could not be queried, and returns an empty list
+    when it was queried but found nothing.
+    """
+    name = 'base'
+
+    def search(self, keyword: str, max_results: int) -> list[str]:
+        raise NotImplementedError
+
+
+class DuckDuckGoHtmlBackend(SearchBackend):
+    """
+    Searches the JavaScript-free DuckDuckGo results page over the shared keep-alive
+    SessionPool. `base_url` can point at a local stand-in server for testing.
+    """
+    name = 'duckduckgo_html'
+    BASE_URL = "https://html.duckduckgo.com/html/"
+    MAX_PAGES = 5
+    PAGE_DELAY = 1.0  # seconds between result pages, to stay clear of rate limiting
+    TIMEOUT = 10
+
+    def __init__(self, base_url: str = BASE_URL, headers: dict = None, session_pool=None,
+                 max_pages: int = MAX_PAGES, page_delay: float = PAGE_DELAY, timeout: float = TIMEOUT):
+        """
+        Args:
+            base_url (str): Results endpoint; queried with GET ?q=<keyword>.
+            headers (dict): Request headers (User-Agent).
+            session_pool: The pooled HTTP fetch layer (SessionPool); the process-wide one if omitted.
+            max_pages (int): Result pages fetched per search at most.
+            page_delay (float): Pause before fetching the next page.
+            timeout (float): Per-request timeout in seconds.
+        """
+        self.base_url = base_url
+        self.headers = headers or {}
+        self.session_pool = session_pool or get_session_pool()
+        self.max_pages = max(1, int(max_pages))
+        self.page_delay = page_delay
+        self.timeout = timeout
+
+    def _fetch(self, url: str, method: str = 'get', data: dict = None):
+        session = self.session_pool.session_for(url)
+        if method == 'post':
+            response = session.post(url, data=data, headers=self.headers, timeout=self.timeout)
+        else:
+            response = session.get(url, params=data, headers=self.headers, timeout=self.timeout)
+        if response.status_code != 200:
+            # DuckDuckGo answers a suspected bot with a non-200 challenge page
+            raise SearchBackendError(f"{urlparse(url).netloc} returned HTTP {response.status_code}")
+        return response
+
+    @staticmethod
+    def parse_results(html: str, page_url: str) -> tuple[list[str], tuple]:
+        """
+        Returns the result URLs of one page and its "Next" request as (url, method, form data),
+        or None when it is the last page.
+        """
+        document = lxml.html.fromstring(html)
+        hrefs = document.xpath('//a[contains(concat(" ", normalize-space(@class), " "), " result__a ")]/@href')
+        if not hrefs:
+            # Unknown layout: fall back to every link on the page
+            hrefs = document.xpath('//a/@href')
+        urls = [url for url in (unwrap_result_url(href, page_url) for href in hrefs) if url]
+
+        next_request = None
+        for form in document.xpath('//form[.//input[@type="submit" and @value="Next"]]'):
+            data = {field.get('name'): field.get('value', '')
+                    for field in form.xpath('.//input[@name]') if field.get('type') != 'submit'}
+            method = (form.get('method') or 'get').lower()
+            next_request = (urljoin(page_url, form.get('action') or page_url), method, data)
+            break
+        return urls, next_request
+
+    def search(self, keyword: str, max_results: int) -> list[str]:
+        results = []
+        request = (self.base_url, 'get', {'q': keyword})
+        for page in range(self.max_pages):
+            if page and self.page_delay:
+                time.sleep(self.page_delay)
+            url, method, data = request
+            response = self._fetch(url, method, data)
+            urls, request = self.parse_results(response.text, response.url)
+            new = 0
+            for url in urls:
+                if url not in results:
+                    results.append(url)
+                    new += 1
+            if len(results) >= max_results or request is None or new == 0:
+                break
+        log_status(f"✅ Found {len(results[:max_results])} real URLs via {self.name} ({page + 1} page(s))")
+        return results[:max_results]
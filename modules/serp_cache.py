@@ -0,0 +1,222 @@
+"""Persistent cache of search result URLs.
+
+Seed URLs for a query change slowly, yet every run of a keyword repeated its search, and
+a browser search costs 10-20 seconds. `SerpCache` keeps the result URLs of each search
+in a small SQLite file next to `leads_database.db`, keyed by normalized keyword, search
+backend and result count. Entries younger than `ttl_seconds` are served as they are;
+for `stale_seconds` after that they are still served, but refreshed in the background
+(stale-while-revalidate); older ones are searched again.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+from sqlalchemy import create_engine, Column, String, Integer, Float, Text
+from sqlalchemy.orm import sessionmaker, declarative_base
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+Base = declarative_base()
+
+
+def normalize_keyword(keyword: str) -> str:
+    """Case-, width- and whitespace-insensitive form of a keyword ("  Fragrance   Brand" -> "fragrance brand")."""
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', keyword or '')).strip().casefold()
+
+
+class SerpCacheEntryORM(Base):
+    """Result URLs of one search."""
+    __tablename__ = 'serp_cache'
+
+    keyword = Column(String(512), primary_key=True)  # normalized
+    backend = Column(String(64), primary_key=True)
+    max_results = Column(Integer, primary_key=True)
+    urls = Column(Text, nullable=False)  # JSON list
+    fetched_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<SerpCacheEntryORM(keyword='{self.keyword}', backend='{self.backend}')>"
+
+
+class SerpCache:
+    """
+    SQLite-backed search result cache with a TTL and stale-while-revalidate.
+    Thread-safe; a keyword is refreshed by at most one background thread at a time.
+    """
+    DB_FILE_NAME = 'serp_cache.db'
+    TTL_SECONDS = 3 * 24 * 3600
+    STALE_SECONDS = 4 * 24 * 3600
+
+    def __init__(self, db_file: str = None, ttl_seconds: float = TTL_SECONDS, stale_seconds: float = STALE_SECONDS,
+                 clock=time.time):
+        """
+        Args:
+            db_file (str): SQLite file; 'serp_cache.db' in the 'modules' directory by default.
+            ttl_seconds (float): Age up to which an entry is served without a new search.
+            stale_seconds (float): Further age during which an entry is served while a background search refreshes it.
+            clock (callable): Time source, injectable for testing.
+        """
+        if db_file is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            db_file = os.path.join(current_dir, self.DB_FILE_NAME)
+        self.db_file = db_file
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._clock = clock
+        self.engine = create_engine(f'sqlite:///{db_file}')
+        Base.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine)
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._refreshing = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.stores = 0
+
+    def _entries(self, keyword: str, max_results: int) -> dict:
+        session = self.Session()
+        try:
+            rows = session.query(SerpCacheEntryORM).filter_by(keyword=normalize_keyword(keyword),
+                                                              max_results=max_results).all()
+            return {row.backend: (json.loads(row.urls), row.fetched_at) for row in rows}
+        finally:
+            session.close()
+
+    def get(self, keyword: str, backends: list[str], max_results: int, refresh=None) -> list[str]:
+        """
+        Returns the cached URLs of the first of `backends` with a usable entry, or None (a miss).
+        A stale entry is returned as well; `refresh(keyword) -> (urls, backend)` is then run in
+        the background and its result stored.
+        """
+        try:
+            entries = self._entries(keyword, max_results)
+        except Exception as e:
+            log_status(f"⚠️ Search cache lookup failed: {str(e)[:100]}")
+            entries = {}
+        now = self._clock()
+        stale = None
+        for backend in backends:
+            if backend not in entries:
+                continue
+            urls, fetched_at = entries[backend]
+            age = now - fetched_at
+            if age <= self.ttl_seconds:
+                with self._stats_lock:
+                    self.hits += 1
+                log_status(f"📦 Using cached search results for '{keyword}' ({backend}, {age / 3600:.1f}h old)")
+                return urls
+            if stale is None and age <= self.ttl_seconds + self.stale_seconds:
+                stale = (backend, urls, age)
+        if stale is None:
+            with self._stats_lock:
+                self.misses += 1
+            return None
+        backend, urls, age = stale
+        with self._stats_lock:
+            self.stale_hits += 1
+        log_status(f"📦 Using stale search results for '{keyword}' ({backend}, {age / 3600:.1f}h old)")
+        if refresh is not None:
+            self._refresh_in_background(keyword, max_results, refresh)
+        return urls
+
+    def put(self, keyword: str, backend: str, max_results: int, urls: list[str]):
+        """Stores the URLs of a search; empty results are not cached."""
+        if not urls:
+            return
+        with self._write_lock:
+            session = self.Session()
+            try:
+                session.merge(SerpCacheEntryORM(
+                    keyword=normalize_keyword(keyword),
+                    backend=backend,
+                    max_results=max_results,
+                    urls=json.dumps(list(urls)),
+                    fetched_at=self._clock(),
+                ))
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                log_status(f"⚠️ Could not cache search results for '{keyword}': {str(e)[:100]}")
+                return
+            finally:
+                session.close()
+        with self._stats_lock:
+            self.stores += 1
+
+    def _refresh_in_background(self, keyword: str, max_results: int, refresh):
+        key = (normalize_keyword(keyword), max_results)
+        with self._stats_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                urls, backend = refresh(keyword)
+                if urls:
+                    self.put(keyword, backend, max_results, urls)
+                    with self._stats_lock:
+                        self.refreshes += 1
+                    log_status(f"🔄 Refreshed cached search results for '{keyword}' ({len(urls)} URLs)")
+                else:
+                    with self._stats_lock:
+                        self.refresh_failures += 1
+            except Exception as e:
+                with self._stats_lock:
+                    self.refresh_failures += 1
+                log_status(f"⚠️ Background search refresh failed for '{keyword}': {str(e)[:100]}")
+            finally:
+                with self._stats_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name=f'serp-refresh-{keyword}', daemon=True).start()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+                'refreshes': self.refreshes,
+                'refresh_failures': self.refresh_failures,
+                'stores': self.stores,
+            }
+
+    def clear(self):
+        """Deletes every cached search."""
+        with self._write_lock:
+            session = self.Session()
+            try:
+                session.query(SerpCacheEntryORM).delete()
+                session.commit()
+            except Exception:
+                session.rollback()
+            finally:
+                session.close()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_serp_cache() -> SerpCache:
+    """Returns the process-wide SerpCache, creating it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = SerpCache()
+        return _shared_cache
@@ -0,0 +1,167 @@
+"""Sitemap- and robots.txt-driven discovery of contact/about pages.
+
+When link-following on a site runs dry (no lead yet and nothing queued as promising as a
+sitemap entry, see `LeadExtractor.needs_sitemap`), `SitemapDiscovery` reads the site's
+`robots.txt` for `Sitemap:` lines (falling back to `/sitemap.xml`) and streams those sitemaps,
+including sitemap indexes and gzipped sitemaps, under a byte cap. Page entries are returned so
+the caller can score them with its heuristic and push the best ones onto the A* heap.
+
+Discovery used to run before every homepage so the contact page could be the first fetch, but
+that cost robots.txt plus up to three sitemap documents per seed even on the many sites whose
+homepage links to their contact page; as a fallback it is only paid for where it can help.
+"""
+
+import os
+import zlib
+from urllib.parse import urlparse, urljoin
+import requests
+from lxml import etree
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+
+class DiscoveryBudgetExhausted(Exception):
+    """A document fetch was refused by the `spend` callback of SitemapDiscovery."""
+
+
+class SitemapDiscovery:
+    """
+    Streams robots.txt-advertised sitemaps of one site and yields their page URLs.
+    Memory stays flat: sitemaps are parsed incrementally and every parsed element is freed.
+    """
+    MAX_SITEMAP_BYTES = 5 * 1024 * 1024  # decompressed bytes read per sitemap document
+    MAX_SITEMAP_DOCUMENTS = 3  # sitemap documents fetched per site (indexes included)
+    MAX_ENTRIES = 20000  # page entries collected per site
+    CHUNK_SIZE = 16 * 1024
+
+    def __init__(self, session_pool, politeness=None, user_agent: str = None, timeout: float = 10, spend=None):
+        """
+        Args:
+            session_pool: The pooled HTTP fetch layer (SessionPool).
+            politeness: Optional PolitenessScheduler; each document fetch waits for its host slot.
+            user_agent (str): User-Agent header for robots.txt and sitemap requests.
+            timeout (float): Per-request timeout in seconds.
+            spend (callable): Asked before every document fetch (e.g. to charge a crawl budget);
+                discovery stops with what it has found once it returns False.
+        """
+        self.session_pool = session_pool
+        self.politeness = politeness
+        self.headers = {'User-Agent': user_agent} if user_agent else {}
+        self.timeout = timeout
+        self.spend = spend
+        self.documents_fetched = 0
+
+    def _get(self, url: str, stream: bool = False):
+        if self.spend is not None and not self.spend():
+            raise DiscoveryBudgetExhausted(url)
+        if self.politeness is not None:
+            self.politeness.wait_for_slot(url)
+        self.documents_fetched += 1
+        return self.session_pool.get(url, headers=self.headers, timeout=self.timeout, stream=stream)
+
+    def sitemaps_from_robots(self, base_url: str) -> list[str]:
+        """Returns the sitemap URLs listed in robots.txt, or the conventional /sitemap.xml."""
+        sitemaps = []
+        try:
+            response = self._get(urljoin(base_url + '/', 'robots.txt'))
+            if response.status_code == 200:
+                for line in response.text.splitlines():
+                    key, _, value = line.partition(':')
+                    if key.strip().lower() == 'sitemap' and value.strip():
+                        sitemaps.append(urljoin(base_url + '/', value.strip()))
+        except requests.exceptions.RequestException as e:
+            log_status(f"⚠️ Could not read robots.txt for {base_url}: {e}")
+        return sitemaps or [urljoin(base_url + '/', 'sitemap.xml')]
+
+    def _iter_chunks(self, response):
+        """Yields decompressed body chunks up to MAX_SITEMAP_BYTES, un-gzipping *.gz sitemaps on the fly."""
+        inflater = None
+        total = 0
+        for chunk in response.iter_content(self.CHUNK_SIZE):
+            if not chunk:
+                continue
+            if inflater is None:
+                # Gzipped sitemap files (not transfer-encoded) start with the gzip magic bytes
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if chunk[:2] == b'\x1f\x8b' else False
+            if inflater:
+                chunk = inflater.decompress(chunk, self.MAX_SITEMAP_BYTES - total)
+            total += len(chunk)
+            yield chunk
+            if total >= self.MAX_SITEMAP_BYTES:
+                log_status(f"✂️ Sitemap {response.url} exceeds {self.MAX_SITEMAP_BYTES} bytes; truncated.")
+                return
+
+    def parse_sitemap(self, url: str):
+        """
+        Streams one sitemap document and yields ('sitemap', loc) for sitemap-index entries
+        and ('page', loc) for page entries.
+        """
+        response = self._get(url, stream=True)
+        try:
+            if response.status_code != 200:
+                return
+            parser = etree.XMLPullParser(events=('end',), recover=True, resolve_entities=False, no_network=True)
+            for chunk in self._iter_chunks(response):
+                parser.feed(chunk)
+                for _, element in parser.read_events():
+                    if etree.QName(element).localname != 'loc':
+                        continue
+                    parent = element.getparent()
+                    kind = 'sitemap' if parent is not None and etree.QName(parent).localname == 'sitemap' else 'page'
+                    loc = (element.text or '').strip()
+                    if loc:
+                        yield kind, loc
+                    # Free what has been parsed so far
+                    if parent is not None:
+                        parent.clear()
+        finally:
+            response.close()
+
+    def discover(self, base_url: str, link_filter=None) -> list[str]:
+        """
+        Returns the page URLs listed in the sitemaps of `base_url` (deduplicated, in document
+        order, without query/fragment). `link_filter(parsed_url, base_netloc) -> bool` keeps only
+        internal links.
+        """
+        pages = []
+        try:
+            self._discover(base_url, link_filter, pages)
+        except DiscoveryBudgetExhausted:
+            log_status(f"💰 No budget left for sitemap discovery of {base_url}; using {len(pages)} pages found so far.")
+        return pages
+
+    def _discover(self, base_url: str, link_filter, pages: list):
+        base_netloc = urlparse(base_url).netloc
+        pending = self.sitemaps_from_robots(base_url)
+        seen_documents = set()
+        seen_pages = set()
+        while pending and len(seen_documents) < self.MAX_SITEMAP_DOCUMENTS and len(pages) < self.MAX_ENTRIES:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in seen_documents:
+                continue
+            seen_documents.add(sitemap_url)
+            try:
+                for kind, loc in self.parse_sitemap(sitemap_url):
+                    if kind == 'sitemap':
+                        pending.append(loc)
+                        continue
+                    parsed = urlparse(loc)
+                    if link_filter is not None and not link_filter(parsed, base_netloc):
+                        continue
+                    page = requests.utils.urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', '', ''))
+                    if page not in seen_pages:
+                        seen_pages.add(page)
+                        pages.append(page)
+                        if len(pages) >= self.MAX_ENTRIES:
+                            break
+            except requests.exceptions.RequestException as e:
+                log_status(f"⚠️ Could not fetch sitemap {sitemap_url}: {e}")
+            except etree.LxmlError as e:
+                log_status(f"⚠️ Could not parse sitemap {sitemap_url}: {e}")
+
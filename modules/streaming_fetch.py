@@ -0,0 +1,175 @@
+"""Streamed page downloads with early termination and size/content-type guards.
+
+`read_html_stream` reads a `requests` response opened with `stream=True` chunk by chunk:
+
+- non-HTML responses (by Content-Type, or by sniffing binary magic bytes when the header
+  is missing) are abandoned before their body is downloaded;
+- reading stops at a byte cap and at a wall-clock deadline (slow-drip servers);
+- the decoded text is fed to an incremental lxml HTML parser, and the download stops as
+  soon as the page has a title and a non-suspicious email address.
+"""
+
+import codecs
+import collections
+import os
+import re
+import time
+import requests
+import urllib3
+from lxml import etree
+try:
+    from .email_utils import Email_Utils
+except (ImportError, ValueError):
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.email_utils import Email_Utils
+
+# text is None when the body was not read (non-200 status or not HTML); complete is False when
+# reading stopped before the end of the body; reason says why it stopped.
+StreamedBody = collections.namedtuple('StreamedBody', ['text', 'complete', 'reason'])
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+BINARY_SIGNATURES = (b'%PDF', b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'PK\x03\x04', b'\x1f\x8b', b'RIFF', b'\x00\x00\x00')
+META_CHARSET_REGEX = re.compile(rb'<meta[^>]+charset=["\']?([A-Za-z0-9_-]+)', re.IGNORECASE)
+
+
+class HtmlStreamProbe:
+    """
+    Watches a page while it streams in. The decoded text is fed to lxml's incremental
+    HTMLPullParser, which reports the <title> as soon as it closes; email candidates are
+    matched on the raw text with a small overlap between chunks.
+    """
+    # Matches ending this close to the end of the data seen so far may still be cut off
+    EMAIL_TAIL = 256
+    LOCAL_PART_MAX = 64
+
+    def __init__(self, email_utils: Email_Utils = None):
+        self.email_utils = email_utils or Email_Utils()
+        self.parser = etree.HTMLPullParser(events=('end',), tag='title')
+        self.title = None
+        self.email = None
+        self._tail = ''
+
+    @property
+    def satisfied(self) -> bool:
+        return self.title is not None and self.email is not None
+
+    def feed(self, text: str, final: bool = False):
+        if self.title is None and text:
+            self.parser.feed(text)
+            for _, element in self.parser.read_events():
+                # An empty <title> does not complete a lead (see LeadExtractor.lead_is_complete)
+                if self.title is None and (element.text or '').strip():
+                    self.title = element.text.strip()
+        if self.email is None:
+            window = self._tail + text
+            safe_end = len(window) if final else len(window) - self.EMAIL_TAIL
+            # Only look around '@' signs: a full regex scan is quadratic on long unbroken runs of text
+            at = window.find('@')
+            while at != -1:
+                match = self.email_utils.EMAIL_REGEX.search(window, max(0, at - self.LOCAL_PART_MAX), at + self.EMAIL_TAIL)
+                if match is not None:
+                    if match.end() > safe_end:
+                        break
+                    candidate = self.email_utils._clean_email(match.group())
+                    if candidate and not self.email_utils.is_suspicious_email(candidate):
+                        self.email = candidate
+                        break
+                at = window.find('@', max(at, match.end() - 1 if match is not None else at) + 1)
+            self._tail = window[-(self.EMAIL_TAIL * 2):]
+
+
+def is_html_content_type(content_type: str) -> bool:
+    """True for HTML-ish Content-Type headers (or when the header is missing)."""
+    if not content_type:
+        return True
+    return content_type.split(';', 1)[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def _encoding_for(response, first_chunk: bytes) -> str:
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset=' in content_type.lower():
+        return response.encoding or 'utf-8'
+    match = META_CHARSET_REGEX.search(first_chunk[:4096])
+    if match:
+        candidate = match.group(1).decode('ascii', 'ignore')
+        try:
+            codecs.lookup(candidate)
+            return candidate
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def _iter_body(response, chunk_size: int):
+    """
+    Yields body chunks as soon as they arrive. `iter_content` blocks until a full chunk is
+    buffered, which would hide a slow-drip server from the deadline check, so urllib3's
+    `read1` is used when available.
+    """
+    read1 = getattr(response.raw, 'read1', None)
+    if read1 is None:
+        yield from response.iter_content(chunk_size)
+        return
+    try:
+        while True:
+            chunk = read1(chunk_size, decode_content=True)
+            if not chunk:
+                return
+            yield chunk
+    except urllib3.exceptions.ReadTimeoutError as e:
+        raise requests.exceptions.ConnectionError(e)
+    except (urllib3.exceptions.ProtocolError, urllib3.exceptions.DecodeError) as e:
+        raise requests.exceptions.ChunkedEncodingError(e)
+
+
+def read_html_stream(response, max_bytes: int, stop_when_complete: bool = True, max_seconds: float = None,
+                     chunk_size: int = 16 * 1024) -> StreamedBody:
+    """
+    Reads an HTML body from a response opened with `stream=True`.
+
+    Args:
+        response: The streamed requests.Response (closed before returning).
+        max_bytes (int): Stop reading after this many body bytes.
+        stop_when_complete (bool): Stop once a title and a non-suspicious email have been seen.
+        max_seconds (float): Stop reading after this many seconds (protects against slow-drip servers).
+        chunk_size (int): Read size in bytes.
+    """
+    try:
+        if response.status_code != 200:
+            return StreamedBody(None, True, 'status')
+        if not is_html_content_type(response.headers.get('Content-Type')):
+            return StreamedBody(None, True, 'content_type')
+
+        deadline = time.monotonic() + max_seconds if max_seconds else None
+        probe = HtmlStreamProbe() if stop_when_complete else None
+        decoder = None
+        parts = []
+        total = 0
+        for chunk in _iter_body(response, chunk_size):
+            if not chunk:
+                continue
+            if decoder is None:
+                if chunk.startswith(BINARY_SIGNATURES):
+                    return StreamedBody(None, True, 'content_type')
+                decoder = codecs.getincrementaldecoder(_encoding_for(response, chunk))(errors='replace')
+            if total + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - total]
+            total += len(chunk)
+            text = decoder.decode(chunk)
+            parts.append(text)
+            if probe is not None:
+                probe.feed(text)
+                if probe.satisfied:
+                    return StreamedBody(''.join(parts), False, 'early_stop')
+            if total >= max_bytes:
+                return StreamedBody(''.join(parts), False, 'size_cap')
+            if deadline is not None and time.monotonic() > deadline:
+                return StreamedBody(''.join(parts), False, 'deadline')
+        if decoder is not None:
+            parts.append(decoder.decode(b'', final=True))
+        return StreamedBody(''.join(parts), True, 'complete')
+    finally:
+        response.close()
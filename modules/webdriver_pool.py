@@ -0,0 +1,366 @@
+"""Pool of long-lived Selenium WebDrivers for the keyword searches.
+
+`ScrapingHandler.make_request` used to start a new Firefox for every keyword and quit it
+afterwards, paying seconds of browser startup and hundreds of MB per search.
+`WebDriverPool` keeps a few browsers alive and leases one per search. A leased driver
+is health-checked first, recycled after `max_uses` searches, when it crashed, or when
+its browser grew beyond its share of the memory cap, and new browsers are only started
+while the pool stays within that cap.
+"""
+
+import atexit
+import contextlib
+import threading
+import time
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
+from selenium.webdriver.firefox.options import Options
+try:
+    from .shared_log import log_status
+except (ImportError, ValueError):
+    import os
+    import sys
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if project_root not in sys.path:
+        sys.path.insert(0, project_root)
+    from modules.shared_log import log_status
+
+try:
+    import psutil  # Optional: needed to enforce the memory cap
+except ImportError:
+    psutil = None
+
+
+# Preferences of the lean profile: SERP scraping only reads anchor hrefs, so nothing the
+# page would render or play is loaded, and background features are switched off
+LEAN_FIREFOX_PREFS = {
+    # Images, fonts and media
+    'permissions.default.image': 2,
+    'browser.display.use_document_fonts': 0,
+    'gfx.downloadable_fonts.enabled': False,
+    'media.autoplay.default': 5,
+    'media.mediasource.enabled': False,
+    'media.peerconnection.enabled': False,
+    'media.navigator.enabled': False,
+    # Trackers and speculative traffic
+    'privacy.trackingprotection.enabled': True,
+    'network.prefetch-next': False,
+    'network.dns.disablePrefetch': True,
+    'network.http.speculative-parallel-limit': 0,
+    'browser.urlbar.speculativeConnect.enabled': False,
+    # Background features
+    'geo.enabled': False,
+    'dom.webnotifications.enabled': False,
+    'dom.push.enabled': False,
+    'browser.shell.checkDefaultBrowser': False,
+    'browser.newtabpage.enabled': False,
+    'extensions.pocket.enabled': False,
+    'app.update.auto': False,
+    'datareporting.healthreport.uploadEnabled': False,
+    'datareporting.policy.dataSubmissionEnabled': False,
+    'toolkit.telemetry.enabled': False,
+    # Memory: one content process, no disk cache, no back/forward page cache
+    'fission.autostart': False,
+    'dom.ipc.processCount': 1,
+    'browser.cache.disk.enable': False,
+    'browser.sessionhistory.max_total_viewers': 0,
+}
+
+
+def build_firefox_options(lean: bool = True) -> Options:
+    """
+    Firefox options for searches. The lean profile runs headless with LEAN_FIREFOX_PREFS and the
+    "eager" page-load strategy (get() returns at DOMContentLoaded; make_request waits for the
+    result links itself). lean=False gives the default options make_request used to start with.
+    """
+    options = Options()
+    if lean:
+        options.add_argument('-headless')
+        options.add_argument('--width=1280')
+        options.add_argument('--height=900')
+        options.page_load_strategy = 'eager'
+        for name, value in LEAN_FIREFOX_PREFS.items():
+            options.set_preference(name, value)
+    return options
+
+
+def default_driver_factory(lean: bool = True):
+    """Starts a Firefox WebDriver, with the lean profile unless `lean` is False."""
+    return webdriver.Firefox(options=build_firefox_options(lean))
+
+
+def driver_rss_mb(driver) -> float:
+    """Resident memory of a driver's service process and the browser it started, in MB (0 without psutil)."""
+    if psutil is None:
+        return 0.0
+    try:
+        service = psutil.Process(driver.service.process.pid)
+        processes = [service] + service.children(recursive=True)
+        return sum(process.memory_info().rss for process in processes) / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class _PooledDriver:
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.started_at = time.monotonic()
+
+
+class WebDriverPool:
+    """
+    Thread-safe pool of at most `size` WebDrivers. `lease()` hands one out for a single search;
+    up to `size` searches run at the same time.
+    """
+    SIZE = 2
+    MAX_USES = 25
+    # Total resident memory of all pooled browsers (browser and driver processes), in MB;
+    # None disables the cap. Enforced only when psutil is installed.
+    MEMORY_CAP_MB = 1500
+    # Start browsers with the headless, resource-blocking profile (see build_firefox_options)
+    LEAN_PROFILE = True
+
+    def __init__(self, size: int = SIZE, max_uses: int = MAX_USES, memory_cap_mb: float = MEMORY_CAP_MB,
+                 driver_factory=None, lean_profile: bool = LEAN_PROFILE):
+        """
+        Args:
+            size (int): Maximum number of browsers (and concurrent leases).
+            max_uses (int): Searches after which a browser is replaced.
+            memory_cap_mb (float): Memory cap of all browsers together (see MEMORY_CAP_MB).
+            driver_factory (callable): Starts a new WebDriver; Firefox by default.
+            lean_profile (bool): Profile of the default Firefox factory (see build_firefox_options).
+        """
+        self.size = max(1, int(size))
+        self.max_uses = max(1, int(max_uses))
+        self.memory_cap_mb = memory_cap_mb
+        self._driver_factory = driver_factory or (lambda: default_driver_factory(lean_profile))
+        self._condition = threading.Condition()
+        self._idle = []
+        self._leased = set()
+        self._starting = 0
+        self._closed = False
+        self.launches = 0
+        self.leases = 0
+        self.recycled = 0
+        self.crashes = 0
+        self.wait_seconds = 0.0
+        self.launch_seconds = 0.0
+        if self.memory_cap_mb and psutil is None:
+            log_status("⚠️ psutil is not installed: the WebDriver pool memory cap is not enforced.")
+
+    # --- memory ---
+
+    def _rss_mb(self, pooled: _PooledDriver) -> float:
+        return driver_rss_mb(pooled.driver)
+
+    def _total_rss_mb(self) -> float:
+        with self._condition:
+            pooled = list(self._idle) + list(self._leased)
+        return sum(self._rss_mb(entry) for entry in pooled)
+
+    def _share_mb(self) -> float:
+        return self.memory_cap_mb / self.size if self.memory_cap_mb else None
+
+    def _has_memory_for_another(self) -> bool:
+        """True when starting one more browser is expected to stay within the memory cap."""
+        if not self.memory_cap_mb or psutil is None:
+            return True
+        with self._condition:
+            running = len(self._idle) + len(self._leased)
+        if running == 0:
+            return True
+        total = self._total_rss_mb()
+        return total + total / running <= self.memory_cap_mb
+
+    # --- lifecycle ---
+
+    def _quit(self, pooled: _PooledDriver):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, pooled: _PooledDriver) -> bool:
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _launch(self) -> _PooledDriver:
+        started = time.perf_counter()
+        pooled = _PooledDriver(self._driver_factory())
+        with self._condition:
+            self.launches += 1
+            self.launch_seconds += time.perf_counter() - started
+        return pooled
+
+    def acquire(self, timeout: float = None):
+        """
+        Leases a healthy driver, starting one when the pool has room (in size and memory).
+        Blocks until one is free; raises TimeoutError after `timeout` seconds.
+        """
+        waited_from = time.monotonic()
+        deadline = None if timeout is None else waited_from + timeout
+        while True:
+            launch = False
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("WebDriverPool is closed")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    running = len(self._leased) + self._starting
+                    if running < self.size and (running == 0 or self._has_memory_for_another()):
+                        self._starting += 1
+                        launch = True
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("No WebDriver became free in time")
+                    self._condition.wait(remaining)
+            if launch:
+                try:
+                    pooled = self._launch()
+                finally:
+                    with self._condition:
+                        self._starting -= 1
+            elif not self._is_healthy(pooled):
+                log_status("🩺 Pooled browser failed its health check; replacing it.")
+                with self._condition:
+                    self.crashes += 1
+                    self._condition.notify()
+                self._quit(pooled)
+                continue
+            with self._condition:
+                pooled.uses += 1
+                self._leased.add(pooled)
+                self.leases += 1
+                self.wait_seconds += time.monotonic() - waited_from
+            return pooled
+
+    def release(self, pooled: _PooledDriver, broken: bool = False):
+        """
+        Returns a leased driver. It is quit instead of kept when `broken`, after `max_uses`
+        searches, or when its browser uses more than its share of the memory cap.
+        """
+        reason = None
+        if broken:
+            reason = 'crashed'
+        elif pooled.uses >= self.max_uses:
+            reason = f'{pooled.uses} uses'
+        elif self._share_mb() and self._rss_mb(pooled) > self._share_mb():
+            reason = f'{self._rss_mb(pooled):.0f} MB'
+        if reason is None:
+            try:
+                # The next search should not see this one's session
+                pooled.driver.delete_all_cookies()
+            except Exception:
+                reason = 'crashed'
+        with self._condition:
+            self._leased.discard(pooled)
+            if reason is None and not self._closed:
+                self._idle.append(pooled)
+            elif reason == 'crashed':
+                self.crashes += 1
+            else:
+                self.recycled += 1
+            self._condition.notify()
+        if reason is not None or self._closed:
+            if reason is not None:
+                log_status(f"♻️ Recycling pooled browser ({reason}).")
+            self._quit(pooled)
+
+    @contextlib.contextmanager
+    def lease(self, timeout: float = None):
+        """
+        `with pool.lease() as driver:` - a crash of the driver during the block recycles it.
+        A wait that timed out or an element that was not found (e.g. a search without results)
+        is a page problem, and any other WebDriverException only counts as a crash when the
+        browser then fails its health check.
+        """
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except (TimeoutException, NoSuchElementException):
+            raise
+        except WebDriverException:
+            broken = not self._is_healthy(pooled)
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def close(self):
+        """Quits every idle browser; leased ones are quit when they are released."""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in idle:
+            self._quit(pooled)
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'leased': len(self._leased),
+                'launches': self.launches,
+                'leases': self.leases,
+                'recycled': self.recycled,
+                'crashes': self.crashes,
+                'avg_launch_seconds': round(self.launch_seconds / self.launches, 2) if self.launches else 0.0,
+                'wait_seconds': round(self.wait_seconds, 2),
+            }
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_webdriver_pool() -> WebDriverPool:
+    """Returns the process-wide WebDriverPool, creating it on first use (browsers start lazily)."""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = WebDriverPool()
+            atexit.register(_shared_pool.close)
+        return _shared_pool
+
+
+def benchmark(url: str = "https://duckduckgo.com/?q=fragrance+brand", searches: int = 3) -> dict:
+    """
+    Loads a result page `searches` times in one browser with the default profile and once more
+    with the lean profile, and reports browser launch time, page-load time per search (driver.get
+    until the first result link is present) and browser RSS after the searches (needs psutil).
+    """
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    result_link = (By.CSS_SELECTOR, 'a[href^="http"]:not([href*="duckduckgo.com"])')
+    report = {}
+    for label, lean in (('default', False), ('lean', True)):
+        started = time.perf_counter()
+        driver = default_driver_factory(lean)
+        launch_seconds = time.perf_counter() - started
+        try:
+            loads = []
+            for _ in range(searches):
+                started = time.perf_counter()
+                driver.get(url)
+                WebDriverWait(driver, 15).until(EC.presence_of_element_located(result_link))
+                loads.append(time.perf_counter() - started)
+            report[label] = {
+                'launch_seconds': round(launch_seconds, 2),
+                'page_load_seconds': round(sum(loads) / len(loads), 2),
+                'rss_mb': round(driver_rss_mb(driver), 1) if psutil is not None else None,
+            }
+        finally:
+            driver.quit()
+    return report
+
+
+if __name__ == "__main__":
+    print(benchmark())
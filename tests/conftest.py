@@ -0,0 +1,56 @@
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+# Same fallback the modules use: make `modules` importable when pytest runs from the project root
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+class LocalServer(ThreadingHTTPServer):
+    """
+    Serves a BaseHTTPRequestHandler on a free local port. Handlers can append to `requests`;
+    access logs and client hang-ups (byte caps, early stops, deadlines) are not reported.
+    """
+    daemon_threads = True
+
+    def __init__(self, handler):
+        quiet_handler = type(handler.__name__, (handler,), {'log_message': lambda self, *args: None})
+        super().__init__(('127.0.0.1', 0), quiet_handler)
+        self.requests = []
+        self.url = f'http://127.0.0.1:{self.server_port}'
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+@pytest.fixture(scope='module')
+def local_server(request):
+    """
+    A LocalServer running the test module's `Handler` for the whole module. Parametrize it
+    indirectly to serve another handler class.
+    """
+    server = LocalServer(getattr(request, 'param', None) or request.module.Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope='module')
+def local_sites(request):
+    """
+    Four LocalServers running the test module's `Handler`: separate sites (host:port) for crawls
+    that span several domains.
+    """
+    servers = [LocalServer(request.module.Handler) for _ in range(4)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield servers
+    for server in servers:
+        server.shutdown()
+        server.server_close()
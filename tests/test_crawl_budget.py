@@ -0,0 +1,128 @@
+"""CrawlBudget and BudgetedCrawlScheduler over several local sites."""
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules.crawl_scheduler import BudgetedCrawlScheduler, CrawlBudget
+from modules.domain_index import KnownDomainIndex
+from modules.frontier_stats import CrawlOutcomeStats
+from modules.leadExtractor import LeadExtractor
+from modules.page_cache import PageCache
+from modules.politeness import PolitenessScheduler
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        port = self.server.server_port
+        if self.path == '/':
+            body = (f'<html><head><title>Shop {port}</title></head><body><a href="/blog">Blog</a>'
+                    f'<a href="/collections/all">All</a><a href="/contact">Contact us</a></body></html>')
+        elif self.path == '/contact':
+            body = f'<html><head><title>Brand {port}</title></head><body><a href="mailto:hello{port}@brand.com">mail</a></body></html>'
+        elif self.path == '/robots.txt':
+            return self._send(404, b'')
+        else:
+            body = '<html><head><title>Other</title></head><body>Nothing here</body></html>'
+        self._send(200, body.encode('utf-8'))
+
+    def _send(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def extractor(monkeypatch, tmp_path, local_sites):
+    monkeypatch.setattr(LeadExtractor, 'HTTP_CACHE_ENABLED', False)
+    for server in local_sites:
+        server.requests.clear()
+    return LeadExtractor(page_cache=PageCache(), politeness=PolitenessScheduler(0, 0),
+                         domain_index=KnownDomainIndex(str(tmp_path / 'leads.db')),
+                         outcome_stats=CrawlOutcomeStats(str(tmp_path / 'outcomes.db')))
+
+
+@pytest.fixture
+def seeds(local_sites):
+    urls = [f'{server.url}/' for server in local_sites]
+    return {'k0': urls[:2], 'k1': urls[2:]}
+
+
+def requests_made(local_sites):
+    return [path for server in local_sites for path in server.requests]
+
+
+def test_fetch_budget():
+    budget = CrawlBudget(max_fetches=3)
+    assert [budget.try_spend('k0'), budget.try_spend('k1'), budget.try_spend('k1')] == [True] * 3
+    assert budget.remaining() == 0 and not budget.exhausted
+    assert not budget.try_spend('k0')
+    assert budget.exhausted
+    budget.record_lead('k1')
+    report = budget.report()
+    assert (report['fetches'], report['leads'], report['fetches_per_lead'], report['stopped_by']) == (3, 1, 3.0, 'fetch budget')
+    assert report['keywords'] == {'k0': {'fetches': 1, 'leads': 0}, 'k1': {'fetches': 2, 'leads': 1}}
+
+
+def test_time_budget_starts_at_the_first_fetch():
+    clock = Clock()
+    budget = CrawlBudget(max_seconds=10, clock=clock)
+    clock.now += 100
+    assert budget.try_spend()
+    clock.now += 9.9
+    assert budget.try_spend()
+    clock.now += 0.1
+    assert not budget.try_spend()
+    assert budget.report()['stopped_by'] == 'time budget'
+    assert budget.remaining() is None
+
+
+def test_zero_means_unlimited():
+    budget = CrawlBudget(max_fetches=0, max_seconds=0)
+    assert all(budget.try_spend() for _ in range(1000))
+    assert not budget.exhausted
+
+
+def test_unlimited_budget_finds_every_lead_without_dead_ends(extractor, seeds, local_sites):
+    leads = extractor.budgeted_scraper(seeds, CrawlBudget())
+    assert {keyword: sorted(lead.email for lead in found) for keyword, found in leads.items()} == {
+        keyword: sorted(f"hello{url.rstrip('/').rpartition(':')[2]}@brand.com" for url in urls)
+        for keyword, urls in seeds.items()}
+    # Every site stops at its contact page: homepage and contact page only
+    assert sorted(requests_made(local_sites)) == ['/'] * 4 + ['/contact'] * 4
+
+
+@pytest.mark.parametrize('max_fetches', [1, 3, 5, 7])
+def test_budget_caps_every_request(extractor, seeds, local_sites, max_fetches):
+    budget = CrawlBudget(max_fetches=max_fetches)
+    leads = BudgetedCrawlScheduler(extractor, budget, max_concurrency=3).run(seeds)
+    made = requests_made(local_sites)
+    assert len(made) == budget.fetches <= max_fetches
+    assert '/blog' not in made and '/collections/all' not in made
+    assert sum(len(found) for found in leads.values()) == made.count('/contact') == budget.leads
+
+
+def test_contact_pages_win_over_homepages_of_other_keywords(extractor, seeds, local_sites):
+    # Homepages cost more than a contact link, so once a site is open its contact page goes first
+    budget = CrawlBudget(max_fetches=4)
+    leads = BudgetedCrawlScheduler(extractor, budget, max_concurrency=1).run(seeds)
+    assert requests_made(local_sites).count('/contact') == 2
+    assert sum(len(found) for found in leads.values()) == 2
+
+
+def test_a_site_seeded_by_two_keywords_is_crawled_once(extractor, local_sites):
+    url = f'{local_sites[0].url}/'
+    leads = BudgetedCrawlScheduler(extractor, CrawlBudget()).run({'k0': [url], 'k1': [url + 'about']})
+    assert local_sites[0].requests == ['/', '/contact']
+    assert [len(leads['k0']), len(leads['k1'])] == [1, 0]
@@ -0,0 +1,187 @@
+"""CrawlStateStore: keyword failures, pruning, frontier checkpoints and resumed runs."""
+
+import functools
+import sqlite3
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules import leadgenerationtool
+from modules.crawl_scheduler import SeedFrontier
+from modules.crawl_state import CrawlStateStore, unfinished_runs
+from modules.database_manager import DatabaseManager
+from modules.domain_index import KnownDomainIndex
+from modules.frontier_stats import CrawlOutcomeStats
+from modules.leadExtractor import LeadExtractor
+from modules.leadgenerationtool import LeadGenerationTool
+from modules.page_cache import PageCache
+from modules.politeness import PolitenessScheduler
+
+DAY = 86400
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == '/contact':
+            body = b'<html><head><title>Brand</title></head><body><a href="mailto:hello@brand.com">mail</a></body></html>'
+        else:
+            body = b'<html><head><title>Home</title></head><body><a href="/contact">Contact</a></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class CountingScraper:
+    def __init__(self, seeds):
+        self.seeds = seeds
+        self.searches = 0
+
+    def scrape_keyword(self, keyword):
+        self.searches += 1
+        return list(self.seeds)
+
+
+class FailingStorage(DatabaseManager):
+    def add_all_leads(self, leads, keyword=None, raise_errors=False):
+        raise RuntimeError('database is locked')
+
+
+def test_run_with_failed_keywords_is_finished(tmp_path):
+    db_file = str(tmp_path / 'state.db')
+    store = CrawlStateStore('run-1', ['k0', 'k1'], db_file=db_file)
+    store.save_stored('k0', ['https://a.com'], 1)
+    store.save_seeds('k1', ['https://b.com'])
+    store.finish({'k1': ('store', RuntimeError('database is locked'))})
+    assert unfinished_runs(db_file) == []
+
+    resumed = CrawlStateStore('run-1', db_file=db_file)
+    assert resumed.resumed and resumed.keywords == ['k0', 'k1']
+    assert resumed.failed_keywords() == {'k1': ('store', 'database is locked')}
+    assert resumed.load_keyword('k1') == (['https://b.com'], {}, None)
+
+    # A retry that stores the keyword clears its failure
+    resumed.save_stored('k1', ['https://b.com'], 0)
+    resumed.finish({})
+    assert resumed.failed_keywords() == {}
+
+
+def test_old_runs_are_pruned(tmp_path):
+    db_file = str(tmp_path / 'state.db')
+    old = CrawlStateStore('old', ['k0'], db_file=db_file)
+    old.save_seed_result('k0', 'https://a.com', None)
+    old.save_frontier(SeedFrontier('https://a.com', 'k0'), force=True)
+    recent = CrawlStateStore('recent', ['k1'], db_file=db_file)
+    with sqlite3.connect(db_file) as connection:
+        connection.execute('UPDATE crawl_runs SET updated_at = ? WHERE run_id = ?', (time.time() - 20 * DAY, 'old'))
+
+    CrawlStateStore('new', ['k2'], db_file=db_file, keep_days=14)
+    with sqlite3.connect(db_file) as connection:
+        for table in ('crawl_runs', 'crawl_keywords', 'crawl_seed_results', 'crawl_frontiers'):
+            assert connection.execute(f"SELECT COUNT(*) FROM {table} WHERE run_id = 'old'").fetchone() == (0,)
+    assert {run_id for run_id, _, _ in unfinished_runs(db_file)} == {recent.run_id, 'new'}
+
+
+def test_frontier_round_trip(tmp_path):
+    store = CrawlStateStore('run-1', ['k0'], db_file=str(tmp_path / 'state.db'))
+    frontier = SeedFrontier('https://a.com', 'k0')
+    frontier.push(3, 1, 'https://a.com/contact', 'Contact')
+    frontier.visits, frontier.pages_fetched, frontier.sitemap_checked = 2, 1, True
+    assert store.save_frontier(frontier, force=True)
+
+    restored = SeedFrontier('https://a.com', 'k0')
+    assert store.restore_frontier(restored)
+    assert restored.queue == [(3, 1, 'https://a.com/contact')]
+    assert restored.link_texts == {'https://a.com/contact': 'Contact'}
+    assert (restored.visits, restored.pages_fetched, restored.sitemap_checked) == (2, 1, True)
+    assert restored.opened and not restored.done
+
+
+def test_state_file_of_an_older_version_is_upgraded(tmp_path):
+    db_file = str(tmp_path / 'state.db')
+    with sqlite3.connect(db_file) as connection:
+        connection.execute('CREATE TABLE crawl_frontiers (run_id VARCHAR(64), start_node VARCHAR(2048), queue TEXT NOT NULL, '
+                           'visited TEXT NOT NULL, link_texts TEXT NOT NULL, visits INTEGER, done INTEGER, lead TEXT, '
+                           'saved_at FLOAT NOT NULL, PRIMARY KEY (run_id, start_node))')
+        connection.execute('CREATE TABLE crawl_keywords (run_id VARCHAR(64), keyword VARCHAR(255), seeds TEXT, '
+                           'stored INTEGER, PRIMARY KEY (run_id, keyword))')
+        connection.execute("INSERT INTO crawl_frontiers VALUES ('run-1', 'https://a.com', '[]', '[]', '{}', 4, 0, NULL, 0)")
+
+    store = CrawlStateStore('run-1', ['k0'], db_file=db_file)
+    restored = SeedFrontier('https://a.com', 'k0')
+    assert store.restore_frontier(restored)
+    assert (restored.visits, restored.pages_fetched, restored.sitemap_checked) == (4, 0, False)
+    store.finish({'k0': ('crawl', 'timeout')})
+    assert store.failed_keywords() == {'k0': ('crawl', 'timeout')}
+
+
+@pytest.fixture
+def state_db(tmp_path):
+    return str(tmp_path / 'state.db')
+
+
+@pytest.fixture
+def checkpointed(monkeypatch, tmp_path, local_server, state_db):
+    """Builds tools whose runs are checkpointed to `state_db`, with every other database in tmp_path too."""
+    monkeypatch.setattr(LeadExtractor, 'HTTP_CACHE_ENABLED', False)
+    monkeypatch.setattr(LeadGenerationTool, 'CHECKPOINT_RUNS', True)
+    monkeypatch.setattr(LeadGenerationTool, 'RETRY_ATTEMPTS', 1)
+    monkeypatch.setattr(leadgenerationtool, 'CrawlStateStore', functools.partial(CrawlStateStore, db_file=state_db))
+    local_server.requests.clear()
+
+    def make_tool(storage=None):
+        leads_db = str(tmp_path / 'leads.db')
+        extractor = LeadExtractor(page_cache=PageCache(), politeness=PolitenessScheduler(0, 0),
+                                  domain_index=KnownDomainIndex(leads_db),
+                                  outcome_stats=CrawlOutcomeStats(str(tmp_path / 'outcomes.db')))
+        scraper = CountingScraper([f'{local_server.url}/'])
+        return LeadGenerationTool(None, scraper, storage or DatabaseManager(leads_db), extractor=extractor), scraper
+
+    return make_tool
+
+
+def run_ids(db_file):
+    with sqlite3.connect(db_file) as connection:
+        return [run_id for (run_id,) in connection.execute('SELECT run_id FROM crawl_runs')]
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_resumed_run_retries_only_the_failed_keyword(checkpointed, state_db, local_server, tmp_path, stream):
+    tool, _ = checkpointed(FailingStorage(str(tmp_path / 'leads.db')))
+    assert tool.process_keywords(['k0'], stream=stream)['k0'].stage == 'store'
+    assert unfinished_runs(state_db) == []
+    [run_id] = run_ids(state_db)
+    assert CrawlStateStore(run_id, db_file=state_db).failed_keywords() == {'k0': ('store', 'database is locked')}
+
+    # Resuming the run stores the checkpointed lead without searching or crawling again
+    local_server.requests.clear()
+    tool, scraper = checkpointed()
+    result = tool.process_keywords([], run_id=run_id, stream=stream)['k0']
+    assert (result.error, result.stored) == (None, 1)
+    assert scraper.searches == 0
+    assert local_server.requests == []
+    assert CrawlStateStore(run_id, db_file=state_db).failed_keywords() == {}
+
+
+def test_interrupted_run_continues_from_the_frontier_checkpoint(checkpointed, state_db, local_server):
+    tool, scraper = checkpointed()
+    home = tool.extractor.normalize_url_key(f'{local_server.url}/')
+    contact = f'{local_server.url}/contact'
+    # What a process killed after the homepage of the only seed leaves behind
+    state = CrawlStateStore('interrupted', ['k0'], db_file=state_db)
+    state.save_seeds('k0', [f'{local_server.url}/'])
+    frontier = SeedFrontier(home, 'k0')
+    frontier.visited = {home}
+    frontier.push(2, 1, contact, 'Contact')
+    frontier.visits = frontier.pages_fetched = 1
+    state.save_frontier(frontier, force=True)
+    assert [run_id for run_id, _, _ in unfinished_runs(state_db)] == ['interrupted']
+
+    result = tool.process_keywords([], run_id='interrupted', stream=False)['k0']
+    assert [lead.email for lead in result.leads] == ['hello@brand.com']
+    assert scraper.searches == 0
+    assert local_server.requests == ['/contact']
+    assert unfinished_runs(state_db) == []
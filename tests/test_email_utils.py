@@ -0,0 +1,83 @@
+"""The regex fast path of Email_Utils against the soup-based reference implementation."""
+
+import random
+
+import pytest
+
+from modules.email_utils import Email_Utils
+
+FILLER = ''.join(f'<p>Paragraph {i} about our products.</p>' for i in range(50))
+
+PAGES = [
+    f'<html><title>Shop</title><body>{FILLER}<a href="mailto:hello@brand.com?subject=Hi">Mail</a> or sales@brand.com</body></html>',
+    f'<html><body>{FILLER}<script>var blob="' + 'QmFzZTY0' * 250 + '";</script></body></html>',
+    '<a href="mailto:hello&#64;brand.com">mail</a> not noreply@brand.com or 0123456789abcdef01@sentry.io',
+    "<A HREF='MAILTO:Info@Brand.co.uk'>mail</A><img src=\"logo@2x.png\"> <a href=mailto:shop@brand.com>shop</a>",
+    '<a class="btn"\n   href = "mailto:team@brand.com">team</a><a href="tel:123">call</a>',
+]
+
+MALFORMED = [
+    # Unterminated attributes must not swallow the following tags
+    '<a href="mailto:b-q@r.io<a href="x">Z-co</a>&x.com.x.com<a href="mailto:ok@brand.com">ok</a>',
+    '<a href="mailto:\n\n@a co<a href="mailto:a@b.co">',
+    "<a href='mailto:a@b.com <p>text</p>'>x</a> c@d.com",
+    '<a href=mailto:a@b.com<p>x</p>',
+    '<a href=mailto:a&#64;b.com',
+    '<a href="mailto:a@b.com"',
+    # Chained '@' runs and local parts running into the previous hit
+    '...img@2x.pngimg@2x.png.com',
+    'a@b.co@c.com x a@bb.cc@dd.ee@ff.gg',
+    'q=.io' + 'x' * 90 + '@.x.commailto:@rq..x.com --></a>@io&#64;' + 'x' * 30 + '@<!----></a>',
+    'x' * 30 + '&#64;' + 'x' * 60 + '._com@.x.com',
+    'a--\n@.x.com ' + 'y' * 64 + '@brand.com ' + 'z' * 65 + '@brand.com',
+    # Leading dots are trimmed before the 64-character check
+    '.' + 'y' * 64 + '@.x.com+@io ' + '.' * 200 + 'w@brand.com ' + 'v' * 300 + '@brand.com',
+    '@.x.com @@ a@ @b.com a@b. a@b.c',
+]
+
+TOKENS = ['a', 'b', 'Z', '.', '@', '@', '-', '_', '%', '+', ' ', '\n', '<a href=', '<a href="mailto:',
+          "<a href='mailto:", '<a href=mailto:', '"', "'", 'mailto:', '>', '</a>', 'com', 'io', 'png', '2x',
+          'x' * 30, 'y' * 64, 'z' * 65, '...', '&amp;', '&#64;', '?subject=hi', '<p>', '<br/>', '=', '.x.com']
+
+
+def random_markup(count: int, seed: int = 14) -> list[str]:
+    rng = random.Random(seed)
+    return [''.join(rng.choice(TOKENS) for _ in range(rng.randint(1, 30))) for _ in range(count)]
+
+
+@pytest.fixture(scope='module')
+def utils():
+    return Email_Utils()
+
+
+@pytest.mark.parametrize('html', PAGES + MALFORMED)
+def test_fast_path_matches_reference(utils, html):
+    assert utils.extract_emails_from_html(html) == utils.extract_emails_naive(html)
+
+
+def test_fast_path_matches_reference_on_random_markup(utils):
+    pages = random_markup(3000)
+    expected = [utils.extract_emails_naive(page) for page in pages]
+    assert [utils.extract_emails_from_html(page) for page in pages] == expected
+    assert utils.extract_emails_batch(pages) == expected
+
+
+@pytest.mark.parametrize('text', PAGES + MALFORMED + random_markup(500, seed=15))
+def test_hits_match_the_regex_scan(text):
+    # Hits with a local part over 64 characters (leading dots aside) are dropped on purpose;
+    # is_suspicious_email rejects them
+    expected = [hit for hit in Email_Utils.EMAIL_REGEX.findall(text) if len(hit.partition('@')[0].lstrip('.')) <= 64]
+    assert Email_Utils.find_email_hits(text) == expected
+
+
+@pytest.mark.parametrize('html, expected', [
+    ('<a href="mailto:b-q@r.io<a href=">x</a>', []),
+    ('<a href="mailto:\n\n@a co<a href=">x</a>', []),
+    ('<a href="mailto:hello&#64;brand.com?subject=Hi">x</a>', ['hello@brand.com']),
+    ("<a href='mailto:Info@Brand.co.uk'>x</a>", ['Info@Brand.co.uk']),
+    ('<a href=mailto:shop@brand.com>x</a>', ['shop@brand.com']),
+    ('<a href=mailto:shop@brand.com<p>x</a>', []),
+    ('<a href="mailto:hello@brand">x</a>', []),
+])
+def test_mailto_addresses_are_well_formed(html, expected):
+    assert Email_Utils.find_mailto_addresses(html) == expected
@@ -0,0 +1,54 @@
+"""CrawlOutcomeStats.flush under concurrent flushes and failed writes."""
+
+import threading
+
+from modules.frontier_stats import TOTAL_FEATURE, CrawlFeatureStatsORM, CrawlOutcomeStats
+
+
+def stored_counts(stats, feature):
+    session = stats.Session()
+    try:
+        row = session.get(CrawlFeatureStatsORM, feature)
+        return (row.visits, row.successes) if row is not None else (0, 0)
+    finally:
+        session.close()
+
+
+def test_concurrent_flushes_lose_no_counts(tmp_path):
+    stats = CrawlOutcomeStats(str(tmp_path / 'outcomes.db'), log_pages=True)
+
+    def crawl(worker):
+        for page in range(50):
+            stats.record_visit(f'https://{worker}.com', f'https://{worker}.com/contact', 'Contact us', 1, page % 5 == 0)
+            stats.flush()
+
+    threads = [threading.Thread(target=crawl, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats.flush()
+
+    assert stored_counts(stats, TOTAL_FEATURE) == (400, 80)
+    assert stored_counts(stats, 'anchor:contact') == (400, 80)
+    assert sum(len(pages) for pages in stats.load_page_logs().values()) == 8
+
+
+def test_failed_flush_keeps_its_counts_for_the_next_one(tmp_path, monkeypatch):
+    stats = CrawlOutcomeStats(str(tmp_path / 'outcomes.db'), log_pages=True)
+    stats.record_visit('https://a.com', 'https://a.com/contact', 'Contact', 1, True)
+
+    def locked(session):
+        raise RuntimeError('database is locked')
+
+    monkeypatch.setattr(stats, '_apply_retention', locked)
+    assert stats.flush() == 0
+    assert stored_counts(stats, TOTAL_FEATURE) == (0, 0)
+
+    stats.record_visit('https://a.com', 'https://a.com/about', 'About', 1, False)
+    monkeypatch.undo()
+    assert stats.flush() == 2
+    assert stored_counts(stats, TOTAL_FEATURE) == (2, 1)
+    assert stored_counts(stats, 'anchor:contact') == (1, 1)
+    assert set(stats.load_page_logs()['https://a.com']) == {'https://a.com/contact', 'https://a.com/about'}
+    assert stats.flush() == 0
@@ -0,0 +1,92 @@
+"""DiskHttpCache revalidation against a local server that honours conditional requests."""
+
+import os
+import sqlite3
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules.http_cache import DiskHttpCache
+from modules.http_client import SessionPool
+
+ETAG = '"v1"'
+LAST_MODIFIED = 'Mon, 01 Jan 2024 00:00:00 GMT'
+BODY = '<html><head><title>Brand</title></head><body>hello@brand.com</body></html>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path == '/etag' and self.headers.get('If-None-Match') == ETAG:
+            return self._send(304)
+        if self.path == '/last-modified' and self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            return self._send(304)
+        headers = {'/etag': {'ETag': ETAG}, '/last-modified': {'Last-Modified': LAST_MODIFIED}}.get(self.path, {})
+        self._send(200, BODY.encode('utf-8'), headers)
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiskHttpCache(str(tmp_path / 'http_cache.db'))
+
+
+@pytest.mark.parametrize('path, validator', [('/etag', 'If-None-Match'), ('/last-modified', 'If-Modified-Since')])
+def test_second_fetch_is_revalidated_with_a_304(local_server, cache, path, validator):
+    url = f'{local_server.url}{path}'
+    pool = SessionPool()
+    local_server.requests.clear()
+
+    first = cache.fetch(pool, url)
+    assert (first.status_code, first.text, first.from_cache) == (200, BODY, False)
+    assert validator not in local_server.requests[0][1]
+
+    second = cache.fetch(pool, url)
+    assert (second.status_code, second.text, second.from_cache) == (200, BODY, True)
+    assert validator in local_server.requests[1][1]
+    assert cache.stats() == {'revalidated': 1, 'downloads': 1, 'stores': 1, 'evictions': 0}
+
+
+def test_responses_without_validators_are_not_stored(local_server, cache):
+    url = f'{local_server.url}/plain'
+    pool = SessionPool()
+    assert not cache.fetch(pool, url).from_cache
+    assert not cache.fetch(pool, url).from_cache
+    assert cache.lookup(url) is None
+    assert cache.stats() == {'revalidated': 0, 'downloads': 2, 'stores': 0, 'evictions': 0}
+
+
+def test_byte_budget_evicts_the_least_recently_validated_entries(tmp_path):
+    bodies = {f'https://brand.com/{i}': os.urandom(5000).hex() for i in range(10)}
+    entry_bytes = max(len(zlib.compress(body.encode('utf-8'), 6)) for body in bodies.values())
+    cache = DiskHttpCache(str(tmp_path / 'http_cache.db'), max_bytes=5 * entry_bytes)
+    for url, body in bodies.items():
+        cache.store(url, body, etag='"v1"')
+        time.sleep(0.001)
+    kept = [url for url in bodies if cache.lookup(url) is not None]
+    assert kept == list(bodies)[-len(kept):]
+    assert 4 <= len(kept) <= 5
+    assert cache.stats()['evictions'] == 10 - len(kept)
+
+
+def test_entries_past_the_max_age_are_pruned_on_open(tmp_path):
+    db_file = str(tmp_path / 'http_cache.db')
+    cache = DiskHttpCache(db_file, max_age_days=30)
+    cache.store('https://brand.com/old', BODY, etag='"v1"')
+    cache.store('https://brand.com/new', BODY, etag='"v1"')
+    with sqlite3.connect(db_file) as connection:
+        connection.execute("UPDATE http_cache SET validated_at = ? WHERE url = 'https://brand.com/old'",
+                           (time.time() - 31 * 86400,))
+    cache = DiskHttpCache(db_file, max_age_days=30)
+    assert cache.lookup('https://brand.com/old') is None
+    assert cache.lookup('https://brand.com/new') is not None
@@ -0,0 +1,118 @@
+"""A site is marked as done in the known-domain index only once its lead is stored and accepted."""
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules.database_manager import DatabaseManager
+from modules.domain_index import KnownDomainIndex
+from modules.frontier_stats import CrawlOutcomeStats
+from modules.leadExtractor import LeadExtractor
+from modules.leadgenerationtool import LeadGenerationTool
+from modules.page_cache import PageCache
+from modules.politeness import PolitenessScheduler
+
+DAY = 86400
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/contact':
+            body = b'<html><head><title>Brand</title></head><body><a href="mailto:hello@brand.com">mail</a></body></html>'
+        else:
+            body = b'<html><head><title>Home</title></head><body><a href="/contact">Contact</a></body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StaticScraper:
+    def __init__(self, seeds):
+        self.seeds = seeds
+
+    def scrape_keyword(self, keyword):
+        return list(self.seeds)
+
+
+class RejectingValidator:
+    def validate_lead(self, lead):
+        lead.is_lead_valid = False
+
+
+class FailingStorage(DatabaseManager):
+    def add_all_leads(self, leads, keyword=None, raise_errors=False):
+        raise RuntimeError('database is locked')
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def quiet_tool(monkeypatch):
+    # Keep every database in tmp_path and do not wait between retries
+    monkeypatch.setattr(LeadExtractor, 'HTTP_CACHE_ENABLED', False)
+    monkeypatch.setattr(LeadGenerationTool, 'CHECKPOINT_RUNS', False)
+    monkeypatch.setattr(LeadGenerationTool, 'RETRY_ATTEMPTS', 1)
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    # The index shares the leads database, as it does in production
+    return str(tmp_path / 'leads.db')
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_tool(local_server, db_file, clock, tmp_path, storage=None, validator=None):
+    index = KnownDomainIndex(db_file, clock=clock)
+    extractor = LeadExtractor(page_cache=PageCache(), politeness=PolitenessScheduler(0, 0), domain_index=index,
+                              outcome_stats=CrawlOutcomeStats(str(tmp_path / 'outcomes.db')))
+    tool = LeadGenerationTool(None, StaticScraper([f'{local_server.url}/']), storage or DatabaseManager(db_file),
+                              extractor=extractor, validator=validator)
+    return tool, index
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_stored_lead_marks_the_site_as_done(local_server, db_file, clock, tmp_path, stream):
+    tool, index = make_tool(local_server, db_file, clock, tmp_path)
+    result = tool.process_keywords(['k0'], stream=stream)['k0']
+    assert result.stored == 1
+    assert not index.should_crawl(local_server.url)
+
+    tool, _ = make_tool(local_server, db_file, clock, tmp_path)
+    assert tool.process_keyword('k0') == []
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_failed_write_leaves_the_site_crawlable(local_server, db_file, clock, tmp_path, stream):
+    tool, index = make_tool(local_server, db_file, clock, tmp_path, storage=FailingStorage(db_file))
+    result = tool.process_keywords(['k0'], stream=stream)['k0']
+    assert result.stage == 'store'
+    assert index.should_crawl(local_server.url)
+
+    tool, _ = make_tool(local_server, db_file, clock, tmp_path)
+    leads = tool.process_keyword('k0')
+    assert [lead.email for lead in leads] == ['hello@brand.com']
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_rejected_lead_is_retried_after_retry_after(local_server, db_file, clock, tmp_path, stream):
+    tool, index = make_tool(local_server, db_file, clock, tmp_path, validator=RejectingValidator())
+    assert tool.process_keywords(['k0'], stream=stream)['k0'].stored == 1
+    assert not index.should_crawl(local_server.url)
+
+    # A fresh index also reads the stored (rejected) lead from `leads`; the recorded crawl wins
+    index = KnownDomainIndex(db_file, clock=clock)
+    assert not index.should_crawl(local_server.url)
+    clock.now += 8 * DAY
+    assert index.should_crawl(local_server.url)
@@ -0,0 +1,87 @@
+"""LeadGenerationTool: stored keyword and the per-call limits of process_keyword."""
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules.database_manager import DatabaseManager
+from modules.domain_index import KnownDomainIndex
+from modules.frontier_stats import CrawlOutcomeStats
+from modules.leadExtractor import LeadExtractor
+from modules.leadgenerationtool import LeadGenerationTool
+from modules.page_cache import PageCache
+from modules.politeness import PolitenessScheduler
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.headers['Host'], self.path))
+        host = self.headers['Host'].partition(':')[0]
+        if self.path == '/contact':
+            body = f'<html><head><title>{host}</title></head><body><a href="mailto:hello@{host}.com">mail</a></body></html>'
+        else:
+            body = '<html><head><title>Home</title></head><body><a href="/contact">Contact</a></body></html>'
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class StaticScraper:
+    def __init__(self, seeds):
+        self.seeds = seeds
+
+    def scrape_keyword(self, keyword):
+        return list(self.seeds)
+
+
+@pytest.fixture(autouse=True)
+def quiet_tool(monkeypatch):
+    monkeypatch.setattr(LeadExtractor, 'HTTP_CACHE_ENABLED', False)
+    monkeypatch.setattr(LeadGenerationTool, 'CHECKPOINT_RUNS', False)
+    monkeypatch.setattr(LeadGenerationTool, 'RETRY_ATTEMPTS', 1)
+
+
+@pytest.fixture
+def seeds(local_server):
+    port = local_server.url.rpartition(':')[2]
+    return [f'http://127.0.0.1:{port}/', f'http://localhost:{port}/']
+
+
+def make_tool(seeds, tmp_path):
+    db_file = str(tmp_path / 'leads.db')
+    extractor = LeadExtractor(page_cache=PageCache(), politeness=PolitenessScheduler(0, 0),
+                              domain_index=KnownDomainIndex(db_file),
+                              outcome_stats=CrawlOutcomeStats(str(tmp_path / 'outcomes.db')))
+    # Sites are crawled again within a test
+    extractor.KNOWN_DOMAIN_POLICY = 'off'
+    storage = DatabaseManager(db_file)
+    return LeadGenerationTool(None, StaticScraper(seeds), storage, extractor=extractor), storage
+
+
+@pytest.mark.parametrize('stream', [False, True])
+def test_leads_are_stored_without_their_keyword(seeds, tmp_path, stream):
+    tool, storage = make_tool(seeds, tmp_path)
+    assert tool.process_keywords(['k0'], stream=stream)['k0'].stored == 2
+    # The frontend treats a keyword with leads stored under it as done
+    assert storage.get_leads_by_keyword('k0') == []
+    assert len(storage.get_all_leads()) == 2
+
+
+def test_process_keyword_crawls_at_most_max_seed_urls(local_server, seeds, tmp_path):
+    tool, _ = make_tool(seeds, tmp_path)
+    local_server.requests.clear()
+    leads = tool.process_keyword('k0', max_seed_urls=1)
+    assert [lead.email for lead in leads] == ['hello@127.0.0.1.com']
+    assert {host.partition(':')[0] for host, _ in local_server.requests} == {'127.0.0.1'}
+
+
+def test_process_keyword_honors_max_visits(local_server, seeds, tmp_path):
+    tool, _ = make_tool(seeds[:1], tmp_path)
+    local_server.requests.clear()
+    assert tool.process_keyword('k0', MAX_VISITS=1) == []
+    assert [path for _, path in local_server.requests] == ['/']
+    # The tool's own extractor keeps its limit
+    assert len(tool.process_keyword('k0')) == 1
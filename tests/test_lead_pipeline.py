@@ -0,0 +1,147 @@
+"""LeadPipeline: batched commits, email dedup, outcomes, failed commits and backpressure."""
+
+import threading
+import time
+
+import pytest
+
+from modules.Lead import Lead
+from modules.lead_pipeline import LeadPipeline
+from modules.retry import RetryPolicy
+
+
+def make_lead(i, email=None):
+    return Lead(f'Brand {i}', email or f'hello@brand{i}.com', f'https://brand{i}.com', '2024-01-01T00:00:00')
+
+
+class RecordingStorage:
+    """Stores leads by website URL like DatabaseManager; `failures` commits raise first."""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+        self.urls = set()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def add_all_leads(self, leads, keyword=None, raise_errors=False):
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('database is locked')
+        self.batches.append(list(leads))
+        new = {lead.source_url for lead in leads} - self.urls
+        self.urls |= new
+        return len(new)
+
+
+class Validator:
+    def validate_lead(self, lead):
+        lead.is_lead_valid = not lead.email.startswith('spam')
+
+
+class Outcomes(list):
+    def __call__(self, lead, kept):
+        self.append((lead.email, kept))
+
+
+def test_leads_are_committed_in_batches():
+    storage = RecordingStorage()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=5, flush_seconds=60)
+    for i in range(12):
+        pipeline.put(make_lead(i))
+    pipeline.put(None)
+    stats = pipeline.close()
+    assert [len(batch) for batch in storage.batches] == [5, 5, 2]
+    assert stats == {'received': 12, 'duplicates': 0, 'stored': 12, 'commits': 3, 'failed': 0}
+    assert pipeline.error is None
+
+
+def test_partial_batch_is_committed_after_flush_seconds():
+    storage = RecordingStorage()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=5, flush_seconds=0.05)
+    pipeline.put(make_lead(0))
+    deadline = time.monotonic() + 2
+    while not storage.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [len(batch) for batch in storage.batches] == [1]
+    pipeline.close()
+
+
+def test_outcomes_of_stored_rejected_and_repeated_leads():
+    storage = RecordingStorage()
+    outcomes = Outcomes()
+    pipeline = LeadPipeline(storage, 'k0', validator=Validator(), batch_size=2, on_outcome=outcomes)
+    for lead in (make_lead(0), make_lead(1, 'spam@brand1.com'), make_lead(2, 'hello@brand0.com'), make_lead(3)):
+        pipeline.put(lead)
+    stats = pipeline.close()
+    assert stats['duplicates'] == 1
+    assert sorted(outcomes) == [('hello@brand0.com', False), ('hello@brand0.com', True),
+                                ('hello@brand3.com', True), ('spam@brand1.com', False)]
+    # Rejected leads are stored (flagged invalid), repeated emails are not
+    assert storage.urls == {'https://brand0.com', 'https://brand1.com', 'https://brand3.com'}
+
+
+def test_failed_commit_is_retried_then_reported():
+    storage = RecordingStorage(failures=1)
+    outcomes = Outcomes()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=1, on_outcome=outcomes,
+                            retry_policy=RetryPolicy(attempts=2, base_delay=0, jitter=False))
+    pipeline.put(make_lead(0))
+    assert pipeline.close()['stored'] == 1
+    assert outcomes == [('hello@brand0.com', True)]
+
+    storage = RecordingStorage(failures=5)
+    outcomes = Outcomes()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=2, on_outcome=outcomes)
+    for i in range(3):
+        pipeline.put(make_lead(i))
+    stats = pipeline.close()
+    assert (stats['stored'], stats['failed'], stats['commits']) == (0, 3, 0)
+    assert isinstance(pipeline.error, RuntimeError)
+    # Leads whose commit failed are not reported: their sites stay crawlable
+    assert outcomes == []
+
+
+def test_failing_outcome_callback_does_not_stop_the_writer():
+    def broken(lead, kept):
+        raise ValueError('index unavailable')
+
+    storage = RecordingStorage()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=1, on_outcome=broken)
+    for i in range(3):
+        pipeline.put(make_lead(i))
+    assert pipeline.close()['stored'] == 3
+
+
+def test_put_blocks_while_storage_lags():
+    storage = RecordingStorage()
+    storage.gate.clear()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=1, max_pending=2)
+    done = threading.Event()
+
+    def crawl():
+        for i in range(6):
+            pipeline.put(make_lead(i))
+        done.set()
+
+    threading.Thread(target=crawl, daemon=True).start()
+    # One lead is held by the blocked writer, two wait in the queue; the fourth put blocks
+    assert not done.wait(0.3)
+    storage.gate.set()
+    assert done.wait(2)
+    assert pipeline.close()['stored'] == 6
+
+
+@pytest.mark.parametrize('batch_size', [1, 3])
+def test_close_flushes_every_lead_put_from_many_threads(batch_size):
+    storage = RecordingStorage()
+    pipeline = LeadPipeline(storage, 'k0', batch_size=batch_size, flush_seconds=60)
+    threads = [threading.Thread(target=lambda t=t: [pipeline.put(make_lead(10 * t + i)) for i in range(10)])
+               for t in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert pipeline.close()['stored'] == 40
+    assert len(storage.urls) == 40
@@ -0,0 +1,75 @@
+"""LinkScorer.score_links and its memo against the per-link reference scorer."""
+
+import random
+
+import pytest
+
+from modules.link_scorer import LinkScorer
+
+SITE = 'https://www.brand.com'
+NAV = [(f'{SITE}/', 'Home'), (f'{SITE}/collections/all', 'Shop'), (f'{SITE}/pages/contact', 'Contact'),
+       (f'{SITE}/pages/about-us', 'About us'), (f'{SITE}/blogs/news', 'Journal')]
+FOOTER = [(f'{SITE}/policies/privacy-policy', 'Privacy'), (f'{SITE}/pages/returns', 'Returns & exchanges'),
+          (f'{SITE}/pages/careers', 'Join the team'), (f'{SITE}/account/login', 'Log in'),
+          (f'{SITE}/pages/customer-service', 'Customer\nservice')]
+PAGES = [
+    NAV + [(f'{SITE}/products/serum-{i}', f'Serum {i}') for i in range(5)] + FOOTER,
+    NAV + [(f'{SITE}/pages/faq', 'FAQ'), (f'{SITE}/pages/faq', 'FAQ'), (f'{SITE}/pages/stockists', None)] + FOOTER,
+    # Keywords split across two links must not match: the joined texts are '\n'-separated
+    [(f'{SITE}/a', 'con'), ('tact', ''), (f'{SITE}/b', 'customer'), ('service', '')],
+    NAV + FOOTER + [(f'{SITE}/pages/CONTACT-US', 'EMAIL US'), (f'{SITE}/gift-card', '')],
+    [],
+]
+
+TOKENS = ['contact', 'con', 'tact', 'support', 'customer service', 'customer', ' ', '\n', '-', '/', 'privacy',
+          'privacy-policy', 'terms', 'shop', 'team', 'returns', 'blog', 'card', 'x', 'Y', 'about-us', 'legal']
+
+
+def naive_costs(scorer, links):
+    return [scorer.score_naive(url, text or '') for url, text in links]
+
+
+def ranking(links, costs):
+    return [link for _, link in sorted(zip(costs, links), key=lambda pair: pair[0])]
+
+
+def random_pages(count, seed):
+    rng = random.Random(seed)
+
+    def text():
+        return ''.join(rng.choice(TOKENS) for _ in range(rng.randint(0, 4)))
+
+    def link():
+        return (rng.choice([f'{SITE}/', '']) + text(), text())
+
+    shared = [link() for _ in range(20)]
+    return [rng.sample(shared, rng.randint(0, 10)) + [link() for _ in range(rng.randint(0, 10))] for _ in range(count)]
+
+
+@pytest.mark.parametrize('tiers', [None, [(1, ['contact', 'con']), (2, ['tact', 'customer service']), (5, ['x', 'e'])]])
+def test_score_links_matches_the_reference_across_pages(tiers):
+    scorer = LinkScorer(tiers)
+    reference = LinkScorer(tiers)
+    # Every page after the first repeats links the memo already holds
+    for links in PAGES + PAGES + random_pages(200, seed=9):
+        costs = scorer.score_links(links)
+        expected = naive_costs(reference, links)
+        assert costs == expected
+        assert ranking(links, costs) == ranking(links, expected)
+        assert [scorer.score(url, text or '') for url, text in links] == expected
+
+
+def test_memo_does_not_change_scores_when_it_overflows(monkeypatch):
+    monkeypatch.setattr(LinkScorer, 'MEMO_MAX_ENTRIES', 7)
+    scorer = LinkScorer()
+    reference = LinkScorer()
+    for links in random_pages(100, seed=10) + PAGES:
+        assert scorer.score_links(links) == naive_costs(reference, links)
+        assert len(scorer._memo) <= 7
+
+
+def test_memo_is_filled_by_score_links():
+    scorer = LinkScorer()
+    scorer.score_links(PAGES[0])
+    assert scorer._memo[f'{SITE}/pages/contact contact'] == 1
+    assert scorer.score(f'{SITE}/pages/contact', 'Contact') == 1
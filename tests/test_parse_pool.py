@@ -0,0 +1,27 @@
+"""Shared parse pools of different sizes."""
+
+import pytest
+
+from modules import parse_pool
+from modules.parse_pool import get_parse_pool
+
+HTML = '<html><head><title>Brand</title></head><body><a href="mailto:hello@brand.com">mail</a></body></html>'
+
+
+@pytest.fixture
+def shared_pools(monkeypatch):
+    pools = {}
+    monkeypatch.setattr(parse_pool, '_shared_pools', pools)
+    yield pools
+    for pool in pools.values():
+        pool.close()
+
+
+def test_another_size_does_not_shut_down_a_held_pool(shared_pools):
+    small = get_parse_pool(1, 2)
+    assert get_parse_pool(1, 2) is small
+    large = get_parse_pool(2, 4)
+    assert large is not small
+    assert (large.workers, large.max_pending) == (2, 4)
+    assert small.extract('https://brand.com', HTML).emails == ['hello@brand.com']
+    assert large.extract('https://brand.com', HTML).emails == ['hello@brand.com']
@@ -0,0 +1,111 @@
+"""DuckDuckGoHtmlBackend against a local stand-in of the HTML results endpoint."""
+
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, quote, urlparse
+
+import pytest
+
+from modules.http_client import SessionPool
+from modules.search_backends import DuckDuckGoHtmlBackend, SearchBackend, SearchBackendError, unwrap_result_url
+from modules.scrapinghandler import ScrapingHandler
+
+RESULTS_PER_PAGE = 4
+PAGES = 3
+
+
+def results_page(page: int, query: str) -> bytes:
+    links = ''.join(
+        f'<div class="result"><a class="result__a" href="//duckduckgo.com/l/?uddg={quote(f"https://site{page}-{i}.com/")}&amp;rut=x">r</a></div>'
+        for i in range(RESULTS_PER_PAGE)
+    )
+    links += '<a class="result__a" href="https://duckduckgo.com/y.js?ad_domain=ad.com">ad</a>'
+    nav = ''
+    if page > 0:
+        nav += '<div class="nav-link"><form action="/html/" method="post"><input type="submit" value="Previous"/><input type="hidden" name="s" value="0"/></form></div>'
+    if page < PAGES - 1:
+        nav += (f'<div class="nav-link"><form action="/html/" method="post"><input type="submit" class="btn" value="Next" />'
+                f'<input type="hidden" name="q" value="{query}"/><input type="hidden" name="s" value="{(page + 1) * RESULTS_PER_PAGE}"/></form></div>')
+    return f'<html><body>{links}{nav}</body></html>'.encode('utf-8')
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, body: bytes, status: int = 200):
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        self.server.requests.append(('GET', query))
+        if query == 'blocked':
+            return self._send(b'<html>anomaly</html>', 202)
+        self._send(results_page(0, query))
+
+    def do_POST(self):
+        form = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+        self.server.requests.append(('POST', form['s'][0]))
+        self._send(results_page(int(form['s'][0]) // RESULTS_PER_PAGE, form['q'][0]))
+
+
+@pytest.fixture
+def backend(local_server):
+    local_server.requests.clear()
+    return DuckDuckGoHtmlBackend(base_url=f'{local_server.url}/html/', session_pool=SessionPool(),
+                                 page_delay=0)
+
+
+def test_paginates_until_max_results(local_server, backend):
+    results = backend.search('fragrance brand', 10)
+    assert len(results) == 10
+    assert results[:2] == ['https://site0-0.com/', 'https://site0-1.com/']
+    assert results[-1] == 'https://site2-1.com/'
+    assert local_server.requests == [('GET', 'fragrance brand'), ('POST', '4'), ('POST', '8')]
+
+
+def test_stops_at_the_last_page(local_server, backend):
+    results = backend.search('fragrance brand', 50)
+    assert len(results) == PAGES * RESULTS_PER_PAGE
+    assert len(set(results)) == len(results)
+    assert len(local_server.requests) == PAGES
+
+
+def test_bot_challenge_raises(backend):
+    with pytest.raises(SearchBackendError):
+        backend.search('blocked', 10)
+
+
+@pytest.mark.parametrize('href, page_url, expected', [
+    ('//duckduckgo.com/l/?uddg=https%3A%2F%2Fbrand.com%2Fshop%3Fa%3D1&rut=x', 'https://html.duckduckgo.com/html/',
+     'https://brand.com/shop?a=1'),
+    ('https://brand.com/', None, 'https://brand.com/'),
+    ('/relative', 'https://brand.com/page', 'https://brand.com/relative'),
+    ('https://duckduckgo.com/y.js?ad_domain=ad.com', None, None),
+    ('mailto:hello@brand.com', None, None),
+    ('', None, None),
+])
+def test_unwrap_result_url(href, page_url, expected):
+    assert unwrap_result_url(href, page_url) == expected
+
+
+class StaticBackend(SearchBackend):
+    def __init__(self, name, results=None, error=None):
+        self.name, self.results, self.error = name, results, error
+
+    def search(self, keyword, max_results):
+        if self.error:
+            raise self.error
+        return self.results
+
+
+@pytest.mark.parametrize('backends, expected', [
+    ([StaticBackend('http', error=SearchBackendError('blocked')), StaticBackend('selenium', ['https://a.com/'])], ['https://a.com/']),
+    ([StaticBackend('http', []), StaticBackend('selenium', ['https://a.com/'])], ['https://a.com/']),
+    ([StaticBackend('http', []), StaticBackend('selenium', error=RuntimeError('crash'))], []),
+    ([StaticBackend('http', error=RuntimeError('crash'))], None),
+])
+def test_scrape_keyword_falls_back_in_order(monkeypatch, backends, expected):
+    monkeypatch.setattr(ScrapingHandler, 'SERP_CACHE_ENABLED', False)
+    handler = ScrapingHandler(backends=backends)
+    assert handler.scrape_keyword('fragrance brand') == expected
@@ -0,0 +1,69 @@
+"""Sitemap discovery as the fallback of a frontier whose links ran dry."""
+
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from modules.crawl_scheduler import SeedFrontier
+from modules.domain_index import KnownDomainIndex
+from modules.frontier_stats import CrawlOutcomeStats
+from modules.leadExtractor import LeadExtractor
+from modules.page_cache import PageCache
+from modules.politeness import PolitenessScheduler
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append(self.path)
+        if self.path == '/robots.txt':
+            body = f'User-agent: *\nSitemap: http://{self.headers["Host"]}/sitemap.xml\n'.encode()
+            content_type = 'text/plain'
+        elif self.path == '/sitemap.xml':
+            body = (f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f'<url><loc>http://{self.headers["Host"]}/contact</loc></url></urlset>').encode()
+            content_type = 'application/xml'
+        else:
+            body = b'<html><head><title>Home</title></head><body>No links</body></html>'
+            content_type = 'text/html; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def extractor(monkeypatch, tmp_path):
+    monkeypatch.setattr(LeadExtractor, 'HTTP_CACHE_ENABLED', False)
+    return LeadExtractor(page_cache=PageCache(), politeness=PolitenessScheduler(0, 0),
+                         domain_index=KnownDomainIndex(str(tmp_path / 'leads.db')),
+                         outcome_stats=CrawlOutcomeStats(str(tmp_path / 'outcomes.db')))
+
+
+def dry_frontier(local_server):
+    frontier = SeedFrontier(f'{local_server.url}/', 'k0')
+    frontier.visits = frontier.pages_fetched = 1
+    return frontier
+
+
+def test_refused_discovery_is_retried(extractor, local_server):
+    local_server.requests.clear()
+    frontier = dry_frontier(local_server)
+    assert extractor.needs_sitemap(frontier)
+    extractor.push_sitemap_candidates(frontier, spend=lambda: False)
+    assert local_server.requests == []
+    assert not frontier.sitemap_checked
+    assert extractor.needs_sitemap(frontier)
+
+    extractor.push_sitemap_candidates(frontier, spend=lambda: True)
+    assert frontier.sitemap_checked
+    assert not extractor.needs_sitemap(frontier)
+    assert [url for _, _, url in frontier.queue] == [f'{local_server.url}/contact']
+
+
+def test_discovery_cut_short_is_retried(extractor, local_server):
+    allowance = iter([True])
+    frontier = dry_frontier(local_server)
+    extractor.push_sitemap_candidates(frontier, spend=lambda: next(allowance, False))
+    assert not frontier.sitemap_checked
+    assert frontier.queue == []
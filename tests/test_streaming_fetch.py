@@ -0,0 +1,102 @@
+"""read_html_stream against a local server with huge, binary and slow-drip responses."""
+
+import time
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+import requests
+
+from modules.streaming_fetch import HtmlStreamProbe, read_html_stream
+
+FILLER = b'<p>' + b'x' * 1020 + b'</p>'
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _start(self, content_type='text/html; charset=utf-8'):
+        self.send_response(200)
+        if content_type:
+            self.send_header('Content-Type', content_type)
+        self.end_headers()
+
+    def do_GET(self):
+        if self.path == '/huge':
+            self._start()
+            self.wfile.write(b'<html><head><title>Huge</title></head><body>')
+            for _ in range(10 * 1024):  # ~10 MB
+                self.wfile.write(FILLER)
+        elif self.path == '/binary':
+            self._start('image/png')
+            self.wfile.write(b'\x89PNG' + b'\x00' * 100000)
+        elif self.path == '/binary-unlabelled':
+            self._start(content_type=None)
+            self.wfile.write(b'%PDF-1.7' + b'\x00' * 100000)
+        elif self.path == '/slow':
+            self._start()
+            self.wfile.write(b'<html><head><title>Slow</title></head><body>')
+            for _ in range(50):
+                self.wfile.write(FILLER)
+                self.wfile.flush()
+                time.sleep(0.1)
+        elif self.path == '/lead':
+            self._start()
+            self.wfile.write(b'<html><head><title>Brand</title></head><body><a href="mailto:hello@brand.com">mail</a>')
+            for _ in range(1024):
+                self.wfile.write(FILLER)
+        elif self.path == '/empty-title':
+            self._start()
+            self.wfile.write(b'<html><head><title> </title></head><body><a href="mailto:hello@brand.com">mail</a>')
+            for _ in range(64):
+                self.wfile.write(FILLER)
+            self.wfile.write(b'</body></html>')
+
+
+@pytest.fixture(scope='module')
+def server_url(local_server):
+    return local_server.url
+
+
+def fetch(url, **kwargs):
+    return read_html_stream(requests.get(url, stream=True, timeout=10), **kwargs)
+
+
+def test_byte_cap_stops_a_huge_body(server_url):
+    body = fetch(f'{server_url}/huge', max_bytes=64 * 1024, stop_when_complete=False)
+    assert body.reason == 'size_cap'
+    assert not body.complete
+    assert len(body.text.encode('utf-8')) <= 64 * 1024
+
+
+@pytest.mark.parametrize('path', ['/binary', '/binary-unlabelled'])
+def test_binary_responses_are_rejected(server_url, path):
+    body = fetch(f'{server_url}{path}', max_bytes=1024 * 1024)
+    assert body.text is None
+    assert body.reason == 'content_type'
+
+
+def test_deadline_stops_a_slow_drip_server(server_url):
+    started = time.monotonic()
+    body = fetch(f'{server_url}/slow', max_bytes=10 * 1024 * 1024, stop_when_complete=False, max_seconds=0.5)
+    assert body.reason == 'deadline'
+    assert not body.complete
+    assert time.monotonic() - started < 2.5  # the full body takes 5 s
+    assert body.text.startswith('<html>')
+
+
+def test_stops_early_once_title_and_email_are_seen(server_url):
+    body = fetch(f'{server_url}/lead', max_bytes=10 * 1024 * 1024)
+    assert body.reason == 'early_stop'
+    assert 'hello@brand.com' in body.text
+
+
+def test_empty_title_does_not_stop_early(server_url):
+    body = fetch(f'{server_url}/empty-title', max_bytes=10 * 1024 * 1024)
+    assert body.reason == 'complete'
+    assert body.complete
+
+
+def test_probe_ignores_blank_title():
+    probe = HtmlStreamProbe()
+    probe.feed('<html><head><title>  </title></head><body>hello@brand.com ' + ' ' * 600, final=True)
+    assert probe.email == 'hello@brand.com'
+    assert probe.title is None
+    assert not probe.satisfied